@@ -0,0 +1,110 @@
+# address_cache.py
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from config import settings
+from models.address_models import Address
+from schemas.address_schemas import AddressResponse
+from serialization import ADDRESS_LIST
+
+class AddressBook:
+    """One user's addresses, serialized once, with an ETag derived from the content"""
+
+    __slots__ = ("addresses", "body", "etag", "loaded_at")
+
+    def __init__(self, addresses: list[AddressResponse], loaded_at: float):
+        self.addresses = {address.id: address for address in addresses}
+        self.body = ADDRESS_LIST.dump_json(addresses)
+        # Content-derived, so every worker hands out the same ETag for the same book
+        self.etag = f'"{hashlib.blake2b(self.body, digest_size=12).hexdigest()}"'
+        self.loaded_at = loaded_at
+
+class AddressBookCache:
+    """
+    Per-user address books for checkout screens, which read them far more
+    often than they change.
+
+    Entries are LRU-bounded and expire after ADDRESS_CACHE_TTL_SECONDS, which
+    also bounds staleness for writes made through other workers; writes made
+    through this worker invalidate the owner's entry immediately.
+    """
+
+    def __init__(self, max_users: int, ttl_seconds: float):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._books: OrderedDict[int, AddressBook] = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation; a load that raced one is not stored
+        self._epoch = 0
+        self.metrics = {"hits": 0, "misses": 0, "not_modified": 0, "invalidations": 0, "evictions": 0}
+
+    def _cached(self, user_id: int) -> Optional[AddressBook]:
+        with self._lock:
+            book = self._books.get(user_id)
+            if book is None or time.monotonic() - book.loaded_at >= self.ttl_seconds:
+                return None
+            self._books.move_to_end(user_id)
+            return book
+
+    def peek_etag(self, user_id: int) -> Optional[str]:
+        """ETag of a live cached book, without loading anything"""
+        book = self._cached(user_id)
+        return book.etag if book is not None else None
+
+    def get(self, user_id: int, db: Session) -> AddressBook:
+        """The user's address book; loaded with `db` on a miss"""
+        book = self._cached(user_id)
+        if book is not None:
+            self.metrics["hits"] += 1
+            return book
+        self.metrics["misses"] += 1
+
+        with self._lock:
+            epoch = self._epoch
+        rows = db.query(Address).filter(Address.owner_id == user_id).order_by(Address.id).all()
+        book = AddressBook(ADDRESS_LIST.validate_python(rows, from_attributes=True), time.monotonic())
+
+        with self._lock:
+            if epoch == self._epoch:
+                self._books[user_id] = book
+                self._books.move_to_end(user_id)
+                while len(self._books) > self.max_users:
+                    self._books.popitem(last=False)
+                    self.metrics["evictions"] += 1
+        return book
+
+    def get_address(self, db: Session, user_id: int, address_id: int) -> Optional[AddressResponse]:
+        """One of the user's addresses, or None if it isn't theirs (ownership check)"""
+        return self.get(user_id, db).addresses.get(address_id)
+
+    def record_not_modified(self) -> None:
+        self.metrics["not_modified"] += 1
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._books.pop(user_id, None)
+            self.metrics["invalidations"] += 1
+
+    def as_dict(self) -> dict:
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        served = lookups + self.metrics["not_modified"]
+        return {
+            **self.metrics,
+            "users_cached": len(self._books),
+            "hit_ratio": round(self.metrics["hits"] / lookups, 4) if lookups else None,
+            # 304s answered from the cache count as hits here
+            "request_hit_ratio": (
+                round((self.metrics["hits"] + self.metrics["not_modified"]) / served, 4) if served else None
+            ),
+            "max_users": self.max_users,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+address_cache = AddressBookCache(settings.ADDRESS_CACHE_MAX_USERS, settings.ADDRESS_CACHE_TTL_SECONDS)
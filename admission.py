@@ -0,0 +1,232 @@
+# admission.py
+
+import asyncio
+import logging
+import random
+import re
+import time
+from collections import deque
+from typing import Optional
+
+from fastapi.responses import JSONResponse
+from starlette.routing import compile_path
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+class RouteLimiter:
+    """
+    Adaptive concurrency limit for one route (AIMD on observed latency).
+
+    Up to `limit` requests run at once; the next `max_queue` wait at most
+    `queue_timeout_ms` for a slot, and everything beyond that is shed. After
+    each response the limit grows by 1/limit (about +1 per limit's worth of
+    fast responses) while it is the bottleneck, and is cut by `backoff` when
+    latency passes `latency_target_ms` or the handler answered with a 5xx,
+    at most once per target interval so one burst of slow responses counts
+    once. Everything runs on the event loop, so no locking is needed.
+    """
+
+    def __init__(self, route: str, initial_limit: int, min_limit: int, max_limit: int, max_queue: int,
+                 queue_timeout_ms: float, latency_target_ms: float, backoff: float):
+        self.route = route
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_ms / 1000
+        self.latency_target_ms = latency_target_ms
+        self.backoff = backoff
+        self.in_flight = 0
+        self.latency_ms: Optional[float] = None  # EWMA of admitted requests
+        self._waiters: deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        self.metrics = {
+            "admitted": 0, "queued": 0, "shed_queue_full": 0, "shed_queue_timeout": 0,
+            "shed_predicted_wait": 0, "limit_increases": 0, "limit_decreases": 0, "max_queue_wait_ms": 0.0
+        }
+
+    def _expected_wait_seconds(self) -> float:
+        if self.latency_ms is None:
+            return 0.0
+        return (len(self._waiters) + 1) * self.latency_ms / 1000 / self.limit
+
+    async def acquire(self) -> Optional[str]:
+        """Take a slot, waiting in the queue if needed; returns the shed reason instead when there is none"""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            self.metrics["admitted"] += 1
+            return None
+        if len(self._waiters) >= self.max_queue:
+            self.metrics["shed_queue_full"] += 1
+            return "queue_full"
+        if self._expected_wait_seconds() > self.queue_timeout_seconds:
+            # The queue ahead can't drain within the budget; don't make the client wait to find out
+            self.metrics["shed_predicted_wait"] += 1
+            return "predicted_wait"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.metrics["queued"] += 1
+        queued_at = time.perf_counter()
+        try:
+            await asyncio.wait((waiter,), timeout=self.queue_timeout_seconds)
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        if not waiter.done():
+            self._abandon(waiter)
+            self.metrics["shed_queue_timeout"] += 1
+            return "queue_timeout"
+        wait_ms = (time.perf_counter() - queued_at) * 1000
+        self.metrics["max_queue_wait_ms"] = max(self.metrics["max_queue_wait_ms"], wait_ms)
+        self.metrics["admitted"] += 1
+        return None
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done() and not waiter.cancelled():
+            # A slot was handed over just as we gave up on it; pass it on
+            self.in_flight -= 1
+            self._wake()
+            return
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self, latency_ms: float, overloaded: bool) -> None:
+        self._adjust(latency_ms, overloaded)
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        # Slots are handed to waiters directly, so a new arrival can't jump the queue
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(True)
+
+    def _adjust(self, latency_ms: float, overloaded: bool) -> None:
+        self.latency_ms = latency_ms if self.latency_ms is None else 0.8 * self.latency_ms + 0.2 * latency_ms
+        now = time.monotonic()
+        if overloaded or latency_ms > self.latency_target_ms:
+            if now - self._last_decrease >= self.latency_target_ms / 1000:
+                self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                self._last_decrease = now
+                self.metrics["limit_decreases"] += 1
+        elif self.in_flight >= int(self.limit) and self.limit < self.max_limit:
+            # Only grow while the limit is what's holding requests back
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+            self.metrics["limit_increases"] += 1
+
+    def as_dict(self) -> dict:
+        shed = self.metrics["shed_queue_full"] + self.metrics["shed_queue_timeout"] + self.metrics["shed_predicted_wait"]
+        return {
+            "limit": round(self.limit, 2),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "queue_depth": len(self._waiters),
+            "max_queue": self.max_queue,
+            "queue_timeout_ms": self.queue_timeout_seconds * 1000,
+            "latency_target_ms": self.latency_target_ms,
+            "latency_ewma_ms": round(self.latency_ms, 2) if self.latency_ms is not None else None,
+            **self.metrics,
+            "max_queue_wait_ms": round(self.metrics["max_queue_wait_ms"], 2),
+            "shed": shed
+        }
+
+class AdmissionController:
+    """Finds the limiter for a request by method and path, before routing and dependencies run"""
+
+    def __init__(self, routes: dict[str, int], latency_targets_ms: dict[str, float], default_latency_target_ms: float,
+                 min_limit: int, max_limit: int, max_queue: int, queue_timeout_ms: float, backoff: float):
+        self.limiters: dict[str, RouteLimiter] = {}
+        self._exact: dict[tuple[str, str], RouteLimiter] = {}
+        self._patterns: list[tuple[str, re.Pattern, RouteLimiter]] = []
+        for route, initial_limit in routes.items():
+            method, _, path = route.partition(" ")
+            limiter = RouteLimiter(
+                route, initial_limit, min_limit, max(max_limit, initial_limit), max_queue, queue_timeout_ms,
+                latency_targets_ms.get(route, default_latency_target_ms), backoff
+            )
+            self.limiters[route] = limiter
+            if "{" in path:
+                self._patterns.append((method, compile_path(path)[0], limiter))
+            else:
+                self._exact[(method, path)] = limiter
+
+    def limiter_for(self, method: str, path: str) -> Optional[RouteLimiter]:
+        limiter = self._exact.get((method, path))
+        if limiter is None:
+            for pattern_method, pattern, candidate in self._patterns:
+                if pattern_method == method and pattern.match(path):
+                    return candidate
+        return limiter
+
+    def as_dict(self) -> dict:
+        routes = {route: limiter.as_dict() for route, limiter in self.limiters.items()}
+        return {
+            "enabled": settings.ADMISSION_CONTROL_ENABLED,
+            "admitted": sum(route["admitted"] for route in routes.values()),
+            "queued": sum(route["queued"] for route in routes.values()),
+            "shed": sum(route["shed"] for route in routes.values()),
+            "routes": routes
+        }
+
+admission_controller = AdmissionController(
+    settings.ADMISSION_ROUTES,
+    settings.ADMISSION_LATENCY_TARGET_MS,
+    settings.ADMISSION_DEFAULT_LATENCY_TARGET_MS,
+    settings.ADMISSION_MIN_LIMIT,
+    settings.ADMISSION_MAX_LIMIT,
+    settings.ADMISSION_MAX_QUEUE,
+    settings.ADMISSION_QUEUE_TIMEOUT_MS,
+    settings.ADMISSION_BACKOFF
+)
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware; sheds with a 503 before the request is routed, so no
+    dependency (database session, auth lookup) has run. Retry-After is
+    jittered so shed clients don't all come back in the same second.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        limiter = None
+        if scope["type"] == "http" and settings.ADMISSION_CONTROL_ENABLED:
+            limiter = admission_controller.limiter_for(scope["method"], scope["path"])
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        reason = await limiter.acquire()
+        if reason is not None:
+            logger.debug(f"Shed {limiter.route} ({reason}); limit {limiter.limit:.1f}, in flight {limiter.in_flight}")
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry"},
+                status_code=503,
+                headers={"Retry-After": str(random.randint(1, settings.ADMISSION_RETRY_AFTER_MAX_SECONDS))}
+            )
+            await response(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            limiter.release((time.perf_counter() - start) * 1000, overloaded=status_code >= 500)
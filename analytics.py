@@ -0,0 +1,218 @@
+# analytics.py
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, func, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from locks import advisory_lock
+from models.address_models import Address
+from models.analytics_models import DeliveryRollup
+from models.order_models import Order, OrderStatus
+
+logger = logging.getLogger(__name__)
+
+MEASURES = ("created_count", "delivered_count", "cancelled_count", "on_time_count", "total_delivery_seconds")
+NO_AGENT = 0
+REBUILD_LOCK_NAME = "delivery-app:analytics-rebuild"
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+def hour_bucket(value: datetime) -> datetime:
+    return _as_utc(value).astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+# --- INCREMENTAL UPDATES ---
+def _upsert(db: Session, bucket_start: datetime, agent_id: Optional[int], pincode: Optional[str], deltas: dict) -> None:
+    """Add `deltas` to one rollup row, creating it if needed, in a single statement"""
+    table = DeliveryRollup.__table__
+    key = {"bucket_start": bucket_start, "agent_id": agent_id or NO_AGENT, "pincode": pincode or ""}
+    values = {**key, **{measure: 0 for measure in MEASURES}, **deltas}
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+        stmt = insert(table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["bucket_start", "agent_id", "pincode"],
+            set_={measure: table.c[measure] + stmt.excluded[measure] for measure in deltas}
+        )
+        db.execute(stmt)
+    elif dialect in ("mysql", "mariadb"):
+        stmt = mysql_insert(table).values(**values)
+        stmt = stmt.on_duplicate_key_update(
+            {measure: table.c[measure] + stmt.inserted[measure] for measure in deltas}
+        )
+        db.execute(stmt)
+    else:
+        result = db.execute(
+            update(table)
+            .where(*(table.c[column] == value for column, value in key.items()))
+            .values({measure: table.c[measure] + delta for measure, delta in deltas.items()})
+        )
+        if result.rowcount == 0:
+            db.execute(table.insert().values(**values))
+
+def _closed_deltas(order, status: OrderStatus, closed_at: datetime) -> dict:
+    if status == OrderStatus.CANCELLED:
+        return {"cancelled_count": 1}
+    deltas = {"delivered_count": 1}
+    created_at = _as_utc(order.created_at)
+    if created_at is not None:
+        deltas["total_delivery_seconds"] = max(0.0, (closed_at - created_at).total_seconds())
+    estimated = _as_utc(order.estimated_delivery_time)
+    if estimated is not None and closed_at <= estimated:
+        deltas["on_time_count"] = 1
+    return deltas
+
+def record_order_created(db: Session, order: Order, pincode: Optional[str]) -> None:
+    """Count a new order in the current hour's rollup (same transaction as the insert)"""
+    if not settings.ANALYTICS_INLINE_ROLLUPS:
+        return
+    created_at = _as_utc(order.created_at) or datetime.now(timezone.utc)
+    _upsert(db, hour_bucket(created_at), None, pincode, {"created_count": 1})
+
+def record_order_closed(db: Session, order: Order, status: OrderStatus, pincode: Optional[str] = None) -> None:
+    """Count a DELIVERED or CANCELLED transition (same transaction as the status change)"""
+    if not settings.ANALYTICS_INLINE_ROLLUPS or status not in (OrderStatus.DELIVERED, OrderStatus.CANCELLED):
+        return
+    if pincode is None:
+        pincode = order.delivery_address.pincode if order.delivery_address else ""
+    closed_at = datetime.now(timezone.utc)
+    if status == OrderStatus.DELIVERED and order.actual_delivery_time is not None:
+        closed_at = _as_utc(order.actual_delivery_time)
+    _upsert(db, hour_bucket(closed_at), order.delivery_agent_id, pincode, _closed_deltas(order, status, closed_at))
+
+# --- BATCH REBUILD ---
+def rebuild_rollups(db: Session, start: datetime, end: datetime, batch_size: int = 1000) -> int:
+    """
+    Recompute the rollup rows for hours in [start, end) from the orders table.
+
+    Used by the periodic job to repair drift in recent hours, and as the only
+    source of rollups when ANALYTICS_INLINE_ROLLUPS is off. Returns the number
+    of rollup rows written.
+    """
+    start, end = hour_bucket(start), hour_bucket(end)
+    columns = (
+        Order.status,
+        Order.created_at,
+        Order.updated_at,
+        Order.estimated_delivery_time,
+        Order.actual_delivery_time,
+        Order.delivery_agent_id,
+        Address.pincode
+    )
+    # Two plain range scans instead of one OR: orders created in the window
+    # (created_at index), and closed orders touched since it started
+    # ((status, updated_at) index; an order is never closed after its last
+    # update, so this covers every close in the window)
+    created = db.query(*columns).outerjoin(
+        Address, Address.id == Order.delivery_address_id
+    ).filter(
+        Order.created_at >= start,
+        Order.created_at < end
+    ).execution_options(yield_per=batch_size)
+    closed = db.query(*columns).outerjoin(
+        Address, Address.id == Order.delivery_address_id
+    ).filter(
+        Order.status.in_([OrderStatus.DELIVERED, OrderStatus.CANCELLED]),
+        Order.updated_at >= start
+    ).execution_options(yield_per=batch_size)
+
+    aggregates: dict[tuple, dict] = {}
+
+    def add(bucket: datetime, agent_id: Optional[int], pincode: Optional[str], deltas: dict) -> None:
+        if not (start <= bucket < end):
+            return
+        key = (bucket, agent_id or NO_AGENT, pincode or "")
+        measures = aggregates.setdefault(key, {measure: 0 for measure in MEASURES})
+        for measure, delta in deltas.items():
+            measures[measure] += delta
+
+    for order in created:
+        add(hour_bucket(order.created_at), None, order.pincode, {"created_count": 1})
+    for order in closed:
+        closed_at = _as_utc(order.actual_delivery_time or order.updated_at)
+        if closed_at is not None:
+            add(hour_bucket(closed_at), order.delivery_agent_id, order.pincode, _closed_deltas(order, order.status, closed_at))
+
+    db.execute(delete(DeliveryRollup).where(
+        DeliveryRollup.bucket_start >= start,
+        DeliveryRollup.bucket_start < end
+    ))
+    if aggregates:
+        db.execute(DeliveryRollup.__table__.insert(), [
+            {"bucket_start": bucket, "agent_id": agent_id, "pincode": pincode, **measures}
+            for (bucket, agent_id, pincode), measures in aggregates.items()
+        ])
+    db.commit()
+    return len(aggregates)
+
+def rebuild_recent_rollups() -> int:
+    """Periodic job: rebuild the last ANALYTICS_REBUILD_WINDOW_HOURS hours, including the current one (one worker at a time)"""
+    end = hour_bucket(datetime.now(timezone.utc)) + timedelta(hours=1)
+    start = end - timedelta(hours=settings.ANALYTICS_REBUILD_WINDOW_HOURS + 1)
+    with advisory_lock(REBUILD_LOCK_NAME) as acquired:
+        if not acquired:
+            return 0
+        db = SessionLocal()
+        try:
+            written = rebuild_rollups(db, start, end)
+        finally:
+            db.close()
+    logger.info(f"Rebuilt {written} delivery rollup rows for {start.isoformat()} - {end.isoformat()}")
+    return written
+
+# --- QUERIES (rollup rows only) ---
+def _measure_sums():
+    return [func.coalesce(func.sum(getattr(DeliveryRollup, measure)), 0).label(measure) for measure in MEASURES]
+
+def _stats(row) -> dict:
+    delivered = int(row.delivered_count)
+    return {
+        "created": int(row.created_count),
+        "delivered": delivered,
+        "cancelled": int(row.cancelled_count),
+        "on_time_rate": round(row.on_time_count / delivered, 4) if delivered else None,
+        "avg_delivery_minutes": round(row.total_delivery_seconds / delivered / 60, 2) if delivered else None
+    }
+
+def _in_range(query, start: datetime, end: datetime):
+    return query.filter(DeliveryRollup.bucket_start >= hour_bucket(start), DeliveryRollup.bucket_start < end)
+
+def summarize(db: Session, start: datetime, end: datetime) -> dict:
+    row = _in_range(db.query(*_measure_sums()), start, end).one()
+    return _stats(row)
+
+def stats_by_agent(db: Session, start: datetime, end: datetime) -> list[dict]:
+    rows = _in_range(db.query(DeliveryRollup.agent_id, *_measure_sums()), start, end).group_by(
+        DeliveryRollup.agent_id
+    ).order_by(DeliveryRollup.agent_id).all()
+    return [{"agent_id": row.agent_id or None, **_stats(row)} for row in rows]
+
+def stats_by_pincode(db: Session, start: datetime, end: datetime) -> list[dict]:
+    rows = _in_range(db.query(DeliveryRollup.pincode, *_measure_sums()), start, end).group_by(
+        DeliveryRollup.pincode
+    ).order_by(DeliveryRollup.pincode).all()
+    return [{"pincode": row.pincode, **_stats(row)} for row in rows]
+
+def stats_by_hour(db: Session, start: datetime, end: datetime) -> list[dict]:
+    rows = _in_range(db.query(DeliveryRollup.bucket_start, *_measure_sums()), start, end).group_by(
+        DeliveryRollup.bucket_start
+    ).order_by(DeliveryRollup.bucket_start).all()
+    hours = []
+    backlog = 0
+    for row in rows:
+        stats = _stats(row)
+        backlog += stats["created"] - stats["delivered"] - stats["cancelled"]
+        hours.append({"bucket_start": _as_utc(row.bucket_start), "backlog": backlog, **stats})
+    return hours
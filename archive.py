@@ -0,0 +1,188 @@
+# archive.py
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Union
+
+from sqlalchemy import delete, func, insert, literal, select, union_all
+from sqlalchemy.orm import Session, selectinload
+
+from config import settings
+from database import SessionLocal
+from models.archive_models import ArchivedOrder, ArchivedOrderItem
+from models.order_models import Order, OrderItem, OrderStatus
+import status_counters
+
+logger = logging.getLogger(__name__)
+
+ARCHIVABLE_STATUSES = (OrderStatus.DELIVERED, OrderStatus.CANCELLED)
+
+# Columns copied verbatim from the hot tables
+_ORDER_COLUMNS = [column.name for column in Order.__table__.columns]
+_ITEM_COLUMNS = [column.name for column in OrderItem.__table__.columns]
+
+class OrderArchiver:
+    """
+    Moves DELIVERED/CANCELLED orders older than ARCHIVE_AFTER_DAYS, with their
+    items, into the archive tables.
+
+    Each batch is its own short transaction (copy, then delete, by primary key)
+    and batches are separated by a pause, so the job never holds locks for long
+    and yields to the request path.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.metrics = {
+            "runs": 0,
+            "orders_moved": 0,
+            "items_moved": 0,
+            "last_run_orders": 0,
+            "last_run_seconds": None,
+            "last_run_rows_per_second": None,
+            "last_batch_ms": None
+        }
+
+    def archive_batch(self, db: Session, cutoff: datetime, batch_size: int) -> tuple[int, int]:
+        """Archive up to `batch_size` orders; returns (orders moved, items moved)"""
+        rows = db.query(Order.id, Order.status).filter(
+            Order.status.in_(ARCHIVABLE_STATUSES),
+            Order.updated_at < cutoff
+        ).order_by(Order.updated_at).limit(batch_size).with_for_update(skip_locked=True).all()
+        order_ids = [row.id for row in rows]
+        if not order_ids:
+            db.rollback()
+            return 0, 0
+
+        db.execute(insert(ArchivedOrder.__table__).from_select(
+            _ORDER_COLUMNS,
+            select(*(Order.__table__.c[name] for name in _ORDER_COLUMNS)).where(Order.id.in_(order_ids))
+        ))
+        db.execute(insert(ArchivedOrderItem.__table__).from_select(
+            _ITEM_COLUMNS,
+            select(*(OrderItem.__table__.c[name] for name in _ITEM_COLUMNS)).where(OrderItem.order_id.in_(order_ids))
+        ))
+        items = db.execute(delete(OrderItem.__table__).where(OrderItem.order_id.in_(order_ids))).rowcount
+        db.execute(delete(Order.__table__).where(Order.id.in_(order_ids)))
+        # Archived orders leave the live counts
+        removed: dict[OrderStatus, int] = {}
+        for row in rows:
+            removed[row.status] = removed.get(row.status, 0) - 1
+        status_counters.record(db, status_counters.ORDER, removed)
+        db.commit()
+        return len(order_ids), items
+
+    def run(self, max_batches: Optional[int] = None) -> int:
+        """Archive in throttled batches until nothing is left or max_batches is reached"""
+        if not self._lock.acquire(blocking=False):
+            return 0
+        try:
+            max_batches = max_batches or settings.ARCHIVE_MAX_BATCHES_PER_RUN
+            cutoff = datetime.now(timezone.utc) - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+            start = time.perf_counter()
+            moved_orders = moved_items = 0
+            for batch in range(max_batches):
+                if batch:
+                    time.sleep(settings.ARCHIVE_BATCH_PAUSE_SECONDS)
+                batch_start = time.perf_counter()
+                db = SessionLocal()
+                try:
+                    orders, items = self.archive_batch(db, cutoff, settings.ARCHIVE_BATCH_SIZE)
+                finally:
+                    db.close()
+                self.metrics["last_batch_ms"] = round((time.perf_counter() - batch_start) * 1000, 2)
+                moved_orders += orders
+                moved_items += items
+                if orders < settings.ARCHIVE_BATCH_SIZE:
+                    break
+
+            elapsed = time.perf_counter() - start
+            rows = moved_orders + moved_items
+            self.metrics["runs"] += 1
+            self.metrics["orders_moved"] += moved_orders
+            self.metrics["items_moved"] += moved_items
+            self.metrics["last_run_orders"] = moved_orders
+            self.metrics["last_run_seconds"] = round(elapsed, 3)
+            self.metrics["last_run_rows_per_second"] = round(rows / elapsed, 1) if elapsed > 0 else None
+            if moved_orders:
+                logger.info(
+                    f"Archived {moved_orders} orders and {moved_items} items in {elapsed:.2f}s "
+                    f"({self.metrics['last_run_rows_per_second']} rows/s)"
+                )
+            return moved_orders
+        finally:
+            self._lock.release()
+
+order_archiver = OrderArchiver()
+
+# --- READ FALL-THROUGH ---
+def find_customer_order_version(db: Session, order_id: str, customer_id: int):
+    """The order's version as a one-column row (hot table, then archive), or None"""
+    row = db.execute(
+        select(Order.version).where(Order.id == order_id, Order.customer_id == customer_id)
+    ).first()
+    if row is not None:
+        return row
+    return db.execute(
+        select(ArchivedOrder.version).where(ArchivedOrder.id == order_id, ArchivedOrder.customer_id == customer_id)
+    ).first()
+
+def find_customer_order(db: Session, order_id: str, customer_id: int) -> Optional[Union[Order, ArchivedOrder]]:
+    """Look an order up in the hot table, then in the archive"""
+    order = db.query(Order).filter(Order.id == order_id, Order.customer_id == customer_id).first()
+    if order is not None:
+        return order
+    return db.query(ArchivedOrder).filter(
+        ArchivedOrder.id == order_id,
+        ArchivedOrder.customer_id == customer_id
+    ).first()
+
+def page_customer_orders(
+    db: Session,
+    customer_id: int,
+    order_status: Optional[OrderStatus],
+    page: int,
+    size: int
+) -> tuple[int, list[Union[Order, ArchivedOrder]]]:
+    """
+    One page of a customer's orders, newest first, across hot and archived rows.
+
+    Filters on an active status only touch the hot table; otherwise the page is
+    taken from a UNION ALL of both tables by created_at.
+    """
+    hot = select(Order.id, Order.created_at, literal(False).label("archived")).where(Order.customer_id == customer_id)
+    if order_status is not None:
+        hot = hot.where(Order.status == order_status)
+
+    if order_status is not None and order_status not in ARCHIVABLE_STATUSES:
+        combined = hot.subquery()
+    else:
+        cold = select(ArchivedOrder.id, ArchivedOrder.created_at, literal(True).label("archived")).where(
+            ArchivedOrder.customer_id == customer_id
+        )
+        if order_status is not None:
+            cold = cold.where(ArchivedOrder.status == order_status)
+        combined = union_all(hot, cold).subquery()
+
+    total = db.execute(select(func.count()).select_from(combined)).scalar()
+    page_rows = db.execute(
+        select(combined.c.id, combined.c.archived)
+        .order_by(combined.c.created_at.desc())
+        .offset((page - 1) * size)
+        .limit(size)
+    ).all()
+
+    hot_ids = [row.id for row in page_rows if not row.archived]
+    cold_ids = [row.id for row in page_rows if row.archived]
+    loaded = {}
+    if hot_ids:
+        for order in db.query(Order).options(selectinload(Order.order_items)).filter(Order.id.in_(hot_ids)):
+            loaded[(order.id, False)] = order
+    if cold_ids:
+        for order in db.query(ArchivedOrder).options(selectinload(ArchivedOrder.order_items)).filter(
+            ArchivedOrder.id.in_(cold_ids)
+        ):
+            loaded[(order.id, True)] = order
+    return total, [loaded[(row.id, bool(row.archived))] for row in page_rows if (row.id, bool(row.archived)) in loaded]
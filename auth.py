@@ -8,6 +8,7 @@ from jose import JWTError, jwt
 from database import get_db
 from models.auth_models import User
 from config import settings
+from revocation import revocation_filter
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/verify-otp")
@@ -24,8 +25,7 @@ def generate_otp() -> str:
     """Generate a cryptographically secure 6-digit OTP"""
     return ''.join(secrets.choice(string.digits) for _ in range(6))
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> dict:
-    """Get current user from JWT token and return phone_number dict for compatibility"""
+def _token_user_id(token: str) -> int:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -35,14 +35,37 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id: str = payload.get("sub")
-        if user_id is None:
+        if user_id is None or payload.get("typ") == "refresh":
             raise credentials_exception
-    except JWTError:
+        user_id = int(user_id)
+    except (JWTError, ValueError):
+        raise credentials_exception
+    # Tokens issued before sessions existed carry no sid and expire on their own
+    if settings.REVOCATION_ENABLED and revocation_filter.is_revoked(payload.get("sid")):
         raise credentials_exception
+    return user_id
+
+def get_current_user_id(token: str = Depends(oauth2_scheme)) -> int:
+    """User id from the JWT alone, without a database lookup (tokens are only issued to verified users)"""
+    return _token_user_id(token)
+
+def get_export_user_id(user_id: int = Depends(get_current_user_id)) -> int:
+    """Finance/ops users allowed to export every customer's orders (EXPORT_USER_IDS)"""
+    if user_id not in settings.EXPORT_USER_IDS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed to export orders")
+    return user_id
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> dict:
+    """Get current user from JWT token and return phone_number dict for compatibility"""
+    user_id = _token_user_id(token)
     
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    user = db.query(User).filter(User.id == user_id).first()
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     if not user.is_verified:
         raise HTTPException(status_code=400, detail="User is not verified")
     
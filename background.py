@@ -0,0 +1,78 @@
+# background.py
+
+import asyncio
+import logging
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+class PeriodicTask:
+    """Runs a blocking job in a worker thread every `interval_seconds` for the lifetime of the app"""
+
+    def __init__(self, name: str, interval_seconds: float, func: Callable[[], object]):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.func = func
+        self.runs = 0
+        self.failures = 0
+        self.last_duration_ms = None
+        self._task = None
+
+    async def _loop(self):
+        while True:
+            start = time.perf_counter()
+            try:
+                await asyncio.to_thread(self.func)
+                self.runs += 1
+            except Exception:
+                self.failures += 1
+                logger.exception(f"Background task {self.name} failed")
+            self.last_duration_ms = round((time.perf_counter() - start) * 1000, 2)
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name=self.name)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def as_dict(self) -> dict:
+        return {
+            "interval_seconds": self.interval_seconds,
+            "running": self._task is not None,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_duration_ms": self.last_duration_ms
+        }
+
+class BackgroundTasks:
+    """The set of periodic jobs started and stopped by the app lifespan handler"""
+
+    def __init__(self):
+        self.tasks: dict[str, PeriodicTask] = {}
+
+    def add(self, name: str, interval_seconds: float, func: Callable[[], object]) -> PeriodicTask:
+        task = PeriodicTask(name, interval_seconds, func)
+        self.tasks[name] = task
+        return task
+
+    def start_all(self) -> None:
+        for task in self.tasks.values():
+            task.start()
+
+    async def stop_all(self) -> None:
+        for task in self.tasks.values():
+            await task.stop()
+
+    def as_dict(self) -> dict:
+        return {name: task.as_dict() for name, task in self.tasks.items()}
+
+background_tasks = BackgroundTasks()
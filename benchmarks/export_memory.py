@@ -0,0 +1,103 @@
+# benchmarks/export_memory.py
+#
+# Shows that the streaming order export keeps memory flat as the number of
+# exported rows grows. Builds a throwaway SQLite database, fills it with
+# orders and items, then streams it through exports.iter_csv while sampling
+# tracemalloc.
+#
+#   python benchmarks/export_memory.py --orders 2000000
+#
+# Point DATABASE_URL at a PostgreSQL/MySQL copy instead to measure a real
+# server-side cursor (the script only seeds the database if it is empty).
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("--orders", type=int, default=200_000, help="orders to seed (two items each)")
+parser.add_argument("--chunk-size", type=int, default=1000)
+args = parser.parse_args()
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/export_bench.db")
+for name, value in {
+    "SECRET_KEY": "benchmark", "ALGORITHM": "HS256", "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "REFRESH_TOKEN_EXPIRE_DAYS": "7", "OTP_EXPIRE_MINUTES": "5"
+}.items():
+    os.environ.setdefault(name, value)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, insert
+
+import exports
+from database import Base, SessionLocal, engine
+import models.address_models  # noqa: F401 - register every mapped table
+import models.archive_models  # noqa: F401
+import models.auth_models  # noqa: F401
+import models.delivery_models  # noqa: F401
+from models.order_models import Order, OrderItem, OrderStatus
+
+def seed(count: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if db.query(func.count(Order.id)).scalar():
+            return
+        base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        batch = 10_000
+        for offset in range(0, count, batch):
+            orders, items = [], []
+            for n in range(offset, min(offset + batch, count)):
+                order_id = f"{n:036d}"
+                orders.append({
+                    "id": order_id, "order_number": f"ORD{n:017d}", "customer_id": 1 + n % 5000,
+                    "delivery_address_id": 1, "status": OrderStatus.DELIVERED, "total_amount": 260.0,
+                    "delivery_fee": 50.0, "tax_amount": 10.0, "subtotal": 200.0,
+                    "created_at": base + timedelta(seconds=n), "updated_at": base + timedelta(seconds=n)
+                })
+                for menu_item_id in (1, 2):
+                    items.append({
+                        "order_id": order_id, "menu_item_id": menu_item_id, "item_name": f"Menu Item {menu_item_id}",
+                        "item_price": 100.0, "quantity": 1
+                    })
+            db.execute(insert(Order), orders)
+            db.execute(insert(OrderItem), items)
+            db.commit()
+    finally:
+        db.close()
+
+def main() -> None:
+    print(f"Seeding {args.orders:,} orders into {os.environ['DATABASE_URL']} ...")
+    seed(args.orders)
+
+    tracemalloc.start()
+    checkpoints = {max(1, args.orders * step // 10) for step in range(1, 11)}
+    exported = 0
+    written = 0
+    start = time.perf_counter()
+    print(f"{'orders':>12} {'MiB written':>12} {'current KiB':>12} {'peak KiB':>10} {'orders/s':>10}")
+    chunks = exports.iter_order_chunks(None, None, None, args.chunk_size)
+
+    def counting_chunks():
+        nonlocal exported
+        for chunk in chunks:
+            exported += len(chunk)
+            yield chunk
+
+    reported = set()
+    for text in exports.iter_csv(counting_chunks()):
+        written += len(text)
+        due = [point for point in checkpoints if point <= exported and point not in reported]
+        if due:
+            reported.update(due)
+            current, peak = tracemalloc.get_traced_memory()
+            elapsed = time.perf_counter() - start
+            print(f"{exported:>12,} {written / 2**20:>12.1f} {current / 1024:>12.0f} {peak / 1024:>10.0f} {exported / elapsed:>10,.0f}")
+    tracemalloc.stop()
+
+if __name__ == "__main__":
+    main()
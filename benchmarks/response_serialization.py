@@ -0,0 +1,106 @@
+# benchmarks/response_serialization.py
+#
+# Per-response cost of serializing one page of orders (with items), the old
+# way and the fast path:
+#
+#   old:  model_validate per item and per order -> OrderListResponse ->
+#         FastAPI response_model validation/serialization -> stdlib json
+#   fast: one TypeAdapter validation of the page -> FastJSONResponse
+#         (pydantic-core to_json), returned as-is
+#
+# Orders are in-memory stand-ins for ORM rows; no database needed.
+#
+#   python benchmarks/response_serialization.py --orders 100 --items 3
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+for name, value in {
+    "DATABASE_URL": "sqlite://", "SECRET_KEY": "benchmark", "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30", "REFRESH_TOKEN_EXPIRE_DAYS": "7", "OTP_EXPIRE_MINUTES": "5"
+}.items():
+    os.environ.setdefault(name, value)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from models.order_models import OrderStatus
+from routers.order_router import build_order_response_data
+from schemas.order_schemas import OrderItemResponse, OrderListResponse, OrderResponse
+from serialization import FastJSONResponse, ORDER_LIST
+
+parser = argparse.ArgumentParser(description="Order page serialization cost")
+parser.add_argument("--orders", type=int, default=100)
+parser.add_argument("--items", type=int, default=3)
+parser.add_argument("--repeat", type=int, default=200)
+args = parser.parse_args()
+
+def fake_orders(count: int, items: int) -> list[SimpleNamespace]:
+    now = datetime.now(timezone.utc)
+    orders = []
+    for n in range(count):
+        orders.append(SimpleNamespace(
+            id=f"00000000-0000-0000-0000-{n:012d}", order_number=f"ORD{n:08d}", customer_id=1,
+            delivery_address_id=1, delivery_agent_id=n % 7 or None, status=OrderStatus.DISPATCHED,
+            total_amount=367.5, delivery_fee=50.0, tax_amount=17.5, subtotal=300.0,
+            estimated_delivery_time=now + timedelta(minutes=30), actual_delivery_time=None,
+            delivery_instructions="Leave at the gate", created_at=now, updated_at=now,
+            order_items=[
+                SimpleNamespace(
+                    id=n * items + i, menu_item_id=i, item_name=f"Menu Item {i}", item_price=100.0,
+                    quantity=1, special_instructions=None, created_at=now
+                )
+                for i in range(items)
+            ]
+        ))
+    return orders
+
+def old_page(orders) -> dict:
+    data = []
+    for order in orders:
+        response_data = build_order_response_data(order)
+        response_data["order_items"] = [OrderItemResponse.model_validate(item) for item in order.order_items]
+        data.append(OrderResponse.model_validate(response_data))
+    return OrderListResponse(orders=data, total=len(orders), page=1, size=len(orders))
+
+async def time_old(orders) -> tuple[float, int]:
+    field = create_response_field(name="Response_get_user_orders", type_=OrderListResponse)
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        content = await serialize_response(field=field, response_content=old_page(orders), is_coroutine=True)
+        body = JSONResponse(content).body
+    return (time.perf_counter() - start) / args.repeat, len(body)
+
+def time_fast(orders) -> tuple[float, int]:
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        body = FastJSONResponse({
+            "orders": ORDER_LIST.validate_python([build_order_response_data(order) for order in orders]),
+            "total": len(orders),
+            "page": 1,
+            "size": len(orders)
+        }).body
+    return (time.perf_counter() - start) / args.repeat, len(body)
+
+def main() -> None:
+    orders = fake_orders(args.orders, args.items)
+    asyncio.run(time_old(orders))  # warm up
+    time_fast(orders)
+    old_seconds, old_bytes = asyncio.run(time_old(orders))
+    fast_seconds, fast_bytes = time_fast(orders)
+
+    print(f"Page of {args.orders} orders x {args.items} items, mean of {args.repeat} responses\n")
+    print(f"{'path':<10} {'ms/response':>12} {'us/order':>9} {'bytes':>8}")
+    for label, seconds, size in (("old", old_seconds, old_bytes), ("fast", fast_seconds, fast_bytes)):
+        print(f"{label:<10} {seconds * 1000:>12.2f} {seconds / args.orders * 1e6:>9.1f} {size:>8}")
+    print(f"\nSpeed-up: {old_seconds / fast_seconds:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# benchmarks/sms_outage.py
+#
+# OTP send latency and success rate while the primary SMS provider is
+# partially down, with and without the resilience layer in sms_providers.
+# Uses FaultInjectingProvider only; nothing is sent.
+#
+#   python benchmarks/sms_outage.py --messages 200 --failure-rate 0.3 --hang-rate 0.2
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sms_providers import FaultInjectingProvider, ResilientSender, SMSDeliveryError, SMSProviderError
+
+parser = argparse.ArgumentParser(description="OTP latency under a partial provider outage")
+parser.add_argument("--messages", type=int, default=200)
+parser.add_argument("--timeout", type=float, default=1.0, help="OTP timeout in seconds")
+parser.add_argument("--hedge-delay", type=float, default=0.25)
+parser.add_argument("--failure-rate", type=float, default=0.3, help="primary: share of fast errors")
+parser.add_argument("--hang-rate", type=float, default=0.2, help="primary: share of requests that hang until timeout")
+args = parser.parse_args()
+
+def primary() -> FaultInjectingProvider:
+    return FaultInjectingProvider(
+        "primary", latency_ms=150, jitter_ms=100,
+        failure_rate=args.failure_rate, hang_rate=args.hang_rate, seed=1
+    )
+
+def secondary() -> FaultInjectingProvider:
+    return FaultInjectingProvider("secondary", latency_ms=250, jitter_ms=100, seed=2)
+
+def run(name: str, send) -> None:
+    latencies, delivered = [], 0
+    for n in range(args.messages):
+        start = time.perf_counter()
+        try:
+            send(f"+9100000{n:05d}", "Your verification code is 123456")
+            delivered += 1
+        except (SMSProviderError, SMSDeliveryError):
+            pass
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+    print(
+        f"{name:<28} delivered {delivered / args.messages:>6.1%}  "
+        f"p50 {pick(0.50):>7.1f}ms  p95 {pick(0.95):>7.1f}ms  p99 {pick(0.99):>7.1f}ms  "
+        f"mean {statistics.fmean(latencies):>7.1f}ms"
+    )
+
+def main() -> None:
+    print(f"{args.messages} OTPs, primary failing {args.failure_rate:.0%} and hanging {args.hang_rate:.0%}\n")
+
+    direct = primary()
+    run("primary only, no breaker", lambda to, body: direct.send(to, body, args.timeout))
+
+    for label, providers, hedge_kinds in (
+        ("breaker + failover", [primary(), secondary()], []),
+        ("breaker + failover + hedge", [primary(), secondary()], ["otp"])
+    ):
+        sender = ResilientSender(
+            providers=providers,
+            timeouts={"otp": args.timeout},
+            default_timeout=args.timeout,
+            hedge_kinds=hedge_kinds,
+            hedge_delay_seconds=args.hedge_delay,
+            failure_threshold=5,
+            reset_seconds=5.0
+        )
+        run(label, lambda to, body: sender.send("otp", to, body))
+        metrics = sender.as_dict()
+        print(f"{'':<28} failovers {metrics['failovers']}, hedges {metrics['hedges']} (won {metrics['hedge_wins']}), "
+              f"breaker opened {metrics['providers']['primary']['breaker']['times_opened']}x, "
+              f"short-circuited {metrics['providers']['primary']['short_circuited']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# benchmarks/trip_planner.py
+#
+# Trip planner runtime and total distance against one order per trip, on
+# synthetic orders in a dense area around a pickup hub. Every trip starts and
+# ends at the hub. Pure Python; no database needed.
+#
+#   python benchmarks/trip_planner.py --orders 2000 --capacity 3
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+# trip_planner imports the app settings; no database is opened
+for name, value in {
+    "DATABASE_URL": "sqlite://", "SECRET_KEY": "benchmark", "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30", "REFRESH_TOKEN_EXPIRE_DAYS": "7", "OTP_EXPIRE_MINUTES": "5"
+}.items():
+    os.environ.setdefault(name, value)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trip_planner import Stop, TripPlanner, distance_km, distance_matrix, nearest_neighbour, path_length, two_opt
+
+parser = argparse.ArgumentParser(description="Trip planner runtime and distance")
+parser.add_argument("--orders", type=int, default=2000)
+parser.add_argument("--capacity", type=int, default=3)
+parser.add_argument("--radius-km", type=float, default=4.0, help="drops are spread over this radius around the hub")
+parser.add_argument("--drop-radius-km", type=float, default=2.5)
+parser.add_argument("--tsp-size", type=int, default=12, help="drops per route in the sequencing comparison")
+parser.add_argument("--seed", type=int, default=7)
+args = parser.parse_args()
+
+HUB = (13.0827, 80.2707)  # Chennai
+KM_PER_DEGREE = 111.0
+
+def random_point(rng: random.Random) -> tuple[float, float]:
+    return (
+        HUB[0] + rng.uniform(-args.radius_km, args.radius_km) / KM_PER_DEGREE,
+        HUB[1] + rng.uniform(-args.radius_km, args.radius_km) / KM_PER_DEGREE
+    )
+
+def round_trip_km(drops: list[tuple[float, float]]) -> float:
+    points = [HUB, *drops, HUB]
+    return sum(distance_km(a, b) for a, b in zip(points, points[1:]))
+
+def main() -> None:
+    rng = random.Random(args.seed)
+    now = datetime.now(timezone.utc)
+    stops = []
+    for n in range(args.orders):
+        latitude, longitude = random_point(rng)
+        created_at = now - timedelta(minutes=rng.uniform(0, 30))
+        stops.append(Stop(f"order-{n}", latitude, longitude, None, created_at, created_at + timedelta(minutes=45)))
+
+    single_km = sum(round_trip_km([stop.point]) for stop in stops)
+
+    planner = TripPlanner(
+        drop_radius_km=args.drop_radius_km,
+        pickup_window=timedelta(minutes=10),
+        speed_kmph=20.0,
+        handling_minutes=4.0
+    )
+    waiting = {stop.order_id: stop for stop in stops}
+    trips = []
+    start = time.perf_counter()
+    while waiting:
+        trip = planner.build_trip(HUB, list(waiting.values()), args.capacity, now)
+        for stop in trip:
+            del waiting[stop.order_id]
+        trips.append(trip)
+    elapsed = time.perf_counter() - start
+    batched_km = sum(round_trip_km([stop.point for stop in trip]) for trip in trips)
+
+    print(f"{args.orders} orders within {args.radius_km} km of the hub, capacity {args.capacity}\n")
+    print(f"{'':<22} {'trips':>7} {'total km':>10} {'km/order':>9}")
+    print(f"{'one order per trip':<22} {args.orders:>7} {single_km:>10.1f} {single_km / args.orders:>9.2f}")
+    print(f"{'batched trips':<22} {len(trips):>7} {batched_km:>10.1f} {batched_km / args.orders:>9.2f}")
+    print(f"\nDistance saved: {1 - batched_km / single_km:.1%}; "
+          f"avg orders/trip {args.orders / len(trips):.2f}; "
+          f"planning {elapsed * 1000:.0f} ms total, {elapsed / len(trips) * 1e6:.0f} us per trip")
+
+    # Sequencing quality on larger routes: nearest neighbour alone vs plus 2-opt
+    nn_total = opt_total = nn_time = opt_time = 0.0
+    routes = 200
+    for _ in range(routes):
+        matrix = distance_matrix([HUB, *(random_point(rng) for _ in range(args.tsp_size))])
+        t0 = time.perf_counter()
+        order = nearest_neighbour(matrix)
+        t1 = time.perf_counter()
+        improved = two_opt(matrix, order)
+        t2 = time.perf_counter()
+        nn_total += path_length(matrix, order)
+        opt_total += path_length(matrix, improved)
+        nn_time += t1 - t0
+        opt_time += t2 - t1
+    print(f"\n{routes} routes of {args.tsp_size} drops: nearest neighbour {nn_total / routes:.2f} km "
+          f"({nn_time / routes * 1e6:.0f} us), + 2-opt {opt_total / routes:.2f} km "
+          f"(+{opt_time / routes * 1e6:.0f} us), {1 - opt_total / nn_total:.1%} shorter")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 # /home/asus/projects/delivery-management/config.py
 
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -8,10 +9,20 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file='.env', env_file_encoding='utf-8')
 
     DATABASE_URL: str
+    # Read replicas for read-only endpoints, as a JSON list of URLs
+    DATABASE_REPLICA_URLS: list[str] = []
+    # After a client writes, its reads go to the primary for this long
+    READ_YOUR_WRITES_SECONDS: float = 5.0
     
-    TWILIO_ACCOUNT_SID: str
-    TWILIO_AUTH_TOKEN: str
-    TWILIO_PHONE_NUMBER: str
+    # Twilio credentials are optional so a worker can boot (and serve
+    # everything except SMS) without them; the client is created lazily.
+    TWILIO_ACCOUNT_SID: Optional[str] = None
+    TWILIO_AUTH_TOKEN: Optional[str] = None
+    TWILIO_PHONE_NUMBER: Optional[str] = None
+    # Optional second Twilio account/number used for failover
+    TWILIO_SECONDARY_ACCOUNT_SID: Optional[str] = None
+    TWILIO_SECONDARY_AUTH_TOKEN: Optional[str] = None
+    TWILIO_SECONDARY_PHONE_NUMBER: Optional[str] = None
 
     SECRET_KEY: str
     ALGORITHM: str
@@ -20,5 +31,186 @@ class Settings(BaseSettings):
 
     OTP_EXPIRE_MINUTES: int
 
+    # Thread pools for blocking work. THREADPOOL_SIZE is anyio's limiter (sync
+    # dependencies, undecorated sync handlers); handlers pick a pool with @offload
+    THREADPOOL_SIZE: int = 40
+    IO_POOL_SIZE: int = 32
+    IO_POOL_MAX_QUEUE: int = 256
+    CPU_POOL_SIZE: Optional[int] = None  # defaults to the number of cores
+    CPU_POOL_MAX_QUEUE: int = 64
+
+    # Admission control for write-heavy routes, keyed "METHOD /path" as routed.
+    # ADMISSION_ROUTES holds each route's starting concurrency limit; limits then
+    # adapt (AIMD) to the route's latency target. Over the limit, requests queue
+    # for up to ADMISSION_QUEUE_TIMEOUT_MS and are otherwise shed with a 503
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_ROUTES: dict[str, int] = {
+        "POST /api/orders/": 16,
+        "POST /api/auth/send-otp": 8,
+        "POST /api/delivery/agents/{agent_id}/location": 32
+    }
+    ADMISSION_LATENCY_TARGET_MS: dict[str, float] = {
+        "POST /api/orders/": 500.0,
+        "POST /api/auth/send-otp": 2000.0,
+        "POST /api/delivery/agents/{agent_id}/location": 200.0
+    }
+    ADMISSION_DEFAULT_LATENCY_TARGET_MS: float = 500.0
+    ADMISSION_MIN_LIMIT: int = 2
+    ADMISSION_MAX_LIMIT: int = 128
+    ADMISSION_MAX_QUEUE: int = 64
+    ADMISSION_QUEUE_TIMEOUT_MS: float = 250.0
+    ADMISSION_BACKOFF: float = 0.9
+    ADMISSION_RETRY_AFTER_MAX_SECONDS: int = 3
+
+    # Token-bucket rate limits for the auth endpoints: name -> (burst, tokens per
+    # minute), keyed by phone number or client address. "memory" keeps buckets
+    # per worker; "sql" shares them through the rate_limit_buckets table
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory | sql
+    RATE_LIMITS: dict[str, tuple[int, float]] = {
+        "send_otp_phone": (3, 1.0),
+        "send_otp_client": (10, 5.0),
+        "verify_otp_phone": (5, 2.0),
+        "verify_otp_client": (20, 10.0),
+        "refresh_token_client": (30, 30.0)
+    }
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    # Reverse proxies in front of the app that append to X-Forwarded-For; the
+    # client address is that many hops from the right (0 ignores the header)
+    RATE_LIMIT_TRUSTED_PROXIES: int = 0
+    RATE_LIMIT_PRUNE_INTERVAL_SECONDS: float = 300.0
+
+    # Token revocation (logout, refresh-token reuse). ENABLED checks every access
+    # token's session against the in-memory filter; refresh always checks
+    REVOCATION_ENABLED: bool = True
+    REVOCATION_FILTER_CAPACITY: int = 1000000
+    REVOCATION_FILTER_ERROR_RATE: float = 0.001
+    REVOCATION_SYNC_SECONDS: float = 10.0
+    REVOCATION_SYNC_OVERLAP_SECONDS: float = 60.0
+    REVOCATION_REBUILD_SECONDS: float = 3600.0
+
+    # Event-loop lag monitor; DEBUG also names the route seen on a stalled loop
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_SECONDS: float = 0.1
+    LOOP_STALL_THRESHOLD_MS: float = 50.0
+    LOOP_MONITOR_DEBUG: bool = False
+
+    # Request profiling: signed X-Profile header (see profiling.RequestProfiler.sign)
+    # or random sampling; collapsed stacks per route at /api/ops/profiles
+    PROFILING_SECRET: Optional[str] = None
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL_MS: float = 5.0
+    PROFILING_WINDOW_SECONDS: float = 900.0
+    PROFILING_MAX_PROFILES_PER_ROUTE: int = 200
+
+    # Startup
+    WARM_DB_POOL_ON_STARTUP: bool = True
+
+    # Transactional outbox relay
+    OUTBOX_RELAY_ENABLED: bool = True
+    OUTBOX_SINKS: list[str] = ["sms"]  # any of: sms, webhook, log
+    OUTBOX_WEBHOOK_URL: Optional[str] = None
+    OUTBOX_WEBHOOK_TIMEOUT_SECONDS: float = 5.0
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_SECONDS: float = 1.0
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    # Status SMS for the same phone and order within this window are merged
+    NOTIFY_COALESCE_SECONDS: float = 5.0
+    NOTIFY_SEND_CONCURRENCY: int = 8
+
+    # SMS providers, in failover order: twilio, twilio_secondary, fault (local stand-in)
+    SMS_PROVIDERS: list[str] = ["twilio", "twilio_secondary"]
+    SMS_TIMEOUT_SECONDS: dict[str, float] = {
+        "otp": 3.0,
+        "welcome": 10.0,
+        "order_status": 8.0,
+        "delivery_assignment": 5.0,
+        "delivery_update": 8.0
+    }
+    SMS_DEFAULT_TIMEOUT_SECONDS: float = 10.0
+    SMS_HEDGE_KINDS: list[str] = ["otp"]
+    SMS_HEDGE_DELAY_SECONDS: float = 1.0
+    SMS_BREAKER_FAILURE_THRESHOLD: int = 5
+    SMS_BREAKER_RESET_SECONDS: float = 30.0
+    SMS_FAULT_LATENCY_MS: float = 100.0
+    SMS_FAULT_JITTER_MS: float = 50.0
+    SMS_FAULT_FAILURE_RATE: float = 0.0
+    SMS_FAULT_HANG_RATE: float = 0.0
+
+    # Delivery analytics rollups
+    ANALYTICS_INLINE_ROLLUPS: bool = True  # update rollups in the status-change transaction
+    ANALYTICS_REBUILD_ENABLED: bool = True
+    ANALYTICS_REBUILD_INTERVAL_SECONDS: float = 900.0
+    ANALYTICS_REBUILD_WINDOW_HOURS: int = 2
+
+    # Live order/agent counts per status, kept in the status-change transaction
+    STATUS_COUNTER_SHARDS: int = 8
+    STATUS_COUNTS_CACHE_SECONDS: float = 2.0
+    STATUS_COUNTER_RECONCILE_ENABLED: bool = True
+    STATUS_COUNTER_RECONCILE_INTERVAL_SECONDS: float = 300.0
+
+    # ETA estimation
+    ETA_DEFAULT_MINUTES: float = 45.0
+    ETA_REFRESH_ENABLED: bool = True
+    ETA_REFRESH_INTERVAL_SECONDS: float = 30.0
+    ETA_REFIT_INTERVAL_SECONDS: float = 600.0
+    ETA_FIT_WINDOW_DAYS: int = 14
+    ETA_FIT_SAMPLE_LIMIT: int = 50000
+    ETA_MIN_SAMPLES: int = 5
+
+    # Archival of completed orders
+    ARCHIVE_ENABLED: bool = True
+    ARCHIVE_AFTER_DAYS: int = 30
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_BATCH_PAUSE_SECONDS: float = 0.2
+    ARCHIVE_MAX_BATCHES_PER_RUN: int = 200
+    ARCHIVE_INTERVAL_SECONDS: float = 3600.0
+
+    # Bulk fleet management
+    AGENT_IMPORT_CHUNK_SIZE: int = 500
+    AGENT_IMPORT_MAX_REPORTED_ERRORS: int = 1000
+
+    # Order export (every customer's orders): only these users may run it
+    EXPORT_CHUNK_SIZE: int = 1000
+    EXPORT_USER_IDS: list[int] = []
+
+    # Agent heartbeats: AVAILABLE agents silent for longer are marked OFFLINE
+    HEARTBEAT_SWEEP_ENABLED: bool = True
+    HEARTBEAT_STALE_SECONDS: int = 300
+    HEARTBEAT_SWEEP_INTERVAL_SECONDS: float = 60.0
+
+    # Zone-sharded automatic dispatch (off by default; manual /assign always works)
+    DISPATCH_ENABLED: bool = False
+    DISPATCH_INTERVAL_SECONDS: float = 5.0
+    DISPATCH_BATCH_SIZE: int = 50
+    ZONE_MATCH_RADIUS_KM: float = 40.0
+
+    # Trip batching: orders stacked onto one agent by the dispatcher
+    TRIP_BATCHING_ENABLED: bool = True
+    TRIP_DROP_RADIUS_KM: float = 2.5
+    TRIP_PICKUP_WINDOW_MINUTES: float = 10.0
+    TRIP_TWO_OPT_MAX_PASSES: int = 10
+
+    # Address geocoding: bundled pincode centroids (pincode,latitude,longitude
+    # CSV; point this at the full India Post directory), plus an optional backend
+    GEOCODER_PINCODE_DATASET: Optional[str] = None
+    GEOCODER_BACKEND: Optional[str] = None  # "nominatim"
+    GEOCODER_URL: str = "https://nominatim.openstreetmap.org/search"
+    GEOCODER_TIMEOUT_SECONDS: float = 2.0
+    GEOCODER_CACHE_SIZE: int = 10000
+    GEOCODER_CACHE_TTL_SECONDS: float = 86400.0
+    ADDRESS_BACKFILL_ENABLED: bool = True
+    ADDRESS_BACKFILL_CHUNK_SIZE: int = 500
+    ADDRESS_BACKFILL_MAX_CHUNKS_PER_RUN: int = 100
+    ADDRESS_BACKFILL_INTERVAL_SECONDS: float = 600.0
+
+    # Per-user address book cache (GET /api/addresses/ and the order address check)
+    ADDRESS_CACHE_MAX_USERS: int = 50000
+    ADDRESS_CACHE_TTL_SECONDS: float = 300.0
+
+    # Versioned GET response cache for orders and agents (limits are per resource type)
+    RESPONSE_CACHE_MAX_ENTRIES: int = 20000
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
 # Create a single instance that the rest of your app can import
-settings = Settings()
\ No newline at end of file
+settings = Settings()
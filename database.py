@@ -1,23 +1,166 @@
 import os
-from sqlalchemy import create_engine
+import hashlib
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from dotenv import load_dotenv
 from config import settings
 # Load environment variables from .env file
 # load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # DATABASE_URL from settings
 
 engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read replicas (optional). Read-only dependencies are routed here.
+replica_engines = [create_engine(url) for url in settings.DATABASE_REPLICA_URLS]
+ReplicaSessions = [
+    sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    for replica_engine in replica_engines
+]
+
 Base = declarative_base()
 
-def get_db():
+# --- POOL METRICS ---
+_engine_stats: dict[str, dict] = {}
+
+def _instrument_engine(name: str, instrumented_engine) -> None:
+    stats = _engine_stats[name] = {"engine": instrumented_engine, "connects": 0, "checkouts": 0, "sessions": 0}
+
+    @event.listens_for(instrumented_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        stats["connects"] += 1
+
+    @event.listens_for(instrumented_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats["checkouts"] += 1
+
+_instrument_engine("primary", engine)
+for index, replica_engine in enumerate(replica_engines):
+    _instrument_engine(f"replica-{index}", replica_engine)
+
+def pool_metrics() -> dict:
+    """Per-engine connection pool state and routing counters"""
+    metrics = {}
+    for name, stats in _engine_stats.items():
+        pool = stats["engine"].pool
+        metrics[name] = {
+            "pool_class": type(pool).__name__,
+            "size": pool.size() if hasattr(pool, "size") else None,
+            "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else None,
+            "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+            "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+            "connects": stats["connects"],
+            "checkouts": stats["checkouts"],
+            "sessions": stats["sessions"]
+        }
+    metrics["read_your_writes_hits"] = replica_router.read_your_writes_hits
+    return metrics
+
+# --- REPLICA ROUTING ---
+class ReplicaRouter:
+    """Picks the engine for read-only sessions, honouring a read-your-writes window"""
+
+    def __init__(self, window_seconds: float, max_tracked_clients: int = 100_000):
+        self.window_seconds = window_seconds
+        self.max_tracked_clients = max_tracked_clients
+        self.read_your_writes_hits = 0
+        self._recent_writes: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+        self._replicas = itertools.cycle(range(len(ReplicaSessions))) if ReplicaSessions else None
+
+    def note_write(self, client_key: Optional[str]) -> None:
+        if client_key is None or self._replicas is None:
+            return
+        with self._lock:
+            self._recent_writes[client_key] = time.monotonic()
+            self._recent_writes.move_to_end(client_key)
+            while len(self._recent_writes) > self.max_tracked_clients:
+                self._recent_writes.popitem(last=False)
+
+    def _wrote_recently(self, client_key: Optional[str]) -> bool:
+        if client_key is None:
+            return False
+        with self._lock:
+            written_at = self._recent_writes.get(client_key)
+            if written_at is None:
+                return False
+            if time.monotonic() - written_at > self.window_seconds:
+                del self._recent_writes[client_key]
+                return False
+            return True
+
+    def read_session(self, client_key: Optional[str]) -> tuple[str, Session]:
+        """Return (engine name, session) for a read-only unit of work"""
+        if self._replicas is None:
+            return "primary", SessionLocal()
+        if self._wrote_recently(client_key):
+            self.read_your_writes_hits += 1
+            return "primary", SessionLocal()
+        with self._lock:
+            index = next(self._replicas)
+        return f"replica-{index}", ReplicaSessions[index]()
+
+replica_router = ReplicaRouter(settings.READ_YOUR_WRITES_SECONDS)
+
+@event.listens_for(SessionLocal, "after_flush")
+def _mark_flush_write(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _mark_statement_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+@event.listens_for(SessionLocal, "after_commit")
+def _record_client_write(session):
+    if session.info.pop("wrote", False):
+        replica_router.note_write(session.info.get("client_key"))
+
+def _client_key(request: Request) -> Optional[str]:
+    """Identify the caller for read-your-writes routing (a digest of its bearer token)"""
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return None
+    return hashlib.blake2b(authorization.encode(), digest_size=16).hexdigest()
+
+def get_db(request: Request):
     
     db = SessionLocal()
+    db.info["client_key"] = _client_key(request)
+    _engine_stats["primary"]["sessions"] += 1
     try:
         yield db
     finally:
         db.close()
+
+def get_read_db(request: Request):
+    """Session for read-only endpoints: a replica unless the caller wrote recently"""
+    engine_name, db = replica_router.read_session(_client_key(request))
+    _engine_stats[engine_name]["sessions"] += 1
+    try:
+        yield db
+    finally:
+        db.close()
+
+def warm_up_pool() -> bool:
+    """Open (and return to the pool) one connection per engine so the first request doesn't pay for it"""
+    ok = True
+    for name, stats in _engine_stats.items():
+        try:
+            with stats["engine"].connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception as e:
+            logger.warning(f"Database warm-up failed for {name}, connections will be opened on demand: {e}")
+            ok = False
+    return ok
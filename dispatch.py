@@ -0,0 +1,317 @@
+# dispatch.py
+
+import logging
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from eta import eta_estimator, haversine_km_batch
+from locks import AdvisoryLock
+from models.address_models import Address
+from models.auth_models import User
+from models.delivery_models import DeliveryAgent, DeliveryAgentStatus
+from models.order_models import Order, OrderStatus
+from order_state import OrderTransitionError, transition_order
+from outbox import enqueue_event, DELIVERY_ASSIGNED, DELIVERY_STATUS_CHANGED
+import status_counters
+from trip_planner import Stop, TripPlanner
+
+logger = logging.getLogger(__name__)
+
+ASSIGNABLE_STATUSES = (OrderStatus.PENDING, OrderStatus.CONFIRMED)
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+class AgentUnavailableError(HTTPException):
+    """The agent went offline or filled up before the order could be added"""
+
+    def __init__(self, agent_id: int, detail: str):
+        super().__init__(status_code=status.HTTP_409_CONFLICT, detail=detail)
+        self.agent_id = agent_id
+
+def _claim_slot(db: Session, agent_id: int, now: datetime) -> DeliveryAgentStatus:
+    """Take one order slot on the agent with a guarded UPDATE; returns the status it had"""
+    previous = db.execute(
+        select(DeliveryAgent.current_status).where(DeliveryAgent.id == agent_id).with_for_update()
+    ).scalar_one_or_none()
+    claimed = db.execute(
+        update(DeliveryAgent)
+        .where(
+            DeliveryAgent.id == agent_id,
+            DeliveryAgent.active_order_count < DeliveryAgent.max_active_orders,
+            DeliveryAgent.current_status != DeliveryAgentStatus.OFFLINE
+        )
+        .values(
+            active_order_count=DeliveryAgent.active_order_count + 1,
+            current_status=DeliveryAgentStatus.ASSIGNED,
+            updated_at=now
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        detail = "Delivery agent is not available" if previous in (None, DeliveryAgentStatus.OFFLINE) \
+            else "Delivery agent is at capacity"
+        raise AgentUnavailableError(agent_id, detail)
+    return previous
+
+def assign_agent(
+    db: Session,
+    order: Order,
+    agent: DeliveryAgent,
+    trip_id: Optional[str] = None,
+    trip_sequence: Optional[int] = None
+) -> Order:
+    """
+    Dispatch `order` to `agent` and queue the notifications; the caller commits.
+
+    The agent's slot is claimed first with a guarded UPDATE (online and below
+    max_active_orders), so concurrent assigns can't overfill it; failing that
+    raises AgentUnavailableError. The order then moves with one conditional
+    UPDATE that also requires it to be unassigned, so a concurrent manual
+    assign and dispatcher pass cannot both win; the loser gets
+    OrderTransitionError and its slot claim is handed back.
+    """
+    now = datetime.now(timezone.utc)
+    values = {
+        "delivery_agent_id": agent.id,
+        "dispatched_at": now,
+        "trip_id": trip_id,
+        "trip_sequence": trip_sequence
+    }
+    destination = order.delivery_address
+    if None not in (agent.current_latitude, agent.current_longitude) and destination is not None \
+            and None not in (destination.latitude, destination.longitude):
+        values["dispatch_distance_km"] = haversine_km_batch(
+            [agent.current_latitude], [agent.current_longitude], [destination.latitude], [destination.longitude]
+        )[0]
+    previous_status = _claim_slot(db, agent.id, now)
+    try:
+        order = transition_order(
+            db, order.id, OrderStatus.DISPATCHED, values=values, where=[Order.delivery_agent_id.is_(None)]
+        )
+    except OrderTransitionError:
+        # The agent row is still ours from the claim; put it back as it was
+        db.execute(
+            update(DeliveryAgent)
+            .where(DeliveryAgent.id == agent.id)
+            .values(active_order_count=DeliveryAgent.active_order_count - 1, current_status=previous_status)
+            .execution_options(synchronize_session=False)
+        )
+        raise
+    status_counters.record_transition(db, status_counters.AGENT, previous_status, DeliveryAgentStatus.ASSIGNED)
+    db.expire(agent, ["current_status", "active_order_count", "updated_at"])
+
+    # Notify delivery agent
+    enqueue_event(db, order.id, DELIVERY_ASSIGNED, {
+        "to": agent.phone,
+        "order_number": order.order_number
+    })
+
+    # Notify customer
+    customer = db.query(User).filter(User.id == order.customer_id).first()
+    if customer:
+        enqueue_event(db, order.id, DELIVERY_STATUS_CHANGED, {
+            "to": customer.phone_number,
+            "status": "dispatched",
+            "order_number": order.order_number
+        })
+    return order
+
+class ZoneDispatcher:
+    """
+    Automatic assignment, sharded by zone.
+
+    Every worker runs the dispatcher; on each pass it visits the zones with
+    unassigned orders in random order and only works a zone while holding
+    that zone's advisory lock. Zones are therefore spread over whichever
+    workers and nodes are running, each zone has exactly one leader at a
+    time, and a shard only reads and writes its own zone's rows.
+
+    Idle agents are given whole trips: the TripPlanner stacks compatible
+    orders up to the agent's max_active_orders and sequences the drops.
+    """
+
+    LOCK_PREFIX = "delivery-app:dispatch-zone:"
+
+    def __init__(self):
+        self.metrics = {"runs": 0, "zones_led": 0, "zones_skipped": 0, "assigned": 0, "last_run_ms": None}
+        self.zone_metrics: dict[str, dict] = {}
+
+    def _zones_with_backlog(self) -> list[str]:
+        db = SessionLocal()
+        try:
+            rows = db.query(Order.zone).filter(
+                Order.status.in_(ASSIGNABLE_STATUSES),
+                Order.delivery_agent_id.is_(None),
+                Order.zone.isnot(None)
+            ).distinct().all()
+        finally:
+            db.close()
+        return [row.zone for row in rows]
+
+    def run_once(self) -> int:
+        """One pass over every zone this worker can lead; returns orders assigned"""
+        start = time.perf_counter()
+        zones = self._zones_with_backlog()
+        random.shuffle(zones)
+        assigned = 0
+        for zone in zones:
+            lock = AdvisoryLock(self.LOCK_PREFIX + zone)
+            if not lock.try_acquire():
+                self.metrics["zones_skipped"] += 1
+                continue
+            try:
+                self.metrics["zones_led"] += 1
+                assigned += self.run_shard(zone)
+            finally:
+                lock.release()
+
+        self.metrics["runs"] += 1
+        self.metrics["assigned"] += assigned
+        self.metrics["last_run_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return assigned
+
+    @staticmethod
+    def _planner() -> TripPlanner:
+        params = eta_estimator.params
+        return TripPlanner(
+            drop_radius_km=settings.TRIP_DROP_RADIUS_KM,
+            pickup_window=timedelta(minutes=settings.TRIP_PICKUP_WINDOW_MINUTES),
+            speed_kmph=params.speed_kmph,
+            handling_minutes=params.handling_minutes,
+            max_passes=settings.TRIP_TWO_OPT_MAX_PASSES
+        )
+
+    def run_shard(self, zone: str) -> int:
+        """Give the oldest unassigned orders in `zone` to its longest-idle live agents, a trip at a time"""
+        start = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        heartbeat_cutoff = now - timedelta(seconds=settings.HEARTBEAT_STALE_SECONDS)
+        assigned = 0
+        db = SessionLocal()
+        try:
+            orders = db.query(Order).filter(
+                Order.zone == zone,
+                Order.status.in_(ASSIGNABLE_STATUSES),
+                Order.delivery_agent_id.is_(None)
+            ).order_by(Order.created_at).limit(settings.DISPATCH_BATCH_SIZE).with_for_update(skip_locked=True).all()
+            agents = []
+            if orders:
+                agents = db.query(DeliveryAgent).filter(
+                    DeliveryAgent.zone == zone,
+                    DeliveryAgent.current_status == DeliveryAgentStatus.AVAILABLE,
+                    DeliveryAgent.is_active == True,
+                    DeliveryAgent.last_location_update >= heartbeat_cutoff
+                ).order_by(DeliveryAgent.updated_at).limit(len(orders)).with_for_update(skip_locked=True).all()
+
+            if agents:
+                addresses = {
+                    row.id: row for row in db.query(Address.id, Address.pincode, Address.latitude, Address.longitude).filter(
+                        Address.id.in_({order.delivery_address_id for order in orders})
+                    )
+                }
+                waiting = {}
+                for order in orders:
+                    address = addresses.get(order.delivery_address_id)
+                    waiting[order.id] = Stop(
+                        order.id,
+                        address.latitude if address else None,
+                        address.longitude if address else None,
+                        address.pincode if address else None,
+                        _as_utc(order.created_at),
+                        _as_utc(order.estimated_delivery_time)
+                    )
+                orders_by_id = {order.id: order for order in orders}
+                planner = self._planner()
+                for agent in agents:
+                    if not waiting:
+                        break
+                    capacity = agent.max_active_orders - agent.active_order_count if settings.TRIP_BATCHING_ENABLED else 1
+                    agent_point = (
+                        (agent.current_latitude, agent.current_longitude)
+                        if agent.current_latitude is not None and agent.current_longitude is not None else None
+                    )
+                    trip = planner.build_trip(agent_point, list(waiting.values()), capacity, now)
+                    trip_id = str(uuid.uuid4())
+                    for sequence, stop in enumerate(trip, start=1):
+                        del waiting[stop.order_id]
+                        try:
+                            assign_agent(db, orders_by_id[stop.order_id], agent, trip_id, sequence)
+                        except OrderTransitionError as e:
+                            # Row locks are not available everywhere (e.g. SQLite); the guard still holds
+                            logger.info(f"Skipped order {stop.order_id} in zone {zone}: {e.detail}")
+                            continue
+                        except AgentUnavailableError as e:
+                            # A manual assign filled the agent meanwhile; the rest of the trip waits
+                            logger.info(f"Stopped trip for agent {agent.id} in zone {zone}: {e.detail}")
+                            waiting.update((later.order_id, later) for later in trip[sequence - 1:])
+                            break
+                        assigned += 1
+            db.commit()
+        finally:
+            db.close()
+
+        stats = self.zone_metrics.setdefault(zone, {"runs": 0, "assigned": 0, "last_run_ms": None, "last_run_at": None})
+        stats["runs"] += 1
+        stats["assigned"] += assigned
+        stats["last_run_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        stats["last_run_at"] = datetime.now(timezone.utc).isoformat()
+        if assigned:
+            logger.info(f"Dispatched {assigned} orders in zone {zone}")
+        return assigned
+
+    def as_dict(self) -> dict:
+        return {**self.metrics, "zones": self.zone_metrics}
+
+zone_dispatcher = ZoneDispatcher()
+
+def zone_report(db: Session, window_minutes: int = 60) -> list[dict]:
+    """Cluster-wide backlog, idle agents and recent dispatch throughput per zone"""
+    now = datetime.now(timezone.utc)
+    since = now - timedelta(minutes=window_minutes)
+    report: dict[Optional[str], dict] = {}
+
+    def zone_row(zone: Optional[str]) -> dict:
+        return report.setdefault(zone, {
+            "zone": zone,
+            "backlog": 0,
+            "oldest_waiting_seconds": None,
+            "available_agents": 0,
+            "dispatched": 0,
+            "dispatched_per_hour": 0.0
+        })
+
+    for zone, backlog, oldest in db.query(Order.zone, func.count(Order.id), func.min(Order.created_at)).filter(
+        Order.status.in_(ASSIGNABLE_STATUSES),
+        Order.delivery_agent_id.is_(None)
+    ).group_by(Order.zone):
+        row = zone_row(zone)
+        row["backlog"] = backlog
+        if oldest is not None:
+            row["oldest_waiting_seconds"] = round((now - _as_utc(oldest)).total_seconds(), 1)
+
+    for zone, available in db.query(DeliveryAgent.zone, func.count(DeliveryAgent.id)).filter(
+        DeliveryAgent.current_status == DeliveryAgentStatus.AVAILABLE,
+        DeliveryAgent.is_active == True
+    ).group_by(DeliveryAgent.zone):
+        zone_row(zone)["available_agents"] = available
+
+    for zone, dispatched in db.query(Order.zone, func.count(Order.id)).filter(
+        Order.dispatched_at >= since
+    ).group_by(Order.zone):
+        row = zone_row(zone)
+        row["dispatched"] = dispatched
+        row["dispatched_per_hour"] = round(dispatched * 60 / window_minutes, 1)
+
+    return sorted(report.values(), key=lambda row: (-row["backlog"], row["zone"] or ""))
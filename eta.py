@@ -0,0 +1,278 @@
+# eta.py
+
+import logging
+import math
+import statistics
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Sequence
+
+from sqlalchemy import bindparam, update
+
+from config import settings
+from database import SessionLocal
+from locks import advisory_lock
+from models.address_models import Address
+from models.delivery_models import DeliveryAgent
+from models.order_models import Order, OrderStatus
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+MIN_SPEED_KMPH = 5.0
+MAX_SPEED_KMPH = 80.0
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+def haversine_km_batch(
+    lat1: Sequence[float], lon1: Sequence[float], lat2: Sequence[float], lon2: Sequence[float]
+) -> list[float]:
+    """Great-circle distances for equal-length coordinate columns, in one pass"""
+    radians = math.radians
+    sin, cos, asin, sqrt = math.sin, math.cos, math.asin, math.sqrt
+    distances = []
+    for a_lat, a_lon, b_lat, b_lon in zip(lat1, lon1, lat2, lon2):
+        phi1, phi2 = radians(a_lat), radians(b_lat)
+        dphi = phi2 - phi1
+        dlambda = radians(b_lon - a_lon)
+        h = sin(dphi / 2) ** 2 + cos(phi1) * cos(phi2) * sin(dlambda / 2) ** 2
+        distances.append(2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(h))))
+    return distances
+
+class EtaParameters:
+    """Fitted model parameters; replaced wholesale on every refit"""
+
+    def __init__(
+        self,
+        handling_minutes: float = 5.0,
+        speed_kmph: float = 20.0,
+        default_total_minutes: float = 45.0,
+        pincode_total_minutes: Optional[dict[str, float]] = None,
+        samples: int = 0,
+        fitted_at: Optional[datetime] = None
+    ):
+        self.handling_minutes = handling_minutes
+        self.speed_kmph = speed_kmph
+        self.default_total_minutes = default_total_minutes
+        self.pincode_total_minutes = pincode_total_minutes or {}
+        self.samples = samples
+        self.fitted_at = fitted_at
+
+    def as_dict(self) -> dict:
+        return {
+            "handling_minutes": round(self.handling_minutes, 2),
+            "speed_kmph": round(self.speed_kmph, 2),
+            "default_total_minutes": round(self.default_total_minutes, 2),
+            "pincodes": len(self.pincode_total_minutes),
+            "samples": self.samples,
+            "fitted_at": self.fitted_at.isoformat() if self.fitted_at else None
+        }
+
+class EtaEstimator:
+    """
+    Estimates delivery times from agent position, destination and learned history.
+
+    Parameters are fitted from delivered orders in the last ETA_FIT_WINDOW_DAYS:
+    per-pincode median order-to-door minutes and a least-squares fit of travel minutes against dispatch
+    distance, which gives the average speed and the fixed handling time.
+    In-flight refreshes run on one worker at a time.
+    """
+
+    LOCK_NAME = "delivery-app:eta-refresh"
+
+    def __init__(self):
+        self.params = EtaParameters(default_total_minutes=settings.ETA_DEFAULT_MINUTES)
+        self._fit_lock = threading.Lock()
+        self.metrics = {"refreshes": 0, "skipped_not_leader": 0, "orders_updated": 0, "last_refresh_orders": 0, "last_refresh_ms": None}
+
+    # --- FITTING ---
+    def fit(self) -> EtaParameters:
+        """Refit parameters from recent deliveries and swap them in"""
+        with self._fit_lock:
+            since = datetime.now(timezone.utc) - timedelta(days=settings.ETA_FIT_WINDOW_DAYS)
+            db = SessionLocal()
+            try:
+                rows = db.query(
+                    Order.created_at,
+                    Order.dispatched_at,
+                    Order.actual_delivery_time,
+                    Order.dispatch_distance_km,
+                    Address.pincode
+                ).outerjoin(
+                    Address, Address.id == Order.delivery_address_id
+                ).filter(
+                    Order.status == OrderStatus.DELIVERED,
+                    Order.actual_delivery_time >= since
+                ).order_by(Order.actual_delivery_time.desc()).limit(settings.ETA_FIT_SAMPLE_LIMIT).all()
+            finally:
+                db.close()
+            self.params = self._fit_rows(rows)
+            logger.info(f"ETA parameters refitted: {self.params.as_dict()}")
+            return self.params
+
+    def _fit_rows(self, rows) -> EtaParameters:
+        min_samples = settings.ETA_MIN_SAMPLES
+        defaults = EtaParameters(default_total_minutes=settings.ETA_DEFAULT_MINUTES)
+        totals_by_pincode: dict[str, list[float]] = {}
+        all_totals, distances, travel = [], [], []
+
+        for row in rows:
+            created_at, delivered_at = _as_utc(row.created_at), _as_utc(row.actual_delivery_time)
+            if created_at is None or delivered_at is None or delivered_at < created_at:
+                continue
+            total = (delivered_at - created_at).total_seconds() / 60
+            all_totals.append(total)
+            totals_by_pincode.setdefault(row.pincode or "", []).append(total)
+            dispatched_at = _as_utc(row.dispatched_at)
+            if (
+                dispatched_at is not None and row.dispatch_distance_km is not None
+                and created_at <= dispatched_at <= delivered_at
+            ):
+                distances.append(row.dispatch_distance_km)
+                travel.append((delivered_at - dispatched_at).total_seconds() / 60)
+
+        params = EtaParameters(
+            default_total_minutes=(
+                statistics.median(all_totals) if len(all_totals) >= min_samples else defaults.default_total_minutes
+            ),
+            pincode_total_minutes={
+                pincode: statistics.median(totals)
+                for pincode, totals in totals_by_pincode.items()
+                if len(totals) >= min_samples
+            },
+            samples=len(all_totals),
+            fitted_at=datetime.now(timezone.utc)
+        )
+
+        # travel_minutes = handling + distance_km * (60 / speed)
+        if len(distances) >= min_samples:
+            mean_d, mean_t = statistics.fmean(distances), statistics.fmean(travel)
+            var_d = sum((d - mean_d) ** 2 for d in distances)
+            if var_d > 0:
+                slope = sum((d - mean_d) * (t - mean_t) for d, t in zip(distances, travel)) / var_d
+                if slope > 0:
+                    params.speed_kmph = min(MAX_SPEED_KMPH, max(MIN_SPEED_KMPH, 60 / slope))
+                    params.handling_minutes = max(0.0, mean_t - slope * mean_d)
+        return params
+
+    # --- ESTIMATION ---
+    def estimate_new_order(self, pincode: Optional[str], now: Optional[datetime] = None) -> datetime:
+        """ETA for an order that has not been dispatched yet"""
+        now = now or datetime.now(timezone.utc)
+        params = self.params
+        minutes = params.pincode_total_minutes.get(pincode or "", params.default_total_minutes)
+        return now + timedelta(minutes=minutes)
+
+    def estimate_batch(
+        self,
+        agent_lat: Sequence[Optional[float]],
+        agent_lon: Sequence[Optional[float]],
+        dest_lat: Sequence[Optional[float]],
+        dest_lon: Sequence[Optional[float]],
+        pincodes: Sequence[Optional[str]],
+        created_at: Sequence[Optional[datetime]],
+        now: Optional[datetime] = None
+    ) -> list[datetime]:
+        """
+        ETAs for a batch of dispatched orders, given as parallel columns.
+
+        Orders with both an agent position and a destination point get
+        now + handling + distance / speed; the rest fall back to the learned
+        order-to-door time for their pincode.
+        """
+        now = now or datetime.now(timezone.utc)
+        params = self.params
+        handling = timedelta(minutes=params.handling_minutes)
+        minutes_per_km = 60 / params.speed_kmph
+
+        located = [
+            i for i in range(len(pincodes))
+            if None not in (agent_lat[i], agent_lon[i], dest_lat[i], dest_lon[i])
+        ]
+        distances = haversine_km_batch(
+            [agent_lat[i] for i in located], [agent_lon[i] for i in located],
+            [dest_lat[i] for i in located], [dest_lon[i] for i in located]
+        )
+        travel_minutes = dict(zip(located, (d * minutes_per_km for d in distances)))
+
+        estimates = []
+        for i, pincode in enumerate(pincodes):
+            if i in travel_minutes:
+                estimates.append(now + handling + timedelta(minutes=travel_minutes[i]))
+                continue
+            total = params.pincode_total_minutes.get(pincode or "", params.default_total_minutes)
+            started = _as_utc(created_at[i]) or now
+            estimates.append(max(started + timedelta(minutes=total), now + handling))
+        return estimates
+
+    def refresh_in_flight(self) -> int:
+        """Recompute ETAs for every dispatched order in one query and one batched UPDATE"""
+        with advisory_lock(self.LOCK_NAME) as acquired:
+            if not acquired:
+                self.metrics["skipped_not_leader"] += 1
+                return 0
+
+            start = datetime.now(timezone.utc)
+            db = SessionLocal()
+            try:
+                rows = db.query(
+                    Order.id,
+                    Order.created_at,
+                    Order.estimated_delivery_time,
+                    DeliveryAgent.current_latitude,
+                    DeliveryAgent.current_longitude,
+                    Address.latitude,
+                    Address.longitude,
+                    Address.pincode
+                ).join(
+                    DeliveryAgent, DeliveryAgent.id == Order.delivery_agent_id
+                ).outerjoin(
+                    Address, Address.id == Order.delivery_address_id
+                ).filter(Order.status == OrderStatus.DISPATCHED).all()
+                if not rows:
+                    return 0
+
+                estimates = self.estimate_batch(
+                    [row.current_latitude for row in rows],
+                    [row.current_longitude for row in rows],
+                    [row.latitude for row in rows],
+                    [row.longitude for row in rows],
+                    [row.pincode for row in rows],
+                    [row.created_at for row in rows],
+                    now=start
+                )
+                changed = [
+                    {"order_id": row.id, "estimate": estimate}
+                    for row, estimate in zip(rows, estimates)
+                    if row.estimated_delivery_time is None
+                    or abs((_as_utc(row.estimated_delivery_time) - estimate).total_seconds()) >= 60
+                ]
+                if changed:
+                    # Core executemany: version's onupdate bumps each changed row, so
+                    # cached responses and ETags carrying the old ETA are replaced,
+                    # while updated_at stays the time of the last real order change.
+                    # Orders delivered since the read are left alone.
+                    orders = Order.__table__
+                    db.execute(
+                        update(orders)
+                        .where(orders.c.id == bindparam("order_id"), orders.c.status == OrderStatus.DISPATCHED)
+                        .values(estimated_delivery_time=bindparam("estimate"), updated_at=orders.c.updated_at),
+                        changed
+                    )
+                    db.commit()
+            finally:
+                db.close()
+
+        self.metrics["refreshes"] += 1
+        self.metrics["orders_updated"] += len(changed)
+        self.metrics["last_refresh_orders"] = len(rows)
+        self.metrics["last_refresh_ms"] = round((datetime.now(timezone.utc) - start).total_seconds() * 1000, 2)
+        return len(changed)
+
+    def as_dict(self) -> dict:
+        return {"parameters": self.params.as_dict(), **self.metrics}
+
+eta_estimator = EtaEstimator()
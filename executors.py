@@ -0,0 +1,160 @@
+# executors.py
+
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import anyio.to_thread
+from fastapi import HTTPException, status
+
+from config import settings
+from profiling import track_thread
+
+class PoolSaturated(HTTPException):
+    """More work is queued on a pool than it allows; the request is shed with a 503"""
+
+    def __init__(self, pool: str):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry",
+            headers={"Retry-After": "1"}
+        )
+        self.pool = pool
+
+class ExecutorPool:
+    """
+    A bounded thread pool for one kind of blocking work, with queue metrics.
+
+    At most `max_workers` jobs run at once and at most `max_queue` wait;
+    beyond that submissions fail fast with PoolSaturated instead of piling
+    up. Queue wait (submit to start) is sampled per pool.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, sample_size: int = 1000):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-pool")
+        self._lock = threading.Lock()
+        self._pending = 0  # submitted and not yet started
+        self._running = 0
+        self._waits: deque[float] = deque(maxlen=sample_size)
+        self.metrics = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "max_wait_ms": 0.0}
+
+    def _wrap(self, func: Callable, args: tuple, kwargs: dict) -> Callable:
+        submitted_at = time.perf_counter()
+        # Carry the caller's context (e.g. the request being profiled) into the worker
+        context = contextvars.copy_context()
+
+        def job():
+            wait_ms = (time.perf_counter() - submitted_at) * 1000
+            with self._lock:
+                self._pending -= 1
+                self._running += 1
+                self._waits.append(wait_ms)
+                self.metrics["max_wait_ms"] = max(self.metrics["max_wait_ms"], wait_ms)
+            ok = False
+            try:
+                result = context.run(self._tracked, func, args, kwargs)
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self.metrics["completed" if ok else "failed"] += 1
+
+        return job
+
+    @staticmethod
+    def _tracked(func: Callable, args: tuple, kwargs: dict):
+        with track_thread():
+            return func(*args, **kwargs)
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._pending + self._running >= self.max_workers + self.max_queue:
+                self.metrics["rejected"] += 1
+                raise PoolSaturated(self.name)
+            self._pending += 1
+            self.metrics["submitted"] += 1
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """Run `func` on this pool from the event loop"""
+        self._admit()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._wrap(func, args, kwargs))
+
+    def call(self, func: Callable, *args, **kwargs):
+        """Run `func` on this pool from a worker thread, blocking until it's done"""
+        self._admit()
+        return self._executor.submit(self._wrap(func, args, kwargs)).result()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            pending, running = self._pending, self._running
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": running,
+            "queued": pending,
+            **self.metrics,
+            "max_wait_ms": round(self.metrics["max_wait_ms"], 2),
+            "wait_ms_p50": round(waits[len(waits) // 2], 2) if waits else None,
+            "wait_ms_p99": round(waits[min(len(waits) - 1, int(len(waits) * 0.99))], 2) if waits else None
+        }
+
+# CPU-bound work (bcrypt, JWT) gets about one thread per core; I/O-bound work
+# (database, SMS) mostly waits, so it gets many more
+pools = {
+    "cpu": ExecutorPool("cpu", settings.CPU_POOL_SIZE or os.cpu_count() or 2, settings.CPU_POOL_MAX_QUEUE),
+    "io": ExecutorPool("io", settings.IO_POOL_SIZE, settings.IO_POOL_MAX_QUEUE)
+}
+cpu_pool = pools["cpu"]
+io_pool = pools["io"]
+
+def offload(pool: str):
+    """
+    Declare which pool a blocking handler (or any sync function) runs on.
+
+    The decorated function becomes a coroutine function with the same
+    signature, so FastAPI still resolves its parameters and dependencies:
+
+        @router.get("/")
+        @offload("io")
+        def list_things(db: Session = Depends(get_db)): ...
+    """
+    executor_pool = pools[pool]
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await executor_pool.run(func, *args, **kwargs)
+        return wrapper
+
+    return decorator
+
+def configure_thread_limiter(size: Optional[int] = None) -> None:
+    """Size anyio's default limiter, used for sync dependencies and any undecorated sync handlers"""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = size or settings.THREADPOOL_SIZE
+
+def shutdown() -> None:
+    for pool in pools.values():
+        pool.shutdown()
+
+def as_dict() -> dict:
+    report = {name: pool.as_dict() for name, pool in pools.items()}
+    try:
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        report["anyio"] = {"total_tokens": limiter.total_tokens, "borrowed_tokens": limiter.borrowed_tokens}
+    except RuntimeError:
+        pass  # no event loop (e.g. called from a script)
+    return report
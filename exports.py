@@ -0,0 +1,131 @@
+# exports.py
+
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+
+from archive import ARCHIVABLE_STATUSES
+from config import settings
+from database import replica_router
+from models.archive_models import ArchivedOrder, ArchivedOrderItem
+from models.order_models import Order, OrderItem, OrderStatus
+
+ORDER_FIELDS = (
+    "id", "order_number", "customer_id", "delivery_address_id", "delivery_agent_id", "status",
+    "subtotal", "tax_amount", "delivery_fee", "total_amount",
+    "estimated_delivery_time", "actual_delivery_time", "delivery_instructions", "created_at", "updated_at"
+)
+ITEM_FIELDS = ("menu_item_id", "item_name", "item_price", "quantity", "special_instructions")
+CSV_HEADER = ORDER_FIELDS + tuple(f"item_{field}" for field in ITEM_FIELDS)
+
+# The hot table is streamed first: orders only ever move hot -> archive, so an
+# order the archiver moves mid-export is in one pass or the other (or both,
+# and the archive pass skips it), never in neither
+_SOURCES = ((Order, OrderItem), (ArchivedOrder, ArchivedOrderItem))
+
+def _value(value):
+    if isinstance(value, OrderStatus):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+def _fetch_items(db, item_model, order_ids: list[str]) -> dict[str, list[dict]]:
+    items_by_order: dict[str, list[dict]] = {order_id: [] for order_id in order_ids}
+    rows = db.execute(
+        select(item_model.order_id, *(getattr(item_model, field) for field in ITEM_FIELDS))
+        .where(item_model.order_id.in_(order_ids))
+        .order_by(item_model.order_id, item_model.id)
+    )
+    for row in rows:
+        items_by_order[row[0]].append(dict(zip(ITEM_FIELDS, row[1:])))
+    return items_by_order
+
+def iter_order_chunks(
+    start: Optional[datetime],
+    end: Optional[datetime],
+    order_status: Optional[OrderStatus],
+    chunk_size: int
+) -> Iterator[list[tuple[dict, list[dict]]]]:
+    """
+    Yield chunks of (order, items) pairs over a created_at range, hot orders
+    first, then archived ones.
+
+    Orders come from a server-side cursor (stream_results + yield_per), so
+    only one chunk is held in memory. Items for each chunk are fetched with a
+    single IN query on a second session; the streaming connection can't run
+    other statements while its cursor is open on some drivers (e.g. PyMySQL).
+
+    Only hot orders the archiver could take before the export ends (closed
+    and near ARCHIVE_AFTER_DAYS old; the margin covers exports of up to a
+    day) are remembered to skip their archived copies, so the set stays
+    small while the archiver keeps up.
+    """
+    archivable_by = datetime.now(timezone.utc) - timedelta(days=settings.ARCHIVE_AFTER_DAYS) + timedelta(days=1)
+    exported: set[str] = set()
+    _, stream_db = replica_router.read_session(None)
+    _, lookup_db = replica_router.read_session(None)
+    try:
+        for order_model, item_model in _SOURCES:
+            stmt = select(*(getattr(order_model, field) for field in ORDER_FIELDS))
+            if start is not None:
+                stmt = stmt.where(order_model.created_at >= start)
+            if end is not None:
+                stmt = stmt.where(order_model.created_at < end)
+            if order_status is not None:
+                stmt = stmt.where(order_model.status == order_status)
+            stmt = stmt.order_by(order_model.created_at, order_model.id)
+
+            result = stream_db.execute(stmt.execution_options(stream_results=True, yield_per=chunk_size))
+            hot = order_model is Order
+            for partition in result.partitions():
+                if hot:
+                    exported.update(
+                        row.id for row in partition
+                        if row.status in ARCHIVABLE_STATUSES and _as_utc(row.updated_at) < archivable_by
+                    )
+                else:
+                    partition = [row for row in partition if row.id not in exported]
+                    if not partition:
+                        continue
+                orders = [{field: _value(value) for field, value in zip(ORDER_FIELDS, row)} for row in partition]
+                items_by_order = _fetch_items(lookup_db, item_model, [order["id"] for order in orders])
+                missing = [order_id for order_id, items in items_by_order.items() if not items]
+                if hot and missing:
+                    # Archived since the order row was read; its items moved with it
+                    items_by_order.update(_fetch_items(lookup_db, ArchivedOrderItem, missing))
+                lookup_db.rollback()  # don't hold a snapshot open between chunks
+                yield [(order, items_by_order[order["id"]]) for order in orders]
+            result.close()
+    finally:
+        stream_db.close()
+        lookup_db.close()
+
+def iter_csv(chunks: Iterator[list[tuple[dict, list[dict]]]]) -> Iterator[str]:
+    """One CSV row per order item (orders without items get one row with empty item columns)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    yield buffer.getvalue()
+    for chunk in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        for order, items in chunk:
+            order_values = [order[field] for field in ORDER_FIELDS]
+            for item in items or [{}]:
+                writer.writerow(order_values + [item.get(field) for field in ITEM_FIELDS])
+        yield buffer.getvalue()
+
+def iter_ndjson(chunks: Iterator[list[tuple[dict, list[dict]]]]) -> Iterator[str]:
+    """One JSON document per order, with its items nested"""
+    for chunk in chunks:
+        yield "".join(json.dumps({**order, "order_items": items}) + "\n" for order, items in chunk)
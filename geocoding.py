@@ -0,0 +1,273 @@
+# geocoding.py
+
+import csv
+import logging
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Iterable, NamedTuple, Optional
+
+import requests
+from sqlalchemy import update
+
+from config import settings
+from database import SessionLocal
+from models.address_models import Address
+from zones import zone_map
+
+logger = logging.getLogger(__name__)
+
+PINCODE_DATASET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "pincode_centroids.csv")
+
+# geo_precision values
+PRECISION_PINCODE = "pincode"
+PRECISION_GEOCODER = "geocoder"
+PRECISION_DISTRICT = "district"
+PRECISION_NONE = "none"  # tried and not found; the backfill skips these
+
+class GeocodeResult(NamedTuple):
+    latitude: float
+    longitude: float
+    precision: str
+
+# --- LOCAL INDEX ---
+class CentroidIndex:
+    """
+    Integer keys (pincodes or pincode prefixes) with centroid coordinates.
+
+    Stored as three parallel typed arrays sorted by key, about 20 bytes per
+    entry, so the full ~19k-row India Post directory is a few hundred KB and a
+    lookup is one binary search.
+    """
+
+    def __init__(self, rows: Iterable[tuple[int, float, float]]):
+        rows = sorted(rows)
+        self.keys = array("l", (row[0] for row in rows))
+        self.latitudes = array("d", (row[1] for row in rows))
+        self.longitudes = array("d", (row[2] for row in rows))
+
+    @classmethod
+    def from_csv(cls, path: str) -> "CentroidIndex":
+        """Load a pincode,latitude,longitude CSV (header row required)"""
+        with open(path, newline="", encoding="utf-8") as f:
+            return cls(
+                (int(row["pincode"]), float(row["latitude"]), float(row["longitude"]))
+                for row in csv.DictReader(f)
+                if (row.get("pincode") or "").strip().isdigit()
+            )
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.itemsize * len(column) for column in (self.keys, self.latitudes, self.longitudes))
+
+    def lookup(self, key: int) -> Optional[tuple[float, float]]:
+        index = bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            return self.latitudes[index], self.longitudes[index]
+        return None
+
+# --- PLUGGABLE BACKENDS ---
+class NominatimGeocoder:
+    """Structured search against a Nominatim-compatible HTTP API"""
+
+    name = "nominatim"
+
+    def __init__(self, url: str, timeout_seconds: float):
+        self.url = url
+        self.timeout_seconds = timeout_seconds
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = "delivery-app-geocoder"
+
+    def geocode(self, street: Optional[str], town_city: Optional[str], state: Optional[str],
+                pincode: Optional[str], country: Optional[str]) -> Optional[tuple[float, float]]:
+        params = {"format": "json", "limit": 1}
+        for field, value in (("street", street), ("city", town_city), ("state", state),
+                             ("postalcode", pincode), ("country", country)):
+            if value:
+                params[field] = value
+        response = self.session.get(self.url, params=params, timeout=self.timeout_seconds)
+        response.raise_for_status()
+        results = response.json()
+        if not results:
+            return None
+        return float(results[0]["lat"]), float(results[0]["lon"])
+
+class CachedGeocoder:
+    """LRU + TTL cache in front of a backend; misses are cached too, errors are not"""
+
+    def __init__(self, backend, max_entries: int, ttl_seconds: float):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple, tuple[float, Optional[tuple[float, float]]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {"hits": 0, "misses": 0, "errors": 0}
+
+    def geocode(self, *fields: Optional[str]) -> Optional[tuple[float, float]]:
+        key = tuple((field or "").strip().casefold() for field in fields)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.metrics["hits"] += 1
+                return entry[1]
+            self.metrics["misses"] += 1
+        try:
+            point = self.backend.geocode(*fields)
+        except Exception as e:
+            self.metrics["errors"] += 1
+            logger.warning(f"Geocoder {self.backend.name} failed: {e}")
+            return None
+        with self._lock:
+            self._entries[key] = (now, point)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return point
+
+def build_backend() -> Optional[CachedGeocoder]:
+    if not settings.GEOCODER_BACKEND:
+        return None
+    if settings.GEOCODER_BACKEND == "nominatim":
+        backend = NominatimGeocoder(settings.GEOCODER_URL, settings.GEOCODER_TIMEOUT_SECONDS)
+    else:
+        raise ValueError(f"Unknown geocoder backend: {settings.GEOCODER_BACKEND}")
+    return CachedGeocoder(backend, settings.GEOCODER_CACHE_SIZE, settings.GEOCODER_CACHE_TTL_SECONDS)
+
+# --- ADDRESS GEOCODER ---
+class AddressGeocoder:
+    """
+    Resolves an address to a point: the pincode's centroid from the local
+    index, else the configured backend (if any), else the centroid of the
+    pincode's 3-digit sorting district.
+    """
+
+    def __init__(self, pincodes: CentroidIndex, districts: CentroidIndex, backend: Optional[CachedGeocoder] = None):
+        self.pincodes = pincodes
+        self.districts = districts
+        self.backend = backend
+        self.metrics = {"pincode": 0, "geocoder": 0, "district": 0, "none": 0}
+
+    def geocode(
+        self,
+        pincode: Optional[str],
+        town_city: Optional[str] = None,
+        state: Optional[str] = None,
+        street: Optional[str] = None,
+        country: Optional[str] = None
+    ) -> Optional[GeocodeResult]:
+        pincode = (pincode or "").strip()
+        valid = len(pincode) == 6 and pincode.isdigit()
+        result = None
+        if valid:
+            point = self.pincodes.lookup(int(pincode))
+            if point is not None:
+                result = GeocodeResult(*point, PRECISION_PINCODE)
+        if result is None and self.backend is not None:
+            point = self.backend.geocode(street, town_city, state, pincode, country)
+            if point is not None:
+                result = GeocodeResult(*point, PRECISION_GEOCODER)
+        if result is None and valid:
+            point = self.districts.lookup(int(pincode[:3]))
+            if point is not None:
+                result = GeocodeResult(*point, PRECISION_DISTRICT)
+        self.metrics[result.precision if result else PRECISION_NONE] += 1
+        return result
+
+    def apply(self, address: Address) -> None:
+        """Set an address's coordinates from its current fields"""
+        result = self.geocode(
+            address.pincode, address.town_city, address.state, address.area_street_sector, address.country
+        )
+        address.latitude = result.latitude if result else None
+        address.longitude = result.longitude if result else None
+        address.geo_precision = result.precision if result else PRECISION_NONE
+
+    def as_dict(self) -> dict:
+        return {
+            "pincodes_indexed": len(self.pincodes),
+            "districts_indexed": len(self.districts),
+            "index_bytes": self.pincodes.nbytes + self.districts.nbytes,
+            "resolved": self.metrics,
+            "backend": (
+                {"name": self.backend.backend.name, **self.backend.metrics} if self.backend is not None else None
+            ),
+            "backfill": address_backfill.metrics
+        }
+
+address_geocoder = AddressGeocoder(
+    pincodes=CentroidIndex.from_csv(settings.GEOCODER_PINCODE_DATASET or PINCODE_DATASET_PATH),
+    districts=CentroidIndex(
+        (int(centroid.zone), centroid.latitude, centroid.longitude) for centroid in zone_map.centroids
+    ),
+    backend=build_backend()
+)
+
+# --- BACKFILL ---
+class AddressBackfill:
+    """Geocodes addresses that have never been geocoded, in keyset-paginated chunks"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.metrics = {"runs": 0, "addresses_geocoded": 0, "last_run_addresses": 0, "last_run_seconds": None}
+
+    def backfill_chunk(self, db, after_id: int, chunk_size: int) -> tuple[int, int]:
+        """Geocode up to `chunk_size` addresses with id > after_id; returns (rows, last id)"""
+        rows = db.query(
+            Address.id, Address.pincode, Address.town_city, Address.state,
+            Address.area_street_sector, Address.country
+        ).filter(
+            Address.geo_precision.is_(None),
+            Address.id > after_id
+        ).order_by(Address.id).limit(chunk_size).all()
+        if not rows:
+            return 0, after_id
+
+        values = []
+        for row in rows:
+            result = address_geocoder.geocode(row.pincode, row.town_city, row.state, row.area_street_sector, row.country)
+            values.append({
+                "id": row.id,
+                "latitude": result.latitude if result else None,
+                "longitude": result.longitude if result else None,
+                "geo_precision": result.precision if result else PRECISION_NONE
+            })
+        db.execute(update(Address), values)
+        db.commit()
+        return len(rows), rows[-1].id
+
+    def run(self, max_chunks: Optional[int] = None) -> int:
+        if not self._lock.acquire(blocking=False):
+            return 0
+        try:
+            max_chunks = max_chunks or settings.ADDRESS_BACKFILL_MAX_CHUNKS_PER_RUN
+            start = time.perf_counter()
+            last_id = 0
+            total = 0
+            for _ in range(max_chunks):
+                db = SessionLocal()
+                try:
+                    count, last_id = self.backfill_chunk(db, last_id, settings.ADDRESS_BACKFILL_CHUNK_SIZE)
+                finally:
+                    db.close()
+                total += count
+                if count < settings.ADDRESS_BACKFILL_CHUNK_SIZE:
+                    break
+            self.metrics["runs"] += 1
+            self.metrics["addresses_geocoded"] += total
+            self.metrics["last_run_addresses"] = total
+            self.metrics["last_run_seconds"] = round(time.perf_counter() - start, 3)
+            if total:
+                logger.info(f"Geocoded {total} addresses in {self.metrics['last_run_seconds']}s")
+            return total
+        finally:
+            self._lock.release()
+
+address_backfill = AddressBackfill()
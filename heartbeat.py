@@ -0,0 +1,80 @@
+# heartbeat.py
+
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, or_, update
+
+from config import settings
+from database import SessionLocal
+from locks import advisory_lock
+from models.delivery_models import DeliveryAgent, DeliveryAgentStatus
+import status_counters
+
+logger = logging.getLogger(__name__)
+
+class HeartbeatSweeper:
+    """
+    Marks AVAILABLE agents OFFLINE once their last location ping is older than
+    HEARTBEAT_STALE_SECONDS.
+
+    Each sweep is one UPDATE over the (current_status, last_location_update)
+    index. Sweeps are guarded by an advisory lock, so when several workers run
+    the job only one of them does the work on each tick.
+    """
+
+    LOCK_NAME = "delivery-app:heartbeat-sweeper"
+
+    def __init__(self):
+        self.metrics = {
+            "sweeps": 0,
+            "skipped_not_leader": 0,
+            "agents_offlined": 0,
+            "last_sweep_offlined": 0,
+            "last_sweep_ms": None,
+            "last_sweep_at": None
+        }
+
+    def sweep(self) -> int:
+        """Offline stale agents; returns how many were changed (0 if another worker holds the lock)"""
+        with advisory_lock(self.LOCK_NAME) as acquired:
+            if not acquired:
+                self.metrics["skipped_not_leader"] += 1
+                return 0
+
+            start = time.perf_counter()
+            now = datetime.now(timezone.utc)
+            cutoff = now - timedelta(seconds=settings.HEARTBEAT_STALE_SECONDS)
+            db = SessionLocal()
+            try:
+                offlined = db.execute(
+                    update(DeliveryAgent)
+                    .where(
+                        DeliveryAgent.current_status == DeliveryAgentStatus.AVAILABLE,
+                        or_(
+                            DeliveryAgent.last_location_update < cutoff,
+                            # Agents made available without ever sending a ping
+                            and_(DeliveryAgent.last_location_update.is_(None), DeliveryAgent.updated_at < cutoff)
+                        )
+                    )
+                    .values(current_status=DeliveryAgentStatus.OFFLINE, updated_at=now)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                status_counters.record_transition(
+                    db, status_counters.AGENT, DeliveryAgentStatus.AVAILABLE, DeliveryAgentStatus.OFFLINE, offlined
+                )
+                db.commit()
+            finally:
+                db.close()
+
+        self.metrics["sweeps"] += 1
+        self.metrics["agents_offlined"] += offlined
+        self.metrics["last_sweep_offlined"] = offlined
+        self.metrics["last_sweep_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        self.metrics["last_sweep_at"] = now.isoformat()
+        if offlined:
+            logger.info(f"Heartbeat sweep marked {offlined} agents offline in {self.metrics['last_sweep_ms']}ms")
+        return offlined
+
+heartbeat_sweeper = HeartbeatSweeper()
@@ -0,0 +1,104 @@
+# locks.py
+
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy import text
+
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+# Fallback for databases without advisory locks (SQLite): only one process
+# can write to the file anyway, so a process-local lock is enough
+_local_locks: dict[str, threading.Lock] = {}
+_local_locks_guard = threading.Lock()
+
+def lock_key(name: str) -> int:
+    """Stable signed 64-bit key for pg_try_advisory_lock"""
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "big", signed=True)
+
+class AdvisoryLock:
+    """
+    A named lock shared by every worker and node using the same database.
+
+    The lock is taken without waiting and is held by a dedicated connection
+    (pg_try_advisory_lock on PostgreSQL, GET_LOCK on MySQL), so it is released
+    when the holder calls release() or its connection dies.
+    """
+
+    def __init__(self, name: str, bind=engine):
+        self.name = name
+        self.bind = bind
+        self._connection = None
+        self._local_lock = None
+
+    @property
+    def held(self) -> bool:
+        return self._connection is not None or self._local_lock is not None
+
+    def try_acquire(self) -> bool:
+        if self.held:
+            return True
+        dialect = self.bind.dialect.name
+        if dialect not in ("postgresql", "mysql", "mariadb"):
+            with _local_locks_guard:
+                local_lock = _local_locks.setdefault(self.name, threading.Lock())
+            if local_lock.acquire(blocking=False):
+                self._local_lock = local_lock
+                return True
+            return False
+
+        connection = self.bind.connect()
+        try:
+            if dialect == "postgresql":
+                acquired = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": lock_key(self.name)}).scalar()
+            else:
+                # MySQL lock names are limited to 64 characters
+                acquired = connection.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": self.name[:64]}).scalar() == 1
+            # Session-level locks survive the end of the transaction
+            connection.commit()
+        except Exception:
+            connection.close()
+            raise
+        if not acquired:
+            connection.close()
+            return False
+        self._connection = connection
+        return True
+
+    def release(self) -> None:
+        if self._local_lock is not None:
+            self._local_lock.release()
+            self._local_lock = None
+            return
+        if self._connection is None:
+            return
+        connection, self._connection = self._connection, None
+        try:
+            if self.bind.dialect.name == "postgresql":
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": lock_key(self.name)})
+            else:
+                connection.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": self.name[:64]})
+            connection.commit()
+        except Exception as e:
+            # close() alone would return the session, lock and all, to the pool;
+            # invalidating it drops the server session, which frees the lock
+            logger.warning(f"Could not release advisory lock {self.name}, discarding its connection: {e}")
+            connection.invalidate()
+        finally:
+            connection.close()
+
+@contextmanager
+def advisory_lock(name: str) -> Iterator[bool]:
+    """Try to take `name` for the duration of the block; yields whether it was acquired"""
+    lock = AdvisoryLock(name)
+    acquired = lock.try_acquire()
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            lock.release()
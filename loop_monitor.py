@@ -0,0 +1,178 @@
+# loop_monitor.py
+
+import asyncio
+import inspect
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Optional
+
+from fastapi.routing import APIRoute
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+STACK_DEPTH = 25
+
+class LoopLagMonitor:
+    """
+    Measures event-loop lag and catches whatever is blocking the loop.
+
+    A ticker task sleeps `interval` seconds and records how late it wakes up
+    (the loop lag) in a fixed-bucket histogram. A watchdog thread checks the
+    ticker's heartbeat; once the loop has been unresponsive for longer than
+    `threshold_ms`, it samples the loop thread's stack while the offender is
+    still running and logs it, once per stall. In debug mode the sampled
+    frames are also matched against the app's route handlers to name the
+    route. Cost: one timer callback per interval on the loop and one wake-up
+    per half-threshold in the watchdog.
+    """
+
+    BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+    def __init__(self, interval_seconds: float, threshold_ms: float, debug: bool = False):
+        self.interval_seconds = interval_seconds
+        self.threshold_ms = threshold_ms
+        self.debug = debug
+        self.buckets = [0] * (len(self.BUCKETS_MS) + 1)
+        self.metrics = {"samples": 0, "stalls": 0, "max_lag_ms": 0.0, "last_lag_ms": None, "total_lag_ms": 0.0}
+        self.recent_stalls: deque[dict] = deque(maxlen=20)
+        self._route_codes: dict = {}
+        self._beat = time.monotonic()
+        self._beat_id = 0
+        self._reported_beat = -1
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    # --- LIFECYCLE ---
+    def start(self, app=None) -> None:
+        """Start on the running loop (call from the app lifespan)"""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        if self.debug and app is not None:
+            self._route_codes = self._index_routes(app)
+        self._beat = time.monotonic()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._tick(), name="loop-lag-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # --- MEASUREMENT ---
+    async def _tick(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval_seconds
+            await asyncio.sleep(self.interval_seconds)
+            now = time.monotonic()
+            self._record(max(0.0, (now - expected) * 1000))
+            self._beat = now
+            self._beat_id += 1
+
+    def _record(self, lag_ms: float) -> None:
+        index = next((i for i, bound in enumerate(self.BUCKETS_MS) if lag_ms <= bound), len(self.BUCKETS_MS))
+        self.buckets[index] += 1
+        self.metrics["samples"] += 1
+        self.metrics["total_lag_ms"] += lag_ms
+        self.metrics["last_lag_ms"] = round(lag_ms, 2)
+        if lag_ms > self.metrics["max_lag_ms"]:
+            self.metrics["max_lag_ms"] = round(lag_ms, 2)
+        if lag_ms >= self.threshold_ms and self.recent_stalls and self.recent_stalls[-1]["beat"] == self._beat_id:
+            # The watchdog caught this stall in flight; now we know how long it lasted
+            self.recent_stalls[-1]["lag_ms"] = round(lag_ms, 2)
+
+    # --- STALL DETECTION ---
+    def _watch(self) -> None:
+        period = max(0.005, self.threshold_ms / 2000)
+        while not self._stopping.wait(period):
+            beat_id = self._beat_id
+            blocked_ms = (time.monotonic() - self._beat - self.interval_seconds) * 1000
+            if blocked_ms >= self.threshold_ms and beat_id != self._reported_beat:
+                self._reported_beat = beat_id
+                self._report_stall(beat_id, blocked_ms)
+
+    def _report_stall(self, beat_id: int, blocked_ms: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        stack = traceback.extract_stack(frame)[-STACK_DEPTH:]
+        route = self._route_for(frame) if self.debug else None
+        self.metrics["stalls"] += 1
+        top = stack[-1] if stack else None
+        self.recent_stalls.append({
+            "beat": beat_id,
+            "at": time.time(),
+            "blocked_ms_at_sample": round(blocked_ms, 2),
+            "lag_ms": None,
+            "route": route,
+            "frame": f"{top.filename}:{top.lineno} in {top.name}" if top else None
+        })
+        logger.warning(
+            f"Event loop blocked for {blocked_ms:.0f} ms"
+            f"{f' in {route}' if route else ''}; stack of the loop thread:\n"
+            + "".join(traceback.format_list(stack))
+        )
+
+    @staticmethod
+    def _index_routes(app) -> dict:
+        codes = {}
+        for route in app.routes:
+            if not isinstance(route, APIRoute):
+                continue
+            name = f"{','.join(sorted(route.methods))} {route.path}"
+            for func in {route.endpoint, inspect.unwrap(route.endpoint)}:
+                code = getattr(func, "__code__", None)
+                if code is None:
+                    continue
+                # Decorator wrappers share one code object across routes; they can't name a route
+                codes[code] = None if code in codes and codes[code] != name else name
+        return {code: name for code, name in codes.items() if name is not None}
+
+    def _route_for(self, frame) -> Optional[str]:
+        while frame is not None:
+            route = self._route_codes.get(frame.f_code)
+            if route is not None:
+                return route
+            frame = frame.f_back
+        return None
+
+    def as_dict(self) -> dict:
+        samples = self.metrics["samples"]
+        histogram = {f"le_{bound}ms": count for bound, count in zip(self.BUCKETS_MS, self.buckets)}
+        histogram[f"gt_{self.BUCKETS_MS[-1]}ms"] = self.buckets[-1]
+        return {
+            "running": self._task is not None,
+            "interval_seconds": self.interval_seconds,
+            "threshold_ms": self.threshold_ms,
+            "debug": self.debug,
+            "samples": samples,
+            "stalls": self.metrics["stalls"],
+            "mean_lag_ms": round(self.metrics["total_lag_ms"] / samples, 2) if samples else None,
+            "max_lag_ms": self.metrics["max_lag_ms"],
+            "last_lag_ms": self.metrics["last_lag_ms"],
+            "histogram": histogram,
+            "recent_stalls": [
+                {key: value for key, value in stall.items() if key != "beat"} for stall in self.recent_stalls
+            ]
+        }
+
+loop_monitor = LoopLagMonitor(
+    settings.LOOP_MONITOR_INTERVAL_SECONDS,
+    settings.LOOP_STALL_THRESHOLD_MS,
+    settings.LOOP_MONITOR_DEBUG
+)
@@ -1,8 +1,13 @@
 # main.py
 
+# Imported first so the startup report covers every import below
+from startup import startup_report
+
 from dotenv import load_dotenv
 load_dotenv()  # Load environment variables first
 
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
 # Import separated routers
@@ -10,30 +15,111 @@ from routers.auth_router import router as auth_router
 from routers.address_router import router as address_router
 from routers.order_router import router as order_router
 from routers.delivery_router import router as delivery_router
+from routers.ops_router import router as ops_router
+from routers.analytics_router import router as analytics_router
+
+from admission import AdmissionMiddleware
+from config import settings
+import analytics
+import archive
+import executors
+from background import background_tasks
+from database import warm_up_pool
+from dispatch import zone_dispatcher
+from eta import eta_estimator
+from geocoding import address_backfill
+from heartbeat import heartbeat_sweeper
+from loop_monitor import loop_monitor
+from outbox import outbox_relay
+from profiling import ProfilingMiddleware
+from rate_limit import rate_limiter
+from revocation import revocation_filter
+from serialization import FastJSONResponse
+from sms_service import sms_service
+from status_counters import status_counts
+
+logger = logging.getLogger(__name__)
+startup_report.mark("imports")
+
+# Schema management lives in Alembic migrations (see migrations/).
+# Run `alembic upgrade head` before starting workers instead of
+# creating tables at import time.
 
-# Import models to create tables
-from models.auth_models import User, OTP
-from models.address_models import Address
-from models.order_models import Order, OrderItem
-from models.delivery_models import DeliveryAgent
-from database import engine
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    executors.configure_thread_limiter()
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start(app)
+    
+    # External providers are initialized here rather than at import time
+    with startup_report.phase("providers"):
+        if sms_service.is_configured:
+            try:
+                sms_service.init_client()
+            except Exception as e:
+                logger.warning(f"SMS client initialization failed, will retry on first send: {e}")
+        else:
+            logger.warning("Twilio credentials are not configured; SMS sending is disabled")
 
-# Create DB tables
-from database import Base
-Base.metadata.create_all(bind=engine)
+    if settings.WARM_DB_POOL_ON_STARTUP:
+        with startup_report.phase("db_pool"):
+            warm_up_pool()
+
+    with startup_report.phase("revocations"):
+        try:
+            revocation_filter.rebuild()
+        except Exception as e:
+            logger.warning(f"Revocation filter not loaded, checks go to the database until the next sync: {e}")
+
+    if settings.OUTBOX_RELAY_ENABLED:
+        background_tasks.add("outbox-relay", settings.OUTBOX_POLL_SECONDS, outbox_relay.run_once)
+    if settings.ANALYTICS_REBUILD_ENABLED:
+        background_tasks.add("analytics-rebuild", settings.ANALYTICS_REBUILD_INTERVAL_SECONDS, analytics.rebuild_recent_rollups)
+    if settings.ETA_REFRESH_ENABLED:
+        background_tasks.add("eta-refit", settings.ETA_REFIT_INTERVAL_SECONDS, eta_estimator.fit)
+        background_tasks.add("eta-refresh", settings.ETA_REFRESH_INTERVAL_SECONDS, eta_estimator.refresh_in_flight)
+    if settings.ARCHIVE_ENABLED:
+        background_tasks.add("order-archival", settings.ARCHIVE_INTERVAL_SECONDS, archive.order_archiver.run)
+    if settings.HEARTBEAT_SWEEP_ENABLED:
+        background_tasks.add("heartbeat-sweeper", settings.HEARTBEAT_SWEEP_INTERVAL_SECONDS, heartbeat_sweeper.sweep)
+    if settings.DISPATCH_ENABLED:
+        background_tasks.add("zone-dispatcher", settings.DISPATCH_INTERVAL_SECONDS, zone_dispatcher.run_once)
+    if settings.STATUS_COUNTER_RECONCILE_ENABLED:
+        background_tasks.add("status-counter-reconcile", settings.STATUS_COUNTER_RECONCILE_INTERVAL_SECONDS, status_counts.reconcile)
+    if settings.ADDRESS_BACKFILL_ENABLED:
+        background_tasks.add("address-backfill", settings.ADDRESS_BACKFILL_INTERVAL_SECONDS, address_backfill.run)
+    background_tasks.add("revocation-sync", settings.REVOCATION_SYNC_SECONDS, revocation_filter.sync)
+    if settings.RATE_LIMIT_BACKEND == "sql":
+        background_tasks.add("rate-limit-prune", settings.RATE_LIMIT_PRUNE_INTERVAL_SECONDS, rate_limiter.prune)
+    background_tasks.start_all()
+
+    startup_report.ready()
+    yield
+    await background_tasks.stop_all()
+    await loop_monitor.stop()
+    executors.shutdown()
 
 # Initialize app
 app = FastAPI(
     title="Food Delivery App - Complete API",
     description="Complete food delivery app with authentication, address management, order management, and delivery tracking",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
+app.add_middleware(ProfilingMiddleware)
+# Outermost, so shed requests are turned away before anything else runs
+app.add_middleware(AdmissionMiddleware)
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(address_router)
 app.include_router(order_router)
 app.include_router(delivery_router)
+app.include_router(ops_router)
+app.include_router(analytics_router)
+startup_report.mark("app")
 
 @app.get("/")
 async def root():
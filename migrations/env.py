@@ -0,0 +1,56 @@
+# migrations/env.py
+
+from logging.config import fileConfig
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from sqlalchemy import create_engine, pool
+from alembic import context
+
+from config import settings
+from database import Base
+
+# Import every model module so its tables are registered on Base.metadata
+import models.auth_models
+import models.address_models
+import models.order_models
+import models.delivery_models
+import models.outbox_models
+import models.analytics_models
+import models.archive_models
+import models.rate_limit_models
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL to stdout without connecting"""
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    """Run migrations against the configured database"""
+    connectable = create_engine(settings.DATABASE_URL, poolclass=pool.NullPool)
+
+    with connectable.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
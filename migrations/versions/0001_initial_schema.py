@@ -0,0 +1,137 @@
+"""initial schema
+
+Tables that main.py used to create with Base.metadata.create_all().
+Databases created that way already have this schema; mark them with
+`alembic stamp 0001` instead of upgrading.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-19 00:21:49.402929
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('delivery_agents',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('phone', sa.String(length=20), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=True),
+    sa.Column('current_status', sa.Enum('AVAILABLE', 'ASSIGNED', 'OFFLINE', name='deliveryagentstatus'), nullable=False),
+    sa.Column('current_latitude', sa.Float(), nullable=True),
+    sa.Column('current_longitude', sa.Float(), nullable=True),
+    sa.Column('last_location_update', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('vehicle_type', sa.String(length=50), nullable=True),
+    sa.Column('vehicle_number', sa.String(length=20), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_delivery_agents_id'), 'delivery_agents', ['id'], unique=False)
+    op.create_index(op.f('ix_delivery_agents_phone'), 'delivery_agents', ['phone'], unique=True)
+    op.create_table('otps',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('phone_number', sa.String(length=20), nullable=False),
+    sa.Column('hashed_otp', sa.String(length=255), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('is_used', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_otps_id'), 'otps', ['id'], unique=False)
+    op.create_index(op.f('ix_otps_phone_number'), 'otps', ['phone_number'], unique=False)
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('phone_number', sa.String(length=20), nullable=False),
+    sa.Column('is_verified', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_index(op.f('ix_users_phone_number'), 'users', ['phone_number'], unique=True)
+    op.create_table('addresses',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('country', sa.String(length=50), nullable=True),
+    sa.Column('full_name', sa.String(length=100), nullable=False),
+    sa.Column('mobile_number', sa.String(length=20), nullable=False),
+    sa.Column('flat_house_building', sa.String(length=255), nullable=False),
+    sa.Column('area_street_sector', sa.String(length=255), nullable=False),
+    sa.Column('landmark', sa.String(length=255), nullable=True),
+    sa.Column('pincode', sa.String(length=10), nullable=False),
+    sa.Column('town_city', sa.String(length=100), nullable=False),
+    sa.Column('state', sa.String(length=100), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_addresses_id'), 'addresses', ['id'], unique=False)
+    op.create_table('orders',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('order_number', sa.String(length=20), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('delivery_address_id', sa.Integer(), nullable=False),
+    sa.Column('delivery_agent_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.Enum('PENDING', 'CONFIRMED', 'DISPATCHED', 'DELIVERED', 'CANCELLED', name='orderstatus'), nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('delivery_fee', sa.Float(), nullable=True),
+    sa.Column('tax_amount', sa.Float(), nullable=True),
+    sa.Column('subtotal', sa.Float(), nullable=False),
+    sa.Column('estimated_delivery_time', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('actual_delivery_time', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('delivery_instructions', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['customer_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['delivery_address_id'], ['addresses.id'], ),
+    sa.ForeignKeyConstraint(['delivery_agent_id'], ['delivery_agents.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_orders_id'), 'orders', ['id'], unique=False)
+    op.create_index(op.f('ix_orders_order_number'), 'orders', ['order_number'], unique=True)
+    op.create_table('order_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.String(length=36), nullable=False),
+    sa.Column('menu_item_id', sa.Integer(), nullable=False),
+    sa.Column('item_name', sa.String(length=255), nullable=False),
+    sa.Column('item_price', sa.Float(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('special_instructions', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_order_items_id'), 'order_items', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_order_items_id'), table_name='order_items')
+    op.drop_table('order_items')
+    op.drop_index(op.f('ix_orders_order_number'), table_name='orders')
+    op.drop_index(op.f('ix_orders_id'), table_name='orders')
+    op.drop_table('orders')
+    op.drop_index(op.f('ix_addresses_id'), table_name='addresses')
+    op.drop_table('addresses')
+    op.drop_index(op.f('ix_users_phone_number'), table_name='users')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_table('users')
+    op.drop_index(op.f('ix_otps_phone_number'), table_name='otps')
+    op.drop_index(op.f('ix_otps_id'), table_name='otps')
+    op.drop_table('otps')
+    op.drop_index(op.f('ix_delivery_agents_phone'), table_name='delivery_agents')
+    op.drop_index(op.f('ix_delivery_agents_id'), table_name='delivery_agents')
+    op.drop_table('delivery_agents')
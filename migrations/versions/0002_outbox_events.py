@@ -0,0 +1,41 @@
+"""outbox events
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:24:37.316026
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('outbox_events',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('aggregate_id', sa.String(length=36), nullable=False),
+    sa.Column('event_type', sa.String(length=50), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('published_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_outbox_events_aggregate_id', 'outbox_events', ['aggregate_id'], unique=False)
+    op.create_index('ix_outbox_events_status_id', 'outbox_events', ['status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_events_status_id', table_name='outbox_events')
+    op.drop_index('ix_outbox_events_aggregate_id', table_name='outbox_events')
+    op.drop_table('outbox_events')
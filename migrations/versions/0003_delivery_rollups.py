@@ -0,0 +1,40 @@
+"""delivery rollups
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:26:15.536677
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('delivery_rollups',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('agent_id', sa.Integer(), nullable=False),
+    sa.Column('pincode', sa.String(length=10), nullable=False),
+    sa.Column('created_count', sa.Integer(), nullable=False),
+    sa.Column('delivered_count', sa.Integer(), nullable=False),
+    sa.Column('cancelled_count', sa.Integer(), nullable=False),
+    sa.Column('on_time_count', sa.Integer(), nullable=False),
+    sa.Column('total_delivery_seconds', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('bucket_start', 'agent_id', 'pincode', name='uq_delivery_rollups_bucket_agent_pincode')
+    )
+    op.create_index('ix_delivery_rollups_agent_id_bucket_start', 'delivery_rollups', ['agent_id', 'bucket_start'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_delivery_rollups_agent_id_bucket_start', table_name='delivery_rollups')
+    op.drop_table('delivery_rollups')
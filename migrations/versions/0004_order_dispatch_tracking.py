@@ -0,0 +1,28 @@
+"""order dispatch tracking
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 00:27:45.644370
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('orders', sa.Column('dispatched_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('orders', sa.Column('dispatch_distance_km', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('orders', 'dispatch_distance_km')
+    op.drop_column('orders', 'dispatched_at')
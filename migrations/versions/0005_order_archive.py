@@ -0,0 +1,69 @@
+"""order archive
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:29:08.058790
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('archived_orders',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('order_number', sa.String(length=20), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('delivery_address_id', sa.Integer(), nullable=False),
+    sa.Column('delivery_agent_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.Enum('PENDING', 'CONFIRMED', 'DISPATCHED', 'DELIVERED', 'CANCELLED', name='orderstatus', native_enum=False, length=20), nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('delivery_fee', sa.Float(), nullable=True),
+    sa.Column('tax_amount', sa.Float(), nullable=True),
+    sa.Column('subtotal', sa.Float(), nullable=False),
+    sa.Column('estimated_delivery_time', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('actual_delivery_time', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('dispatched_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('dispatch_distance_km', sa.Float(), nullable=True),
+    sa.Column('delivery_instructions', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_archived_orders_customer_id_created_at', 'archived_orders', ['customer_id', 'created_at'], unique=False)
+    op.create_index('ix_archived_orders_order_number', 'archived_orders', ['order_number'], unique=False)
+    op.create_table('archived_order_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.String(length=36), nullable=False),
+    sa.Column('menu_item_id', sa.Integer(), nullable=False),
+    sa.Column('item_name', sa.String(length=255), nullable=False),
+    sa.Column('item_price', sa.Float(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('special_instructions', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['order_id'], ['archived_orders.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_archived_order_items_order_id'), 'archived_order_items', ['order_id'], unique=False)
+    op.create_index('ix_orders_customer_id_created_at', 'orders', ['customer_id', 'created_at'], unique=False)
+    op.create_index('ix_orders_status_updated_at', 'orders', ['status', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_status_updated_at', table_name='orders')
+    op.drop_index('ix_orders_customer_id_created_at', table_name='orders')
+    op.drop_index(op.f('ix_archived_order_items_order_id'), table_name='archived_order_items')
+    op.drop_table('archived_order_items')
+    op.drop_index('ix_archived_orders_order_number', table_name='archived_orders')
+    op.drop_index('ix_archived_orders_customer_id_created_at', table_name='archived_orders')
+    op.drop_table('archived_orders')
@@ -0,0 +1,26 @@
+"""agent heartbeat index
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 00:33:28.898173
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_delivery_agents_status_heartbeat', 'delivery_agents', ['current_status', 'last_location_update'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_delivery_agents_status_heartbeat', table_name='delivery_agents')
@@ -0,0 +1,42 @@
+"""dispatch zones
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 00:35:18.931446
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('archived_orders', sa.Column('zone', sa.String(length=16), nullable=True))
+    op.add_column('delivery_agents', sa.Column('zone', sa.String(length=16), nullable=True))
+    op.create_index('ix_delivery_agents_zone_status', 'delivery_agents', ['zone', 'current_status'], unique=False)
+    op.add_column('orders', sa.Column('zone', sa.String(length=16), nullable=True))
+    op.create_index('ix_orders_zone_status', 'orders', ['zone', 'status'], unique=False)
+
+    # Open orders get their zone from the address pincode; agents pick up
+    # theirs on the next location ping
+    op.execute(
+        "UPDATE orders SET zone = ("
+        "SELECT substr(addresses.pincode, 1, 3) FROM addresses WHERE addresses.id = orders.delivery_address_id"
+        ") WHERE zone IS NULL AND status IN ('PENDING', 'CONFIRMED', 'DISPATCHED')"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_zone_status', table_name='orders')
+    op.drop_column('orders', 'zone')
+    op.drop_index('ix_delivery_agents_zone_status', table_name='delivery_agents')
+    op.drop_column('delivery_agents', 'zone')
+    op.drop_column('archived_orders', 'zone')
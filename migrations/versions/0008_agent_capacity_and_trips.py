@@ -0,0 +1,45 @@
+"""agent capacity and trips
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 00:44:08.378400
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('archived_orders', sa.Column('trip_id', sa.String(length=36), nullable=True))
+    op.add_column('archived_orders', sa.Column('trip_sequence', sa.Integer(), nullable=True))
+    op.add_column('delivery_agents', sa.Column('max_active_orders', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('delivery_agents', sa.Column('active_order_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('orders', sa.Column('trip_id', sa.String(length=36), nullable=True))
+    op.add_column('orders', sa.Column('trip_sequence', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_orders_trip_id'), 'orders', ['trip_id'], unique=False)
+
+    # Agents already out on a delivery start with their current load
+    op.execute(
+        "UPDATE delivery_agents SET active_order_count = ("
+        "SELECT count(*) FROM orders WHERE orders.delivery_agent_id = delivery_agents.id AND orders.status = 'DISPATCHED'"
+        ")"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_orders_trip_id'), table_name='orders')
+    op.drop_column('orders', 'trip_sequence')
+    op.drop_column('orders', 'trip_id')
+    op.drop_column('delivery_agents', 'active_order_count')
+    op.drop_column('delivery_agents', 'max_active_orders')
+    op.drop_column('archived_orders', 'trip_sequence')
+    op.drop_column('archived_orders', 'trip_id')
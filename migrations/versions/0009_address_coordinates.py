@@ -0,0 +1,30 @@
+"""address coordinates
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 00:46:39.701423
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('addresses', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('addresses', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('addresses', sa.Column('geo_precision', sa.String(length=16), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('addresses', 'geo_precision')
+    op.drop_column('addresses', 'longitude')
+    op.drop_column('addresses', 'latitude')
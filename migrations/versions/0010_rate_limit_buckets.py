@@ -0,0 +1,33 @@
+"""rate limit buckets
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 01:01:06.325909
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('rate_limit_buckets',
+    sa.Column('bucket_key', sa.String(length=32), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('bucket_key')
+    )
+    op.create_index('ix_rate_limit_buckets_updated_at', 'rate_limit_buckets', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rate_limit_buckets_updated_at', table_name='rate_limit_buckets')
+    op.drop_table('rate_limit_buckets')
@@ -0,0 +1,41 @@
+"""status counters
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 01:06:44.816514
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0012'
+down_revision: Union[str, None] = '0011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('status_counters',
+    sa.Column('entity', sa.String(length=20), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('shard', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('entity', 'status', 'shard')
+    )
+    # Seed from the current rows (enum columns hold member names; counters use values)
+    op.execute(
+        "INSERT INTO status_counters (entity, status, shard, count) "
+        "SELECT 'order', LOWER(CAST(status AS CHAR(20))), 0, COUNT(*) FROM orders GROUP BY status"
+    )
+    op.execute(
+        "INSERT INTO status_counters (entity, status, shard, count) "
+        "SELECT 'agent', LOWER(CAST(current_status AS CHAR(20))), 0, COUNT(*) FROM delivery_agents GROUP BY current_status"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('status_counters')
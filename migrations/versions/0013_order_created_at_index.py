@@ -0,0 +1,26 @@
+"""order created_at index
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19 01:15:04.033025
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0013'
+down_revision: Union[str, None] = '0012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_orders_created_at', 'orders', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_created_at', table_name='orders')
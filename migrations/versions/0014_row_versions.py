@@ -0,0 +1,30 @@
+"""row versions
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-19 01:23:19.469412
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0014'
+down_revision: Union[str, None] = '0013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('archived_orders', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('delivery_agents', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('orders', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('orders', 'version')
+    op.drop_column('delivery_agents', 'version')
+    op.drop_column('archived_orders', 'version')
@@ -0,0 +1,28 @@
+"""order previous status
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-19 01:25:07.507255
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0015'
+down_revision: Union[str, None] = '0014'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('archived_orders', sa.Column('previous_status', sa.Enum('PENDING', 'CONFIRMED', 'DISPATCHED', 'DELIVERED', 'CANCELLED', name='orderstatus', native_enum=False, length=20), nullable=True))
+    op.add_column('orders', sa.Column('previous_status', sa.Enum('PENDING', 'CONFIRMED', 'DISPATCHED', 'DELIVERED', 'CANCELLED', name='orderstatus'), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('orders', 'previous_status')
+    op.drop_column('archived_orders', 'previous_status')
@@ -3,6 +3,7 @@ from sqlalchemy import (
     Integer,
     String,
     DateTime,
+    Float,
     ForeignKey
 )
 from sqlalchemy.orm import relationship
@@ -24,6 +25,12 @@ class Address(Base):
     town_city = Column(String(100), nullable=False)
     state = Column(String(100), nullable=False)
 
+    # Filled from the pincode by geocoding.py; geo_precision says how
+    # (pincode, geocoder, district, none) and is NULL until geocoded
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    geo_precision = Column(String(16), nullable=True)
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
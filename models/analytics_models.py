@@ -0,0 +1,46 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    DateTime,
+    Float,
+    Index,
+    UniqueConstraint
+)
+from database import Base
+
+class DeliveryRollup(Base):
+    """Order outcomes pre-aggregated per hour, delivery agent and pincode"""
+    __tablename__ = "delivery_rollups"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # Dimensions (agent_id 0 = no agent assigned)
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    agent_id = Column(Integer, nullable=False, default=0)
+    pincode = Column(String(10), nullable=False, default="")
+
+    # Measures
+    created_count = Column(Integer, nullable=False, default=0)
+    delivered_count = Column(Integer, nullable=False, default=0)
+    cancelled_count = Column(Integer, nullable=False, default=0)
+    on_time_count = Column(Integer, nullable=False, default=0)
+    total_delivery_seconds = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        UniqueConstraint("bucket_start", "agent_id", "pincode", name="uq_delivery_rollups_bucket_agent_pincode"),
+        Index("ix_delivery_rollups_agent_id_bucket_start", "agent_id", "bucket_start"),
+    )
+
+class StatusCounter(Base):
+    """
+    Live count of orders or delivery agents in one status, maintained by the
+    transactions that change statuses. Each count is spread over a few shard
+    rows so concurrent writers don't all wait on one row; read the sum.
+    """
+    __tablename__ = "status_counters"
+
+    entity = Column(String(20), primary_key=True)  # "order" or "agent"
+    status = Column(String(20), primary_key=True)
+    shard = Column(Integer, primary_key=True, autoincrement=False)
+    count = Column(Integer, nullable=False, default=0)
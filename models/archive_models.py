@@ -0,0 +1,78 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    DateTime,
+    ForeignKey,
+    Enum,
+    Float,
+    Text,
+    Index
+)
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from database import Base
+from models.order_models import OrderStatus
+
+# Cold copies of DELIVERED/CANCELLED orders moved out of the hot tables by
+# archive.py. Columns mirror models.order_models; status is stored as a
+# plain string so the archive doesn't share the native enum type.
+
+class ArchivedOrder(Base):
+    __tablename__ = "archived_orders"
+
+    id = Column(String(36), primary_key=True)
+    order_number = Column(String(20), nullable=False)
+
+    customer_id = Column(Integer, nullable=False)
+    delivery_address_id = Column(Integer, nullable=False)
+    delivery_agent_id = Column(Integer, nullable=True)
+
+    # Order details
+    status = Column(Enum(OrderStatus, native_enum=False, length=20), nullable=False)
+    previous_status = Column(Enum(OrderStatus, native_enum=False, length=20), nullable=True)
+    total_amount = Column(Float, nullable=False)
+    delivery_fee = Column(Float, default=0.0)
+    tax_amount = Column(Float, default=0.0)
+    subtotal = Column(Float, nullable=False)
+
+    # Delivery details
+    estimated_delivery_time = Column(DateTime(timezone=True), nullable=True)
+    actual_delivery_time = Column(DateTime(timezone=True), nullable=True)
+    dispatched_at = Column(DateTime(timezone=True), nullable=True)
+    dispatch_distance_km = Column(Float, nullable=True)
+    zone = Column(String(16), nullable=True)
+    trip_id = Column(String(36), nullable=True)
+    trip_sequence = Column(Integer, nullable=True)
+    delivery_instructions = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    version = Column(Integer, nullable=False, server_default="1")
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    order_items = relationship("ArchivedOrderItem", back_populates="order")
+
+    __table_args__ = (
+        Index("ix_archived_orders_customer_id_created_at", "customer_id", "created_at"),
+        Index("ix_archived_orders_order_number", "order_number"),
+    )
+
+class ArchivedOrderItem(Base):
+    __tablename__ = "archived_order_items"
+
+    id = Column(Integer, primary_key=True)
+    order_id = Column(String(36), ForeignKey("archived_orders.id"), nullable=False, index=True)
+    menu_item_id = Column(Integer, nullable=False)
+
+    # Item details
+    item_name = Column(String(255), nullable=False)
+    item_price = Column(Float, nullable=False)
+    quantity = Column(Integer, nullable=False, default=1)
+    special_instructions = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), nullable=True)
+
+    order = relationship("ArchivedOrder", back_populates="order_items")
@@ -3,7 +3,8 @@ from sqlalchemy import (
     Integer,
     String,
     DateTime,
-    Boolean
+    Boolean,
+    Index
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -27,3 +28,19 @@ class OTP(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     expires_at = Column(DateTime(timezone=True), nullable=False)
     is_used = Column(Boolean, default=False)
+
+class RevokedToken(Base):
+    """A revoked refresh token (kind "token", by jti) or login session (kind "session", by sid)"""
+    __tablename__ = "revoked_tokens"
+
+    token_id = Column(String(32), primary_key=True)
+    kind = Column(String(10), nullable=False)
+    user_id = Column(Integer, nullable=True)
+    # After this nothing signed with the id is valid anyway, so the row can go
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_revoked_tokens_revoked_at", "revoked_at"),
+        Index("ix_revoked_tokens_expires_at", "expires_at"),
+    )
@@ -5,10 +5,11 @@ from sqlalchemy import (
     DateTime,
     Enum,
     Float,
-    Boolean
+    Boolean,
+    Index
 )
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from database import Base
 import enum
 
@@ -30,6 +31,12 @@ class DeliveryAgent(Base):
     current_latitude = Column(Float, nullable=True)
     current_longitude = Column(Float, nullable=True)
     last_location_update = Column(DateTime(timezone=True), nullable=True)
+    zone = Column(String(16), nullable=True)  # Derived from position, see zones.py
+    
+    # Capacity: an agent can carry several orders on one trip. Agents with
+    # active orders are ASSIGNED; they become AVAILABLE when the count drops to 0
+    max_active_orders = Column(Integer, default=1, server_default="1", nullable=False)
+    active_order_count = Column(Integer, default=0, server_default="0", nullable=False)
     
     # Agent details
     is_active = Column(Boolean, default=True)
@@ -39,6 +46,14 @@ class DeliveryAgent(Base):
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Bumped by every UPDATE, ORM or Core; the response cache's row version
+    version = Column(Integer, nullable=False, default=1, server_default="1", onupdate=text("version + 1"))
+    
+    __table_args__ = (
+        # Heartbeat sweeps look up AVAILABLE agents by last ping time
+        Index("ix_delivery_agents_status_heartbeat", "current_status", "last_location_update"),
+        Index("ix_delivery_agents_zone_status", "zone", "current_status"),
+    )
     
     # Relationships
     # orders = relationship("Order", back_populates="delivery_agent")  # Commented out to avoid circular dependency
@@ -6,10 +6,11 @@ from sqlalchemy import (
     ForeignKey,
     Enum,
     Float,
-    Text
+    Text,
+    Index
 )
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from database import Base
 import enum
 import uuid
@@ -34,6 +35,8 @@ class Order(Base):
     
     # Order details
     status = Column(Enum(OrderStatus), default=OrderStatus.PENDING, nullable=False)
+    # Status the last transition moved the order out of, written by the same UPDATE
+    previous_status = Column(Enum(OrderStatus), nullable=True)
     total_amount = Column(Float, nullable=False)
     delivery_fee = Column(Float, default=0.0)
     tax_amount = Column(Float, default=0.0)
@@ -42,11 +45,18 @@ class Order(Base):
     # Delivery details
     estimated_delivery_time = Column(DateTime(timezone=True), nullable=True)
     actual_delivery_time = Column(DateTime(timezone=True), nullable=True)
+    dispatched_at = Column(DateTime(timezone=True), nullable=True)
+    dispatch_distance_km = Column(Float, nullable=True)  # Agent to destination at dispatch, for ETA fitting
+    zone = Column(String(16), nullable=True)  # Dispatch zone, see zones.py
+    trip_id = Column(String(36), nullable=True, index=True)  # Orders carried together by one agent
+    trip_sequence = Column(Integer, nullable=True)  # 1-based drop order within the trip
     delivery_instructions = Column(Text, nullable=True)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Bumped by every UPDATE, ORM or Core; the response cache's row version
+    version = Column(Integer, nullable=False, default=1, server_default="1", onupdate=text("version + 1"))
     
     # Relationships
     # customer = relationship("User", back_populates="orders")  # Commented out to avoid circular dependency
@@ -54,6 +64,16 @@ class Order(Base):
     delivery_agent = relationship("DeliveryAgent")  # Removed back_populates to avoid circular dependency
     order_items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_orders_customer_id_created_at", "customer_id", "created_at"),
+        # Analytics rebuilds scan orders created in a time window
+        Index("ix_orders_created_at", "created_at"),
+        # Archival scans terminal orders by age
+        Index("ix_orders_status_updated_at", "status", "updated_at"),
+        # Each dispatch shard scans its own zone's unassigned orders
+        Index("ix_orders_zone_status", "zone", "status"),
+    )
+
 class OrderItem(Base):
     __tablename__ = "order_items"
     
@@ -0,0 +1,32 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    DateTime,
+    Text,
+    Index
+)
+from sqlalchemy.sql import func
+from database import Base
+
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    aggregate_id = Column(String(36), nullable=False)  # Order the event belongs to
+    event_type = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON document
+
+    # Relay bookkeeping: pending -> published, or dead after too many attempts
+    status = Column(String(20), default="pending", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    published_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_outbox_events_status_id", "status", "id"),
+        Index("ix_outbox_events_aggregate_id", "aggregate_id"),
+    )
@@ -0,0 +1,20 @@
+from sqlalchemy import (
+    Column,
+    String,
+    Float,
+    Index
+)
+from database import Base
+
+class RateLimitBucket(Base):
+    """Token bucket shared by all workers (RATE_LIMIT_BACKEND=sql)"""
+    __tablename__ = "rate_limit_buckets"
+
+    # Digest of "<limit name>:<key>", so phone numbers and addresses aren't stored
+    bucket_key = Column(String(32), primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)  # unix seconds of the last refill
+
+    __table_args__ = (
+        Index("ix_rate_limit_buckets_updated_at", "updated_at"),
+    )
@@ -0,0 +1,95 @@
+# notifications.py
+
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from models.outbox_models import OutboxEvent
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+class NotificationCoalescer:
+    """
+    Decides which pending status SMS the outbox relay should actually send.
+
+    Events of `event_types` (customer-facing status updates, where only the
+    latest matters) for the same phone and order are merged: when a newer one is
+    pending, the older ones are published to every sink except SMS. The newest
+    is held until it is `window_seconds` old, so an update that follows within
+    the window replaces it instead of producing a second message.
+    """
+
+    def __init__(self, window_seconds: float, event_types: Iterable[str]):
+        self.window_seconds = window_seconds
+        self.event_types = frozenset(event_types)
+        self._lock = threading.Lock()
+        self.metrics = {
+            "status_events": 0,
+            "sms_sent": 0,
+            "sends_saved": 0,
+            "held": 0,
+            "total_added_delay_ms": 0.0,
+            "max_added_delay_ms": 0.0
+        }
+
+    def _key(self, event: OutboxEvent) -> Optional[tuple[str, str]]:
+        if event.event_type not in self.event_types:
+            return None
+        try:
+            to = json.loads(event.payload).get("to")
+        except (TypeError, ValueError):
+            return None
+        return (to, event.aggregate_id) if to else None
+
+    def plan(self, events: Iterable[OutboxEvent], now: datetime) -> tuple[set[int], set[int]]:
+        """Return (ids to hold back for now, ids whose SMS is superseded) for a batch in id order"""
+        keys: dict[int, tuple[str, str]] = {}
+        latest: dict[tuple[str, str], OutboxEvent] = {}
+        for event in events:
+            key = self._key(event)
+            if key is not None:
+                keys[event.id] = key
+                latest[key] = event
+
+        superseded = {event_id for event_id, key in keys.items() if latest[key].id != event_id}
+        held = set()
+        for event in latest.values():
+            created_at = _as_utc(event.created_at)
+            if created_at is not None and (now - created_at).total_seconds() < self.window_seconds:
+                held.add(event.id)
+        with self._lock:
+            self.metrics["held"] += len(held)
+        return held, superseded
+
+    def record_published(self, event: OutboxEvent, superseded: bool, published_at: datetime) -> None:
+        """Count a published event; the added delay is the part of its lag spent waiting out the window"""
+        if event.event_type not in self.event_types:
+            return
+        with self._lock:
+            self.metrics["status_events"] += 1
+            if superseded:
+                self.metrics["sends_saved"] += 1
+                return
+            self.metrics["sms_sent"] += 1
+            created_at = _as_utc(event.created_at)
+            if created_at is not None:
+                delay_ms = min(self.window_seconds, max(0.0, (published_at - created_at).total_seconds())) * 1000
+                self.metrics["total_added_delay_ms"] += delay_ms
+                self.metrics["max_added_delay_ms"] = max(self.metrics["max_added_delay_ms"], round(delay_ms, 2))
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            metrics = dict(self.metrics)
+        sent = metrics.pop("sms_sent")
+        total_delay = metrics.pop("total_added_delay_ms")
+        return {
+            "window_seconds": self.window_seconds,
+            "sms_sent": sent,
+            **metrics,
+            "saved_ratio": round(metrics["sends_saved"] / metrics["status_events"], 4) if metrics["status_events"] else None,
+            "avg_added_delay_ms": round(total_delay / sent, 2) if sent else None
+        }
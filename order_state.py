@@ -0,0 +1,170 @@
+# order_state.py
+
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import case, literal, select, update
+from sqlalchemy.orm import Session
+
+import analytics
+import status_counters
+from models.delivery_models import DeliveryAgent, DeliveryAgentStatus
+from models.order_models import Order, OrderStatus
+
+# Which statuses an order may move to from each status
+TRANSITIONS: dict[OrderStatus, tuple[OrderStatus, ...]] = {
+    OrderStatus.PENDING: (OrderStatus.CONFIRMED, OrderStatus.DISPATCHED, OrderStatus.CANCELLED),
+    OrderStatus.CONFIRMED: (OrderStatus.DISPATCHED, OrderStatus.CANCELLED),
+    OrderStatus.DISPATCHED: (OrderStatus.DELIVERED, OrderStatus.CANCELLED),
+    OrderStatus.DELIVERED: (),
+    OrderStatus.CANCELLED: ()
+}
+
+# Compiled once: for each target status, the statuses it may be entered from.
+# This is the `status IN (...)` guard of the conditional UPDATE.
+ALLOWED_FROM: dict[OrderStatus, tuple[OrderStatus, ...]] = {
+    target: tuple(source for source, targets in TRANSITIONS.items() if target in targets)
+    for target in OrderStatus
+}
+OPEN_STATUSES = tuple(source for source, targets in TRANSITIONS.items() if targets)
+
+class OrderTransitionError(HTTPException):
+    """The order is not in a status the requested transition can start from"""
+
+    def __init__(self, order_id: str, current: OrderStatus, target: Optional[OrderStatus], detail: str):
+        super().__init__(status_code=status.HTTP_409_CONFLICT, detail=detail)
+        self.order_id = order_id
+        self.current = current
+        self.target = target
+
+def can_transition(current: OrderStatus, target: OrderStatus) -> bool:
+    return current in ALLOWED_FROM[target]
+
+def release_agent(db: Session, agent_id: Optional[int]) -> None:
+    """Free one order slot on an agent; the agent is AVAILABLE again at zero"""
+    if agent_id is None:
+        return
+    now = datetime.now(timezone.utc)
+    # Last order on the agent: one guarded UPDATE that also tells us the status changed
+    freed = db.execute(
+        update(DeliveryAgent)
+        .where(
+            DeliveryAgent.id == agent_id,
+            DeliveryAgent.current_status == DeliveryAgentStatus.ASSIGNED,
+            DeliveryAgent.active_order_count <= 1
+        )
+        .values(active_order_count=0, current_status=DeliveryAgentStatus.AVAILABLE, updated_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if freed:
+        status_counters.record_transition(db, status_counters.AGENT, DeliveryAgentStatus.ASSIGNED, DeliveryAgentStatus.AVAILABLE)
+        return
+    db.execute(
+        update(DeliveryAgent)
+        .where(DeliveryAgent.id == agent_id)
+        .values(
+            active_order_count=case(
+                (DeliveryAgent.active_order_count > 0, DeliveryAgent.active_order_count - 1), else_=0
+            ),
+            updated_at=now
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def _update_returning(db: Session, order_id: str, stmt) -> Optional[Order]:
+    """Run a guarded UPDATE and get the new row back, in one round trip where the dialect allows"""
+    if db.get_bind().dialect.update_returning:
+        # populate_existing doesn't reach an instance the session already holds,
+        # which would keep its pre-UPDATE values; expire it so the RETURNING row
+        # loads into it (after flushing anything pending on it)
+        instance = db.identity_map.get(db.identity_key(Order, order_id))
+        if instance is not None:
+            db.flush()
+            db.expire(instance)
+        return db.execute(
+            stmt.returning(Order).execution_options(populate_existing=True, synchronize_session=False)
+        ).scalar_one_or_none()
+    # e.g. MySQL: no UPDATE ... RETURNING, so read the row back by primary key
+    result = db.execute(stmt.execution_options(synchronize_session=False))
+    if result.rowcount == 0:
+        return None
+    return db.get(Order, order_id, populate_existing=True)
+
+def _conflict(db: Session, order_id: str, target: Optional[OrderStatus], customer_id: Optional[int]) -> HTTPException:
+    """Explain why a guarded UPDATE matched no row (only runs on the failure path)"""
+    query = select(Order.status).where(Order.id == order_id)
+    if customer_id is not None:
+        query = query.where(Order.customer_id == customer_id)
+    current = db.execute(query).scalar_one_or_none()
+    if current is None:
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+    if target is None:
+        detail = f"Order is {current.value} and can no longer be changed"
+    elif current == target:
+        detail = f"Order is already {current.value}"
+    elif can_transition(current, target):
+        detail = f"Order is {current.value}; it was changed by another request or is not eligible to be {target.value}"
+    else:
+        detail = f"Order cannot move from {current.value} to {target.value}"
+    return OrderTransitionError(order_id, current, target, detail)
+
+def transition_order(
+    db: Session,
+    order_id: str,
+    new_status: OrderStatus,
+    values: Optional[dict] = None,
+    where: Iterable = (),
+    customer_id: Optional[int] = None
+) -> Order:
+    """
+    Move an order to `new_status` with one conditional UPDATE
+    (SET previous_status=status, status=:new WHERE id=:id AND status IN (:allowed)),
+    returning the new row; previous_status tells the status counters which
+    status the order left, without a read before the write.
+
+    `values` are written in the same statement and `where` adds extra guards.
+    Raises OrderTransitionError (409) when the order is in the wrong status or
+    lost a race, and 404 when it does not exist. Rollups, status counters and
+    the agent's order slot are updated here, in the caller's transaction; the
+    caller commits.
+    """
+    now = datetime.now(timezone.utc)
+    values = dict(values or {})
+    if new_status == OrderStatus.DELIVERED:
+        values.setdefault("actual_delivery_time", now)
+
+    conditions = [Order.id == order_id, Order.status.in_(ALLOWED_FROM[new_status]), *where]
+    if customer_id is not None:
+        conditions.append(Order.customer_id == customer_id)
+    # previous_status is assigned first: MySQL evaluates SET left to right,
+    # other databases read the old row for every assignment
+    stmt = update(Order).where(*conditions).ordered_values(
+        (Order.previous_status, Order.status),
+        (Order.status, new_status),
+        (Order.updated_at, now),
+        *((getattr(Order, name), value) for name, value in values.items())
+    )
+    order = _update_returning(db, order_id, stmt)
+    if order is None:
+        raise _conflict(db, order_id, new_status, customer_id)
+    status_counters.record_transition(db, status_counters.ORDER, order.previous_status, new_status)
+
+    if new_status in (OrderStatus.DELIVERED, OrderStatus.CANCELLED):
+        # Only dispatched orders have dispatched_at, so this is "left DISPATCHED"
+        if order.dispatched_at is not None:
+            release_agent(db, order.delivery_agent_id)
+        analytics.record_order_closed(db, order, new_status)
+    return order
+
+def update_order_fields(db: Session, order_id: str, values: dict, customer_id: Optional[int] = None) -> Order:
+    """Write non-status fields on an order that is still open, in one conditional UPDATE"""
+    conditions = [Order.id == order_id, Order.status.in_(OPEN_STATUSES)]
+    if customer_id is not None:
+        conditions.append(Order.customer_id == customer_id)
+    order = _update_returning(
+        db, order_id, update(Order).where(*conditions).values(updated_at=datetime.now(timezone.utc), **values)
+    )
+    if order is None:
+        raise _conflict(db, order_id, None, customer_id)
+    return order
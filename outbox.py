@@ -0,0 +1,286 @@
+# outbox.py
+
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Optional
+
+import requests
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models.outbox_models import OutboxEvent
+from notifications import NotificationCoalescer
+from sms_service import sms_service
+
+logger = logging.getLogger(__name__)
+
+# Event types written by the routers
+ORDER_STATUS_CHANGED = "order.status_changed"
+DELIVERY_ASSIGNED = "delivery.assigned"
+DELIVERY_STATUS_CHANGED = "delivery.status_changed"
+
+PENDING = "pending"
+PUBLISHED = "published"
+DEAD = "dead"
+
+class OutboxPublishError(Exception):
+    """Raised by a sink when an event could not be delivered and should be retried"""
+
+def enqueue_event(db: Session, aggregate_id: str, event_type: str, payload: dict) -> OutboxEvent:
+    """Add an event to the caller's transaction; it is published after the caller commits"""
+    event = OutboxEvent(
+        aggregate_id=aggregate_id,
+        event_type=event_type,
+        payload=json.dumps(payload, default=str),
+        status=PENDING,
+        attempts=0
+    )
+    db.add(event)
+    return event
+
+# --- SINKS ---
+class SMSSink:
+    """Delivers notification events through sms_service"""
+
+    name = "sms"
+
+    def publish(self, event: OutboxEvent, payload: dict) -> None:
+        if event.event_type == ORDER_STATUS_CHANGED:
+            sent = sms_service.send_order_status_sms(
+                to_number=payload["to"],
+                order_id=event.aggregate_id,
+                status=payload["status"],
+                order_number=payload.get("order_number")
+            )
+        elif event.event_type == DELIVERY_ASSIGNED:
+            sent = sms_service.send_delivery_assignment_sms(
+                agent_phone=payload["to"],
+                order_id=event.aggregate_id,
+                order_number=payload.get("order_number")
+            )
+        elif event.event_type == DELIVERY_STATUS_CHANGED:
+            sent = sms_service.send_delivery_update_sms(
+                customer_phone=payload["to"],
+                order_id=event.aggregate_id,
+                status=payload["status"],
+                order_number=payload.get("order_number")
+            )
+        else:
+            return
+        if not sent:
+            raise OutboxPublishError(f"SMS for {event.event_type} was not sent")
+
+class WebhookSink:
+    """POSTs every event as JSON; receivers should de-duplicate on the event id"""
+
+    name = "webhook"
+
+    def __init__(self, url: str, timeout_seconds: float):
+        self.url = url
+        self.timeout_seconds = timeout_seconds
+        self.session = requests.Session()
+
+    def publish(self, event: OutboxEvent, payload: dict) -> None:
+        try:
+            response = self.session.post(
+                self.url,
+                json={
+                    "id": event.id,
+                    "type": event.event_type,
+                    "aggregate_id": event.aggregate_id,
+                    "created_at": event.created_at.isoformat() if event.created_at else None,
+                    "payload": payload
+                },
+                timeout=self.timeout_seconds
+            )
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise OutboxPublishError(f"Webhook delivery failed: {e}") from e
+
+class LogSink:
+    """Writes every event to the application log"""
+
+    name = "log"
+
+    def publish(self, event: OutboxEvent, payload: dict) -> None:
+        logger.info(f"Outbox event {event.id} {event.event_type} for {event.aggregate_id}: {payload}")
+
+def build_sinks(names: list[str]) -> list:
+    sinks = []
+    for name in names:
+        if name == "sms":
+            sinks.append(SMSSink())
+        elif name == "webhook":
+            if not settings.OUTBOX_WEBHOOK_URL:
+                raise ValueError("OUTBOX_WEBHOOK_URL is required for the webhook sink")
+            sinks.append(WebhookSink(settings.OUTBOX_WEBHOOK_URL, settings.OUTBOX_WEBHOOK_TIMEOUT_SECONDS))
+        elif name == "log":
+            sinks.append(LogSink())
+        else:
+            raise ValueError(f"Unknown outbox sink: {name}")
+    return sinks
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+# --- RELAY ---
+class OutboxRelay:
+    """
+    Publishes pending outbox events in id order, in batches.
+
+    Delivery is at-least-once and ordered per order: when an event fails, later
+    events for the same order in the batch are held back until it succeeds (or
+    is marked dead after OUTBOX_MAX_ATTEMPTS). The batch is read with
+    SELECT ... FOR UPDATE so concurrent relays on other workers serialize
+    instead of publishing out of order.
+
+    Within a batch, events are sent in waves holding at most one event per
+    order, so different orders go to the providers concurrently. With an SMS
+    sink, status updates pass through a NotificationCoalescer first.
+    """
+
+    def __init__(
+        self,
+        sinks: list,
+        batch_size: int,
+        max_attempts: int,
+        coalescer: Optional[NotificationCoalescer] = None,
+        send_concurrency: int = 1
+    ):
+        self.sinks = sinks
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.coalescer = coalescer
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, send_concurrency), thread_name_prefix="outbox-send")
+        self.metrics = {
+            "published": 0,
+            "failed_attempts": 0,
+            "dead": 0,
+            "last_batch_size": 0,
+            "last_run_at": None,
+            "last_publish_lag_ms": None,
+            "max_publish_lag_ms": 0.0
+        }
+
+    def run_once(self) -> int:
+        """Publish one batch; returns the number of events published"""
+        with self._lock:
+            db = SessionLocal()
+            try:
+                return self._publish_batch(db)
+            finally:
+                db.close()
+
+    def _publish_event(self, event: OutboxEvent, skip_sms: bool) -> Optional[Exception]:
+        try:
+            payload = json.loads(event.payload)
+            for sink in self.sinks:
+                if skip_sms and sink.name == "sms":
+                    continue
+                sink.publish(event, payload)
+        except Exception as e:
+            return e
+        return None
+
+    def _publish_batch(self, db: Session) -> int:
+        events = db.query(OutboxEvent).filter(
+            OutboxEvent.status == PENDING
+        ).order_by(OutboxEvent.id).limit(self.batch_size).with_for_update().all()
+
+        held, superseded = set(), set()
+        if self.coalescer is not None:
+            held, superseded = self.coalescer.plan(events, datetime.now(timezone.utc))
+
+        waves: list[list[OutboxEvent]] = []
+        positions: dict[str, int] = {}
+        for event in events:
+            position = positions.get(event.aggregate_id, 0)
+            positions[event.aggregate_id] = position + 1
+            if position == len(waves):
+                waves.append([])
+            waves[position].append(event)
+
+        published = 0
+        blocked_orders = set()
+        for wave in waves:
+            ready = []
+            for event in wave:
+                if event.aggregate_id in blocked_orders:
+                    continue
+                if event.id in held:
+                    # Waiting out the coalescing window; not a failure
+                    blocked_orders.add(event.aggregate_id)
+                    continue
+                ready.append(event)
+
+            errors = self._executor.map(lambda event: self._publish_event(event, event.id in superseded), ready)
+            for event, error in zip(ready, errors):
+                if error is not None:
+                    event.attempts += 1
+                    event.last_error = str(error)[:1000]
+                    self.metrics["failed_attempts"] += 1
+                    if event.attempts >= self.max_attempts:
+                        event.status = DEAD
+                        self.metrics["dead"] += 1
+                        logger.error(f"Outbox event {event.id} marked dead after {event.attempts} attempts: {error}")
+                    else:
+                        blocked_orders.add(event.aggregate_id)
+                        logger.warning(f"Outbox event {event.id} failed (attempt {event.attempts}): {error}")
+                    continue
+
+                now = datetime.now(timezone.utc)
+                event.status = PUBLISHED
+                event.published_at = now
+                published += 1
+                if self.coalescer is not None:
+                    self.coalescer.record_published(event, event.id in superseded, now)
+                created_at = _as_utc(event.created_at)
+                if created_at is not None:
+                    lag_ms = round((now - created_at).total_seconds() * 1000, 2)
+                    self.metrics["last_publish_lag_ms"] = lag_ms
+                    self.metrics["max_publish_lag_ms"] = max(self.metrics["max_publish_lag_ms"], lag_ms)
+
+        db.commit()
+        self.metrics["published"] += published
+        self.metrics["last_batch_size"] = len(events)
+        self.metrics["last_run_at"] = datetime.now(timezone.utc).isoformat()
+        return published
+
+    def lag_metrics(self) -> dict:
+        """Relay counters plus the backlog size and age of the oldest pending event"""
+        db = SessionLocal()
+        try:
+            pending, oldest = db.query(
+                func.count(OutboxEvent.id), func.min(OutboxEvent.created_at)
+            ).filter(OutboxEvent.status == PENDING).one()
+        finally:
+            db.close()
+        oldest = _as_utc(oldest)
+        return {
+            **self.metrics,
+            "pending": pending,
+            "oldest_pending_age_seconds": (
+                round((datetime.now(timezone.utc) - oldest).total_seconds(), 3) if oldest else 0.0
+            ),
+            "notifications": self.coalescer.as_dict() if self.coalescer is not None else None
+        }
+
+_sinks = build_sinks(settings.OUTBOX_SINKS)
+outbox_relay = OutboxRelay(
+    sinks=_sinks,
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+    coalescer=(
+        NotificationCoalescer(settings.NOTIFY_COALESCE_SECONDS, (ORDER_STATUS_CHANGED, DELIVERY_STATUS_CHANGED))
+        if any(sink.name == "sms" for sink in _sinks) else None
+    ),
+    send_concurrency=settings.NOTIFY_SEND_CONCURRENCY
+)
@@ -0,0 +1,216 @@
+# profiling.py
+
+import contextvars
+import hashlib
+import hmac
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Optional
+
+from config import settings
+
+# Set for the duration of a profiled request; worker pools copy it into their threads
+current_profile: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "current_profile", default=None
+)
+
+class RequestProfile:
+    """Stack samples for one request, from the threads that worked on it"""
+
+    __slots__ = ("started_at", "threads", "samples", "sample_count", "route", "duration_ms")
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.threads: dict[int, str] = {}  # thread id -> role ("loop" or "worker")
+        self.samples: Counter[str] = Counter()
+        self.sample_count = 0
+        self.route: Optional[str] = None
+        self.duration_ms: Optional[float] = None
+
+def _collapse(frame, role: str) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+        frame = frame.f_back
+    names.append(role)
+    return ";".join(reversed(names))
+
+class RequestProfiler:
+    """
+    Opt-in statistical profiler for individual requests.
+
+    A request is profiled when it carries a valid signed X-Profile header or
+    is picked by PROFILING_SAMPLE_RATE. While at least one profiled request
+    is in flight, a sampler thread records the stacks of the threads working
+    on it (the event loop, shared with other requests, and the pool worker
+    running its handler) every PROFILING_INTERVAL_MS. Samples are aggregated
+    per route over PROFILING_WINDOW_SECONDS and exported as collapsed stacks
+    for flamegraph tools. Nothing runs when no request is being profiled.
+    """
+
+    HEADER = b"x-profile"
+
+    def __init__(self, secret: Optional[str], sample_rate: float, interval_ms: float,
+                 window_seconds: float, max_profiles_per_route: int):
+        self.secret = secret.encode() if secret else None
+        self.sample_rate = sample_rate
+        self.interval_seconds = interval_ms / 1000
+        self.window_seconds = window_seconds
+        self.max_profiles_per_route = max_profiles_per_route
+        self._active: set[RequestProfile] = set()
+        self._routes: dict[str, deque[RequestProfile]] = {}
+        self._lock = threading.Lock()
+        self._sampler: Optional[threading.Thread] = None
+        self.metrics = {"profiled": 0, "signed": 0, "sampled": 0, "rejected_signatures": 0}
+
+    # --- TRIGGERS ---
+    def sign(self, expires_at: int) -> str:
+        """Header value that enables profiling until `expires_at` (unix seconds)"""
+        digest = hmac.new(self.secret, str(expires_at).encode(), hashlib.sha256).hexdigest()
+        return f"{expires_at}.{digest}"
+
+    def _valid_signature(self, value: bytes) -> bool:
+        if self.secret is None:
+            return False
+        expires_at, _, signature = value.decode("latin-1").partition(".")
+        if not expires_at.isdigit() or int(expires_at) < time.time():
+            return False
+        return hmac.compare_digest(self.sign(int(expires_at)), f"{expires_at}.{signature}")
+
+    def should_profile(self, scope: dict) -> bool:
+        for name, value in scope["headers"]:
+            if name == self.HEADER:
+                if self._valid_signature(value):
+                    self.metrics["signed"] += 1
+                    return True
+                self.metrics["rejected_signatures"] += 1
+                return False
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            self.metrics["sampled"] += 1
+            return True
+        return False
+
+    # --- SAMPLING ---
+    def begin(self) -> RequestProfile:
+        profile = RequestProfile()
+        profile.threads[threading.get_ident()] = "loop"
+        with self._lock:
+            self._active.add(profile)
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+                self._sampler.start()
+        return profile
+
+    def finish(self, profile: RequestProfile, route: str, duration_ms: float) -> None:
+        profile.route = route
+        profile.duration_ms = round(duration_ms, 2)
+        with self._lock:
+            self._active.discard(profile)
+            profiles = self._routes.setdefault(route, deque(maxlen=self.max_profiles_per_route))
+            profiles.append(profile)
+            self.metrics["profiled"] += 1
+
+    def _sample(self) -> None:
+        own_id = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._sampler = None
+                    return
+                active = list(self._active)
+            frames = sys._current_frames()
+            for profile in active:
+                for thread_id, role in list(profile.threads.items()):
+                    frame = frames.get(thread_id)
+                    if frame is not None and thread_id != own_id:
+                        profile.samples[_collapse(frame, role)] += 1
+                        profile.sample_count += 1
+            del frames
+            time.sleep(self.interval_seconds)
+
+    # --- REPORTING ---
+    def _recent(self, route: str) -> list[RequestProfile]:
+        cutoff = time.time() - self.window_seconds
+        with self._lock:
+            return [profile for profile in self._routes.get(route, ()) if profile.started_at >= cutoff]
+
+    def routes(self) -> list[dict]:
+        report = []
+        for route in sorted(self._routes):
+            profiles = self._recent(route)
+            if profiles:
+                durations = sorted(profile.duration_ms for profile in profiles)
+                report.append({
+                    "route": route,
+                    "requests": len(profiles),
+                    "samples": sum(profile.sample_count for profile in profiles),
+                    "median_ms": durations[len(durations) // 2],
+                    "max_ms": durations[-1]
+                })
+        return report
+
+    def collapsed(self, route: str) -> str:
+        """Brendan Gregg's collapsed-stack format: one "frame;frame;frame count" line per stack"""
+        totals: Counter[str] = Counter()
+        for profile in self._recent(route):
+            totals.update(profile.samples)
+        return "".join(f"{stack} {count}\n" for stack, count in totals.most_common())
+
+    def as_dict(self) -> dict:
+        return {
+            **self.metrics,
+            "in_flight": len(self._active),
+            "sample_rate": self.sample_rate,
+            "signed_trigger_enabled": self.secret is not None,
+            "interval_ms": self.interval_seconds * 1000,
+            "window_seconds": self.window_seconds,
+            "routes": self.routes()
+        }
+
+request_profiler = RequestProfiler(
+    settings.PROFILING_SECRET,
+    settings.PROFILING_SAMPLE_RATE,
+    settings.PROFILING_INTERVAL_MS,
+    settings.PROFILING_WINDOW_SECONDS,
+    settings.PROFILING_MAX_PROFILES_PER_ROUTE
+)
+
+@contextmanager
+def track_thread():
+    """Include the calling worker thread in the current request's profile, if there is one"""
+    profile = current_profile.get()
+    if profile is None:
+        yield
+        return
+    thread_id = threading.get_ident()
+    profile.threads[thread_id] = "worker"
+    try:
+        yield
+    finally:
+        profile.threads.pop(thread_id, None)
+
+class ProfilingMiddleware:
+    """ASGI middleware; untriggered requests pass straight through"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not request_profiler.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        profile = request_profiler.begin()
+        token = current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_profile.reset(token)
+            route = scope.get("route")
+            name = f"{scope['method']} {route.path}" if route is not None else "unmatched"
+            request_profiler.finish(profile, name, (time.perf_counter() - start) * 1000)
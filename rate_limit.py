@@ -0,0 +1,214 @@
+# rate_limit.py
+
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy import case, delete, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from config import settings
+from database import SessionLocal
+from models.rate_limit_models import RateLimitBucket
+
+logger = logging.getLogger(__name__)
+
+class RateLimited(HTTPException):
+    """A caller spent its bucket; the request is rejected with a 429 before any real work"""
+
+    def __init__(self, limit: str, retry_after_seconds: float):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, please retry later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after_seconds)))}
+        )
+        self.limit = limit
+
+def _refilled(tokens: float, updated_at: float, now: float, capacity: float, rate: float) -> float:
+    return min(capacity, tokens + max(0.0, now - updated_at) * rate)
+
+class MemoryBucketStore:
+    """
+    Token buckets for this worker, in a bounded LRU.
+
+    Each bucket is two floats, refilled lazily on access, so a check is
+    O(1). Evicting a bucket resets it to full, which only ever errs on the
+    side of letting a request through.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def take(self, key: str, capacity: float, rate: float) -> float:
+        """Spend one token; returns 0 when allowed, otherwise the seconds until a token is available"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [capacity, now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._buckets.move_to_end(key)
+            tokens = _refilled(bucket[0], bucket[1], now, capacity, rate)
+            bucket[1] = now
+            if tokens < 1:
+                bucket[0] = tokens
+                return (1 - tokens) / rate
+            bucket[0] = tokens - 1
+            return 0.0
+
+    def as_dict(self) -> dict:
+        return {"backend": self.name, "keys": len(self._buckets), "max_keys": self.max_keys, "evictions": self.evictions}
+
+class SQLBucketStore:
+    """
+    Token buckets in the rate_limit_buckets table, shared by every worker.
+
+    The refill and the spend are one conditional UPDATE, so concurrent
+    workers can't both take the last token. A missing row is created full
+    (minus the token being spent); losing that insert race means another
+    worker created it first, and the update is retried once.
+    """
+
+    name = "sql"
+
+    def __init__(self):
+        self.metrics = {"pruned": 0}
+
+    @staticmethod
+    def _digest(key: str) -> str:
+        return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+    def take(self, key: str, capacity: float, rate: float) -> float:
+        bucket_key = self._digest(key)
+        now = time.time()
+        refilled = RateLimitBucket.tokens + (now - RateLimitBucket.updated_at) * rate
+        tokens = case((refilled > capacity, capacity), else_=refilled)
+        db = SessionLocal()
+        try:
+            for attempt in range(2):
+                result = db.execute(
+                    update(RateLimitBucket)
+                    .where(RateLimitBucket.bucket_key == bucket_key, tokens >= 1)
+                    .values(tokens=tokens - 1, updated_at=now)
+                )
+                if result.rowcount:
+                    db.commit()
+                    return 0.0
+                current = db.execute(
+                    select(RateLimitBucket.tokens, RateLimitBucket.updated_at)
+                    .where(RateLimitBucket.bucket_key == bucket_key)
+                ).first()
+                if current is not None:
+                    db.rollback()
+                    return (1 - _refilled(current.tokens, current.updated_at, now, capacity, rate)) / rate
+                try:
+                    db.execute(insert(RateLimitBucket).values(bucket_key=bucket_key, tokens=capacity - 1, updated_at=now))
+                    db.commit()
+                    return 0.0
+                except IntegrityError:
+                    db.rollback()
+            return 0.0
+        finally:
+            db.close()
+
+    def prune(self, idle_seconds: float) -> int:
+        """Delete buckets idle long enough to have refilled completely; a missing bucket is a full one"""
+        db = SessionLocal()
+        try:
+            result = db.execute(delete(RateLimitBucket).where(RateLimitBucket.updated_at < time.time() - idle_seconds))
+            db.commit()
+        finally:
+            db.close()
+        self.metrics["pruned"] += result.rowcount
+        return result.rowcount
+
+    def as_dict(self) -> dict:
+        return {"backend": self.name, **self.metrics}
+
+class RateLimiter:
+    """
+    Named token-bucket limits, checked at the top of a handler.
+
+    `limits` maps a name to (burst, tokens per minute). A check spends one
+    token from each (limit, key) bucket in turn and raises RateLimited at the
+    first empty one. If the shared store is unavailable the check fails open:
+    a database outage shouldn't also lock everyone out of logging in.
+    """
+
+    def __init__(self, limits: dict[str, tuple[int, float]], store):
+        self.limits = {name: (float(burst), per_minute / 60) for name, (burst, per_minute) in limits.items()}
+        self.store = store
+        self.metrics = {name: {"allowed": 0, "rejected": 0} for name in self.limits}
+        self.store_errors = 0
+
+    def check(self, *checks: tuple[str, Optional[str]]) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        for name, key in checks:
+            if not key:
+                continue
+            capacity, rate = self.limits[name]
+            try:
+                wait_seconds = self.store.take(f"{name}:{key}", capacity, rate)
+            except SQLAlchemyError as e:
+                self.store_errors += 1
+                logger.warning(f"Rate limit store unavailable, allowing {name}: {e}")
+                continue
+            if wait_seconds > 0:
+                self.metrics[name]["rejected"] += 1
+                raise RateLimited(name, wait_seconds)
+            self.metrics[name]["allowed"] += 1
+
+    def refill_horizon_seconds(self) -> float:
+        """Longest time any bucket takes to refill from empty"""
+        return max((capacity / rate for capacity, rate in self.limits.values()), default=0.0)
+
+    def prune(self) -> int:
+        return self.store.prune(self.refill_horizon_seconds())
+
+    def as_dict(self) -> dict:
+        return {
+            "enabled": settings.RATE_LIMIT_ENABLED,
+            "store": self.store.as_dict(),
+            "store_errors": self.store_errors,
+            "rejected": sum(counts["rejected"] for counts in self.metrics.values()),
+            "limits": {
+                name: {"burst": capacity, "per_minute": round(rate * 60, 4), **self.metrics[name]}
+                for name, (capacity, rate) in self.limits.items()
+            }
+        }
+
+def client_address(request: Request) -> Optional[str]:
+    """
+    The caller's IP. Behind RATE_LIMIT_TRUSTED_PROXIES proxies it's the hop
+    the outermost one appended to X-Forwarded-For, counted from the right:
+    anything further left came from the client and can be forged.
+    """
+    proxies = settings.RATE_LIMIT_TRUSTED_PROXIES
+    if proxies > 0:
+        hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+        if len(hops) >= proxies:
+            return hops[-proxies]
+    return request.client.host if request.client else None
+
+def build_store():
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        return MemoryBucketStore(settings.RATE_LIMIT_MAX_KEYS)
+    if settings.RATE_LIMIT_BACKEND == "sql":
+        return SQLBucketStore()
+    raise ValueError(f"Unknown rate limit backend: {settings.RATE_LIMIT_BACKEND}")
+
+rate_limiter = RateLimiter(settings.RATE_LIMITS, build_store())
@@ -0,0 +1,119 @@
+# response_cache.py
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from fastapi import Response, status
+
+from config import settings
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for GET)"""
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+def version_token(version: Optional[int]) -> str:
+    return str(version) if version is not None else "0"
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+def json_response(body: bytes, etag: str) -> Response:
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+class CachedResponse:
+    __slots__ = ("version", "etag", "body")
+
+    def __init__(self, version: str, etag: str, body: bytes):
+        self.version = version
+        self.etag = etag
+        self.body = body
+
+class ResponseCache:
+    """
+    Serialized GET responses keyed by resource id, valid for one version.
+
+    A version is the row's version column, bumped by every UPDATE and read
+    with a one-column query, so an entry is only served while the row is
+    unchanged as far as writes made through the models go, whichever worker
+    made them. The ETag is derived from (key, version) and is the same on
+    every worker; mutating handlers also drop their local entries. Memory is
+    bounded by entry count and total body bytes, evicting least recently
+    used first.
+    """
+
+    def __init__(self, name: str, max_entries: int, max_bytes: int):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, CachedResponse] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.metrics = {"hits": 0, "misses": 0, "not_modified": 0, "invalidations": 0, "evictions": 0}
+
+    def etag(self, key: Hashable, version: str) -> str:
+        digest = hashlib.blake2b(f"{self.name}:{key}:{version}".encode(), digest_size=12).hexdigest()
+        return f'"{digest}"'
+
+    def get(self, key: Hashable, version: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                self.metrics["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.metrics["hits"] += 1
+            return entry
+
+    def put(self, key: Hashable, version: str, body: bytes) -> CachedResponse:
+        entry = CachedResponse(version, self.etag(key, version), body)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.body)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+                self.metrics["evictions"] += 1
+        return entry
+
+    def invalidate(self, *keys: Hashable) -> None:
+        with self._lock:
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._bytes -= len(entry.body)
+            self.metrics["invalidations"] += len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.metrics["invalidations"] += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+
+    def record_not_modified(self) -> None:
+        self.metrics["not_modified"] += 1
+
+    def as_dict(self) -> dict:
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hit_ratio": round(self.metrics["hits"] / lookups, 4) if lookups else None,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes
+        }
+
+order_response_cache = ResponseCache(
+    "order", settings.RESPONSE_CACHE_MAX_ENTRIES, settings.RESPONSE_CACHE_MAX_BYTES
+)
+agent_response_cache = ResponseCache(
+    "agent", settings.RESPONSE_CACHE_MAX_ENTRIES, settings.RESPONSE_CACHE_MAX_BYTES
+)
@@ -0,0 +1,187 @@
+# revocation.py
+
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models.auth_models import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+class BloomFilter:
+    """Set membership with no false negatives and about `error_rate` false positives at `capacity` items"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+class RevocationFilter:
+    """
+    Answers "is this token or session revoked?" without a query in the common case.
+
+    The revoked_tokens table is the source of truth. Each worker keeps a
+    Bloom filter of its live ids: a miss means "not revoked" with no database
+    access, and only a hit (a real revocation or a rare false positive) is
+    confirmed against the table. Revocations made here are added at once;
+    ones made by other workers arrive with the next sync, every
+    REVOCATION_SYNC_SECONDS. The filter is rebuilt from scratch every
+    REVOCATION_REBUILD_SECONDS, which drops expired ids (a Bloom filter can't
+    delete) and resizes it. Until the first load every check goes to the
+    table.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, overlap_seconds: float, rebuild_seconds: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self.rebuild_seconds = rebuild_seconds
+        self._bloom: Optional[BloomFilter] = None
+        self._cursor: Optional[datetime] = None  # newest revoked_at seen, as stored
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+        self.metrics = {
+            "checks": 0, "filter_negatives": 0, "store_checks": 0, "false_positives": 0, "revoked_hits": 0,
+            "revocations": 0, "syncs": 0, "rebuilds": 0, "pruned": 0
+        }
+
+    # --- CHECKS ---
+    def is_revoked(self, *token_ids: Optional[str]) -> bool:
+        self.metrics["checks"] += 1
+        bloom = self._bloom
+        candidates = [token_id for token_id in token_ids if token_id and (bloom is None or token_id in bloom)]
+        if not candidates:
+            self.metrics["filter_negatives"] += 1
+            return False
+        self.metrics["store_checks"] += 1
+        db = SessionLocal()
+        try:
+            revoked = db.execute(
+                select(RevokedToken.token_id).where(RevokedToken.token_id.in_(candidates)).limit(1)
+            ).first() is not None
+        finally:
+            db.close()
+        if revoked:
+            self.metrics["revoked_hits"] += 1
+        elif bloom is not None:
+            self.metrics["false_positives"] += 1
+        return revoked
+
+    # --- REVOCATION ---
+    def revoke(self, db: Session, token_id: str, kind: str, user_id: Optional[int], expires_at: datetime) -> bool:
+        """
+        Record a revocation and commit it. Returns False if `token_id` was
+        already revoked: for a refresh token's jti that means it was used
+        before, so rotation treats it as replayed.
+        """
+        db.add(RevokedToken(token_id=token_id, kind=kind, user_id=user_id, expires_at=expires_at))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return False
+        self._remember(token_id)
+        self.metrics["revocations"] += 1
+        return True
+
+    def _remember(self, token_id: str) -> None:
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(token_id)
+
+    # --- SYNC ---
+    def rebuild(self) -> int:
+        """Prune expired rows and load every live id into a fresh, right-sized filter"""
+        now = datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            pruned = db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now)).rowcount
+            db.commit()
+            live = db.execute(select(func.count()).select_from(RevokedToken)).scalar_one()
+            bloom = BloomFilter(max(self.capacity, live * 2), self.error_rate)
+            cursor = None
+            for token_id, revoked_at in db.execute(select(RevokedToken.token_id, RevokedToken.revoked_at)):
+                bloom.add(token_id)
+                cursor = revoked_at if cursor is None or revoked_at > cursor else cursor
+        finally:
+            db.close()
+        with self._lock:
+            self._bloom = bloom
+            self._cursor = cursor
+            self._built_at = time.monotonic()
+        self.metrics["rebuilds"] += 1
+        self.metrics["pruned"] += pruned
+        logger.info(f"Revocation filter rebuilt with {bloom.count} ids ({len(bloom.bits) // 1024} KiB), pruned {pruned}")
+        return bloom.count
+
+    def sync(self) -> int:
+        """Periodic job: pick up revocations made by other workers, rebuilding when due"""
+        if self._bloom is None or time.monotonic() - self._built_at >= self.rebuild_seconds:
+            return self.rebuild()
+        query = select(RevokedToken.token_id, RevokedToken.revoked_at)
+        if self._cursor is not None:
+            # Overlap the window so rows committed slightly out of order aren't skipped
+            query = query.where(RevokedToken.revoked_at >= self._cursor - self.overlap)
+        db = SessionLocal()
+        try:
+            rows = db.execute(query).all()
+        finally:
+            db.close()
+        with self._lock:
+            for token_id, revoked_at in rows:
+                self._bloom.add(token_id)
+                if self._cursor is None or revoked_at > self._cursor:
+                    self._cursor = revoked_at
+        self.metrics["syncs"] += 1
+        return len(rows)
+
+    def as_dict(self) -> dict:
+        bloom = self._bloom
+        checks = self.metrics["checks"]
+        return {
+            "enabled": settings.REVOCATION_ENABLED,
+            "loaded": bloom is not None,
+            "ids": bloom.count if bloom is not None else None,
+            "filter_capacity": bloom.capacity if bloom is not None else None,
+            "filter_bytes": len(bloom.bits) if bloom is not None else None,
+            "hash_functions": bloom.hashes if bloom is not None else None,
+            "seconds_since_rebuild": round(time.monotonic() - self._built_at, 1) if bloom is not None else None,
+            **self.metrics,
+            "store_check_ratio": round(self.metrics["store_checks"] / checks, 4) if checks else None
+        }
+
+revocation_filter = RevocationFilter(
+    settings.REVOCATION_FILTER_CAPACITY,
+    settings.REVOCATION_FILTER_ERROR_RATE,
+    settings.REVOCATION_SYNC_OVERLAP_SECONDS,
+    settings.REVOCATION_REBUILD_SECONDS
+)
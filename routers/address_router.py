@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from sqlalchemy.orm import Session
-from models.auth_models import User
 from models.address_models import Address
 from schemas.address_schemas import AddressCreate, AddressUpdate, AddressResponse
 import auth
-from database import get_db
+from address_cache import address_cache
+from executors import offload
+from response_cache import etag_matches, json_response, not_modified
+from database import get_db, get_read_db
+from geocoding import address_geocoder
 
 router = APIRouter(
     prefix="/api/addresses",
@@ -12,6 +16,7 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=AddressResponse, status_code=status.HTTP_201_CREATED)
+@offload("io")
 def create_address_for_current_user(
     address: AddressCreate,
     db: Session = Depends(get_db),
@@ -20,35 +25,39 @@ def create_address_for_current_user(
     """
     Create a new address for the currently authenticated user.
     """
-    phone_number = current_user.get("phone_number")
-    user = db.query(User).filter(User.phone_number == phone_number).first()
-    
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-
-    db_address = Address(**address.model_dump(), owner_id=user.id)
+    db_address = Address(**address.model_dump(), owner_id=current_user["user_id"])
+    address_geocoder.apply(db_address)
     db.add(db_address)
     db.commit()
+    address_cache.invalidate(db_address.owner_id)
     db.refresh(db_address)
     return db_address
 
 @router.get("/", response_model=list[AddressResponse])
+@offload("io")
 def get_addresses_for_current_user(
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(auth.get_current_user)
+    db: Session = Depends(get_read_db),
+    user_id: int = Depends(auth.get_current_user_id),
+    if_none_match: Optional[str] = Header(None)
 ):
     """
     Get all addresses belonging to the currently authenticated user.
+
+    Served from the per-user address cache with an ETag; a matching
+    If-None-Match gets a 304 without a database round trip.
     """
-    phone_number = current_user.get("phone_number")
-    user = db.query(User).filter(User.phone_number == phone_number).first()
-    
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    cached_etag = address_cache.peek_etag(user_id)
+    if cached_etag is not None and etag_matches(if_none_match, cached_etag):
+        address_cache.record_not_modified()
+        return not_modified(cached_etag)
 
-    return db.query(Address).filter(Address.owner_id == user.id).all()
+    book = address_cache.get(user_id, db)
+    if etag_matches(if_none_match, book.etag):
+        return not_modified(book.etag)
+    return json_response(book.body, book.etag)
 
 @router.put("/{address_id}", response_model=AddressResponse)
+@offload("io")
 def update_user_address(
     address_id: int,
     update_data: AddressUpdate,
@@ -58,22 +67,24 @@ def update_user_address(
     """
     Update an address belonging to the currently authenticated user.
     """
-    phone_number = current_user.get("phone_number")
-    user = db.query(User).filter(User.phone_number == phone_number).first()
-    
     address = db.query(Address).filter(Address.id == address_id).first()
 
-    if not address or address.owner_id != user.id:
+    if not address or address.owner_id != current_user["user_id"]:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Address not found")
 
-    for key, value in update_data.model_dump(exclude_unset=True).items():
+    changes = update_data.model_dump(exclude_unset=True)
+    for key, value in changes.items():
         setattr(address, key, value)
+    if changes.keys() & {"pincode", "town_city", "state", "area_street_sector", "country"}:
+        address_geocoder.apply(address)
 
     db.commit()
+    address_cache.invalidate(address.owner_id)
     db.refresh(address)
     return address
 
 @router.delete("/{address_id}", status_code=status.HTTP_204_NO_CONTENT)
+@offload("io")
 def delete_user_address(
     address_id: int,
     db: Session = Depends(get_db),
@@ -82,14 +93,13 @@ def delete_user_address(
     """
     Delete an address belonging to the currently authenticated user.
     """
-    phone_number = current_user.get("phone_number")
-    user = db.query(User).filter(User.phone_number == phone_number).first()
-
     address = db.query(Address).filter(Address.id == address_id).first()
 
-    if not address or address.owner_id != user.id:
+    if not address or address.owner_id != current_user["user_id"]:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Address not found")
         
+    owner_id = address.owner_id
     db.delete(address)
     db.commit()
+    address_cache.invalidate(owner_id)
     return None
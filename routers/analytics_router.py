@@ -0,0 +1,78 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+# Import local modules
+from schemas.analytics_schemas import (
+    DeliverySummaryResponse, AgentStatsResponse, PincodeStatsResponse, HourlyStatsResponse
+)
+import analytics
+import auth
+from database import get_read_db
+from executors import offload
+
+router = APIRouter(
+    prefix="/api/analytics",
+    tags=["Analytics"]
+)
+
+def resolve_range(start: Optional[datetime], end: Optional[datetime]) -> tuple[datetime, datetime]:
+    """Default to the last 24 hours; naive datetimes are taken as UTC"""
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(hours=24)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    if start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+    return start, end
+
+@router.get("/summary", response_model=DeliverySummaryResponse)
+@offload("io")
+def get_delivery_summary(
+    start: Optional[datetime] = Query(None, description="Range start (default: 24 hours before end)"),
+    end: Optional[datetime] = Query(None, description="Range end (default: now)"),
+    db: Session = Depends(get_read_db),
+    current_user: dict = Depends(auth.get_current_user)
+):
+    """On-time rate, average delivery duration and order counts over a time range"""
+    start, end = resolve_range(start, end)
+    return DeliverySummaryResponse(start=start, end=end, **analytics.summarize(db, start, end))
+
+@router.get("/agents", response_model=AgentStatsResponse)
+@offload("io")
+def get_agent_stats(
+    start: Optional[datetime] = Query(None, description="Range start (default: 24 hours before end)"),
+    end: Optional[datetime] = Query(None, description="Range end (default: now)"),
+    db: Session = Depends(get_read_db),
+    current_user: dict = Depends(auth.get_current_user)
+):
+    """Delivery performance per delivery agent"""
+    start, end = resolve_range(start, end)
+    return AgentStatsResponse(start=start, end=end, agents=analytics.stats_by_agent(db, start, end))
+
+@router.get("/pincodes", response_model=PincodeStatsResponse)
+@offload("io")
+def get_pincode_stats(
+    start: Optional[datetime] = Query(None, description="Range start (default: 24 hours before end)"),
+    end: Optional[datetime] = Query(None, description="Range end (default: now)"),
+    db: Session = Depends(get_read_db),
+    current_user: dict = Depends(auth.get_current_user)
+):
+    """Delivery performance per delivery pincode"""
+    start, end = resolve_range(start, end)
+    return PincodeStatsResponse(start=start, end=end, pincodes=analytics.stats_by_pincode(db, start, end))
+
+@router.get("/hourly", response_model=HourlyStatsResponse)
+@offload("io")
+def get_hourly_stats(
+    start: Optional[datetime] = Query(None, description="Range start (default: 24 hours before end)"),
+    end: Optional[datetime] = Query(None, description="Range end (default: now)"),
+    db: Session = Depends(get_read_db),
+    current_user: dict = Depends(auth.get_current_user)
+):
+    """Hourly delivery performance and backlog trend"""
+    start, end = resolve_range(start, end)
+    return HourlyStatsResponse(start=start, end=end, hours=analytics.stats_by_hour(db, start, end))
@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, security, status
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, timezone
 import auth
 from models.auth_models import User, OTP
 from schemas.auth_schemas import OTPRequest, OTPVerifyRequest, AuthResponse
 from database import get_db
+from executors import cpu_pool, offload
+from rate_limit import client_address, rate_limiter
+from revocation import revocation_filter
 from sms_service import sms_service
 from config import settings
-from security import create_access_token, create_refresh_token
+from security import create_access_token, create_refresh_token, decode_refresh_token, new_session_id
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/api/auth",
@@ -15,12 +21,17 @@ router = APIRouter(
 )
 
 @router.post("/send-otp", status_code=status.HTTP_200_OK)
-async def send_otp(request: OTPRequest, db: Session = Depends(get_db)):
+@offload("io")
+def send_otp(request: OTPRequest, http_request: Request, db: Session = Depends(get_db)):
     """Send OTP to phone number"""
+    rate_limiter.check(
+        ("send_otp_phone", request.phone_number),
+        ("send_otp_client", client_address(http_request))
+    )
     
     # Generate OTP
     otp_code = auth.generate_otp()
-    hashed_otp = auth.hash_otp(otp_code)
+    hashed_otp = cpu_pool.call(auth.hash_otp, otp_code)
     
     # Calculate expiry time
     expire_time = datetime.now(timezone.utc) + timedelta(minutes=settings.OTP_EXPIRE_MINUTES)
@@ -46,8 +57,13 @@ async def send_otp(request: OTPRequest, db: Session = Depends(get_db)):
     return {"message": "OTP sent successfully", "expires_in_minutes": settings.OTP_EXPIRE_MINUTES}
 
 @router.post("/verify-otp", response_model=AuthResponse)
-async def verify_otp(request: OTPVerifyRequest, db: Session = Depends(get_db)):
+@offload("io")
+def verify_otp(request: OTPVerifyRequest, http_request: Request, db: Session = Depends(get_db)):
     """Verify OTP and return JWT tokens"""
+    rate_limiter.check(
+        ("verify_otp_phone", request.phone_number),
+        ("verify_otp_client", client_address(http_request))
+    )
     
     # Find the most recent valid OTP for this phone number
     otp_record = db.query(OTP).filter(
@@ -63,7 +79,7 @@ async def verify_otp(request: OTPVerifyRequest, db: Session = Depends(get_db)):
         )
     
     # Verify OTP
-    if not auth.verify_otp(request.otp, otp_record.hashed_otp):
+    if not cpu_pool.call(auth.verify_otp, request.otp, otp_record.hashed_otp):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid OTP"
@@ -88,9 +104,10 @@ async def verify_otp(request: OTPVerifyRequest, db: Session = Depends(get_db)):
     
     db.commit()
     
-    # Generate JWT tokens
-    access_token = create_access_token(data={"sub": str(user.id)})
-    refresh_token = create_refresh_token(data={"sub": str(user.id)})
+    # Generate JWT tokens for a new session
+    claims = {"sub": str(user.id), "sid": new_session_id()}
+    access_token = cpu_pool.call(create_access_token, data=claims)
+    refresh_token = cpu_pool.call(create_refresh_token, data=claims)
     
     return AuthResponse(
         access_token=access_token,
@@ -102,31 +119,58 @@ async def verify_otp(request: OTPVerifyRequest, db: Session = Depends(get_db)):
     )
 
 @router.post("/refresh-token", response_model=dict)
-async def refresh_access_token(refresh_token: str, db: Session = Depends(get_db)):
-    """Refresh access token using refresh token"""
+@offload("io")
+def refresh_access_token(refresh_token: str, http_request: Request, db: Session = Depends(get_db)):
+    """
+    Exchange a refresh token for a new access token and a new refresh token.
+
+    Each refresh token works once. Presenting one that was already exchanged
+    means it was copied, so the whole session is revoked.
+    """
+    rate_limiter.check(("refresh_token_client", client_address(http_request)))
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        from jose import jwt, JWTError
-        payload = jwt.decode(refresh_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
+    payload = decode_refresh_token(refresh_token, credentials_exception)
+    if revocation_filter.is_revoked(payload["sid"]):
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    user = db.query(User).filter(User.id == int(payload["sub"])).first()
     if user is None:
         raise credentials_exception
     
-    # Generate new access token
-    access_token = security.create_access_token(data={"sub": str(user.id)})
+    # Claim the presented token; only one exchange can win
+    expires_at = datetime.fromtimestamp(payload["exp"], timezone.utc)
+    if not revocation_filter.revoke(db, payload["jti"], "token", user.id, expires_at):
+        session_expires_at = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        revocation_filter.revoke(db, payload["sid"], "session", user.id, session_expires_at)
+        logger.warning(f"Refresh token reuse for user {user.id}; session {payload['sid']} revoked")
+        raise credentials_exception
+    
+    # Generate new tokens in the same session
+    claims = {"sub": str(user.id), "sid": payload["sid"]}
+    access_token = cpu_pool.call(create_access_token, data=claims)
+    new_refresh_token = cpu_pool.call(create_refresh_token, data=claims)
     
     return {
         "access_token": access_token,
+        "refresh_token": new_refresh_token,
         "token_type": "bearer"
-    }
\ No newline at end of file
+    }
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+@offload("io")
+def logout(refresh_token: str, db: Session = Depends(get_db)):
+    """Revoke the session: its refresh token and every access token issued in it stop working"""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    payload = decode_refresh_token(refresh_token, credentials_exception)
+    session_expires_at = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    revocation_filter.revoke(db, payload["sid"], "session", int(payload["sub"]), session_expires_at)
@@ -1,7 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, UploadFile, File
+from pydantic import ValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Iterator, List, Optional
+import codecs
+import csv
+import json
 
 # Import local modules
 from models.delivery_models import DeliveryAgent, DeliveryAgentStatus
@@ -10,11 +16,22 @@ from models.auth_models import User
 from schemas.delivery_schemas import (
     DeliveryAgentCreate, DeliveryAgentUpdate, DeliveryAgentResponse,
     DeliveryAgentListResponse, LocationUpdate, DeliveryAssignment,
-    DeliveryStatusUpdate
+    DeliveryStatusUpdate, DeliveryAgentBatchCreate, DeliveryAgentBatchResult,
+    BatchRowError, AgentStatusBatchUpdate, AgentStatusBatchResult
 )
 import auth
-from database import get_db
-from sms_service import sms_service
+from config import settings
+from database import get_db, get_read_db
+from dispatch import assign_agent
+from executors import offload
+from order_state import transition_order
+from outbox import enqueue_event, DELIVERY_STATUS_CHANGED
+from serialization import AGENT_LIST, FastJSONResponse
+import status_counters
+from response_cache import (
+    agent_response_cache, etag_matches, json_response, not_modified, order_response_cache, version_token
+)
+from zones import zone_map
 
 router = APIRouter(
     prefix="/api/delivery",
@@ -22,7 +39,8 @@ router = APIRouter(
 )
 
 @router.post("/agents", response_model=DeliveryAgentResponse, status_code=status.HTTP_201_CREATED)
-async def create_delivery_agent(
+@offload("io")
+def create_delivery_agent(
     agent_data: DeliveryAgentCreate,
     db: Session = Depends(get_db),
     current_user: dict = Depends(auth.get_current_user)
@@ -41,17 +59,216 @@ async def create_delivery_agent(
     
     db_agent = DeliveryAgent(**agent_data.model_dump())
     db.add(db_agent)
+    status_counters.record(db, status_counters.AGENT, {DeliveryAgentStatus.OFFLINE: 1})
     db.commit()
     db.refresh(db_agent)
     
     return db_agent
 
+# --- BULK FLEET MANAGEMENT ---
+AGENT_IMPORT_FIELDS = ("name", "phone", "email", "vehicle_type", "vehicle_number", "max_active_orders")
+
+class BatchErrors:
+    """Collects per-row errors, keeping at most `limit` of them"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.count = 0
+        self.items: list[BatchRowError] = []
+
+    def add(self, row: int, errors: list[str], phone: Optional[str] = None) -> None:
+        self.count += 1
+        if len(self.items) < self.limit:
+            self.items.append(BatchRowError(row=row, phone=phone, errors=errors))
+
+def validate_agent_row(row_number: int, data: dict, errors: BatchErrors) -> Optional[DeliveryAgentCreate]:
+    try:
+        return DeliveryAgentCreate.model_validate(data)
+    except ValidationError as e:
+        errors.add(row_number, [
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+        ], phone=data.get("phone") if isinstance(data, dict) else None)
+        return None
+
+def insert_agent_chunk(db: Session, rows: list[tuple[int, DeliveryAgentCreate]], errors: BatchErrors) -> list[str]:
+    """
+    Insert one chunk of validated agents with a single duplicate-phone query and
+    a single executemany INSERT. Returns the phone numbers that were created.
+    """
+    phones = [agent.phone for _, agent in rows]
+    existing = {phone for (phone,) in db.query(DeliveryAgent.phone).filter(DeliveryAgent.phone.in_(phones))}
+
+    seen = set()
+    accepted = []
+    for row_number, agent in rows:
+        if agent.phone in existing:
+            errors.add(row_number, ["Delivery agent with this phone number already exists"], phone=agent.phone)
+        elif agent.phone in seen:
+            errors.add(row_number, ["Duplicate phone number in this upload"], phone=agent.phone)
+        else:
+            seen.add(agent.phone)
+            accepted.append((row_number, agent))
+    if not accepted:
+        return []
+
+    try:
+        db.execute(insert(DeliveryAgent), [agent.model_dump() for _, agent in accepted])
+        status_counters.record(db, status_counters.AGENT, {DeliveryAgentStatus.OFFLINE: len(accepted)})
+        db.commit()
+        return [agent.phone for _, agent in accepted]
+    except IntegrityError:
+        # A concurrent writer took one of these phones; retry row by row to attribute it
+        db.rollback()
+
+    created = []
+    for row_number, agent in accepted:
+        try:
+            db.execute(insert(DeliveryAgent), [agent.model_dump()])
+            status_counters.record(db, status_counters.AGENT, {DeliveryAgentStatus.OFFLINE: 1})
+            db.commit()
+            created.append(agent.phone)
+        except IntegrityError:
+            db.rollback()
+            errors.add(row_number, ["Delivery agent with this phone number already exists"], phone=agent.phone)
+    return created
+
+def iter_import_rows(upload: UploadFile, file_format: str) -> Iterator[tuple[int, object]]:
+    """Yield (line number, row) from an uploaded CSV or NDJSON file, one line at a time"""
+    lines = codecs.iterdecode(upload.file, "utf-8-sig")
+    if file_format == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, {
+                field: (value.strip() or None) if isinstance(value, str) else value
+                for field, value in row.items() if field in AGENT_IMPORT_FIELDS
+            }
+        return
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, e
+
+@router.post("/agents/bulk", response_model=DeliveryAgentBatchResult, status_code=status.HTTP_201_CREATED)
+@offload("io")
+def create_delivery_agents_bulk(
+    batch: DeliveryAgentBatchCreate,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(auth.get_current_user)
+):
+    """Create many delivery agents at once; invalid or duplicate rows are reported, not fatal"""
+    errors = BatchErrors(settings.AGENT_IMPORT_MAX_REPORTED_ERRORS)
+    validated = []
+    for row_number, data in enumerate(batch.agents, start=1):
+        agent = validate_agent_row(row_number, data, errors)
+        if agent is not None:
+            validated.append((row_number, agent))
+
+    created_phones = insert_agent_chunk(db, validated, errors) if validated else []
+    agents = db.query(DeliveryAgent).filter(DeliveryAgent.phone.in_(created_phones)).all() if created_phones else []
+
+    return DeliveryAgentBatchResult(
+        created=len(created_phones),
+        failed=errors.count,
+        errors=errors.items,
+        errors_truncated=errors.count > len(errors.items),
+        agents=agents
+    )
+
+@router.post("/agents/import", response_model=DeliveryAgentBatchResult)
+@offload("io")
+def import_delivery_agents(
+    file: UploadFile = File(..., description="CSV with a header row, or NDJSON (one agent per line)"),
+    file_format: Optional[str] = Query(None, description="csv or ndjson (default: from the file name)"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(auth.get_current_user)
+):
+    """
+    Stream a CSV/NDJSON file of agents into the database in chunks.
+
+    Rows are read one line at a time, validated with DeliveryAgentCreate and
+    inserted every AGENT_IMPORT_CHUNK_SIZE rows, so memory stays flat for
+    large files. Each chunk is committed on its own.
+    """
+    file_format = (file_format or ("ndjson" if (file.filename or "").endswith((".ndjson", ".jsonl")) else "csv")).lower()
+    if file_format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="file_format must be csv or ndjson")
+
+    errors = BatchErrors(settings.AGENT_IMPORT_MAX_REPORTED_ERRORS)
+    created = 0
+    chunk: list[tuple[int, DeliveryAgentCreate]] = []
+    try:
+        for row_number, data in iter_import_rows(file, file_format):
+            if isinstance(data, Exception):
+                errors.add(row_number, [f"Invalid JSON: {data}"])
+                continue
+            if not isinstance(data, dict):
+                errors.add(row_number, ["Row must be an object"])
+                continue
+            agent = validate_agent_row(row_number, data, errors)
+            if agent is not None:
+                chunk.append((row_number, agent))
+            if len(chunk) >= settings.AGENT_IMPORT_CHUNK_SIZE:
+                created += len(insert_agent_chunk(db, chunk, errors))
+                chunk = []
+        if chunk:
+            created += len(insert_agent_chunk(db, chunk, errors))
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not read file after {created} agents were imported: {e}"
+        )
+
+    return DeliveryAgentBatchResult(
+        created=created,
+        failed=errors.count,
+        errors=errors.items,
+        errors_truncated=errors.count > len(errors.items)
+    )
+
+@router.post("/agents/status/bulk", response_model=AgentStatusBatchResult)
+@offload("io")
+def update_agent_status_bulk(
+    status_update: AgentStatusBatchUpdate,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(auth.get_current_user)
+):
+    """Change the status of many agents with set-based UPDATEs (e.g. everyone OFFLINE at shift end)"""
+    new_status = DeliveryAgentStatus(status_update.status.value)
+    stmt = update(DeliveryAgent).where(DeliveryAgent.is_active == True)
+    if status_update.agent_ids is not None:
+        stmt = stmt.where(DeliveryAgent.id.in_(status_update.agent_ids))
+    stmt = stmt.values(current_status=new_status, updated_at=datetime.now(timezone.utc)).execution_options(synchronize_session=False)
+    if status_update.from_status is not None:
+        sources = [DeliveryAgentStatus(status_update.from_status.value)]
+    else:
+        sources = [agent_status for agent_status in DeliveryAgentStatus if agent_status != new_status]
+
+    # One UPDATE per source status (at most two), so the status counters get exact deltas
+    updated = 0
+    for source in sources:
+        if source == new_status:
+            continue
+        moved = db.execute(stmt.where(DeliveryAgent.current_status == source)).rowcount
+        status_counters.record_transition(db, status_counters.AGENT, source, new_status, moved)
+        updated += moved
+    db.commit()
+    if status_update.agent_ids is not None:
+        agent_response_cache.invalidate(*status_update.agent_ids)
+    else:
+        agent_response_cache.clear()
+
+    return AgentStatusBatchResult(updated=updated, status=status_update.status)
+
 @router.get("/agents", response_model=DeliveryAgentListResponse)
-async def get_delivery_agents(
+@offload("io")
+def get_delivery_agents(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(10, ge=1, le=100, description="Items per page"),
     status_filter: Optional[str] = Query(None, description="Filter by agent status"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: dict = Depends(auth.get_current_user)
 ):
     """Get list of delivery agents with pagination and filtering"""
@@ -72,32 +289,70 @@ async def get_delivery_agents(
     # Apply pagination
     agents = query.order_by(DeliveryAgent.created_at.desc()).offset((page - 1) * size).limit(size).all()
     
-    return DeliveryAgentListResponse(
-        delivery_agents=agents,
-        total=total,
-        page=page,
-        size=size
-    )
+    return FastJSONResponse({
+        "delivery_agents": AGENT_LIST.validate_python(agents, from_attributes=True),
+        "total": total,
+        "page": page,
+        "size": size
+    })
 
 @router.get("/agents/{agent_id}", response_model=DeliveryAgentResponse)
-async def get_delivery_agent(
+@offload("io")
+def get_delivery_agent(
     agent_id: int,
     db: Session = Depends(get_db),
-    current_user: dict = Depends(auth.get_current_user)
+    user_id: int = Depends(auth.get_current_user_id),
+    if_none_match: Optional[str] = Header(None)
 ):
-    """Get details of a specific delivery agent"""
-    agent = db.query(DeliveryAgent).filter(
-        DeliveryAgent.id == agent_id,
-        DeliveryAgent.is_active == True
+    """Get details of a specific delivery agent (304 / response cache while its version is unchanged)"""
+    version_row = db.execute(
+        select(DeliveryAgent.version).where(DeliveryAgent.id == agent_id, DeliveryAgent.is_active == True)
     ).first()
     
-    if not agent:
+    if version_row is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Delivery agent not found")
     
-    return agent
+    version = version_token(version_row.version)
+    etag = agent_response_cache.etag(agent_id, version)
+    if etag_matches(if_none_match, etag):
+        agent_response_cache.record_not_modified()
+        return not_modified(etag)
+    
+    cached = agent_response_cache.get(agent_id, version)
+    if cached is None:
+        agent = db.query(DeliveryAgent).filter(
+            DeliveryAgent.id == agent_id,
+            DeliveryAgent.is_active == True
+        ).first()
+        if not agent:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Delivery agent not found")
+        body = DeliveryAgentResponse.model_validate(agent).model_dump_json().encode()
+        cached = agent_response_cache.put(agent_id, version_token(agent.version), body)
+    return json_response(cached.body, cached.etag)
+
+def set_agent_status(db: Session, agent: DeliveryAgent, new_status: DeliveryAgentStatus, now: datetime) -> None:
+    """
+    Move an agent from the status it was read in with a guarded UPDATE
+    (WHERE current_status = :old), so the status counters only count a move
+    that happened; 409 if another request changed the status first.
+    """
+    old_status = agent.current_status
+    if old_status == new_status:
+        return
+    moved = db.execute(
+        update(DeliveryAgent)
+        .where(DeliveryAgent.id == agent.id, DeliveryAgent.current_status == old_status)
+        .values(current_status=new_status, updated_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not moved:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Delivery agent status was changed by another request")
+    status_counters.record_transition(db, status_counters.AGENT, old_status, new_status)
+    db.expire(agent, ["current_status", "updated_at", "version"])
 
 @router.patch("/agents/{agent_id}", response_model=DeliveryAgentResponse)
-async def update_delivery_agent(
+@offload("io")
+def update_delivery_agent(
     agent_id: int,
     agent_update: DeliveryAgentUpdate,
     db: Session = Depends(get_db),
@@ -112,21 +367,28 @@ async def update_delivery_agent(
     if not agent:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Delivery agent not found")
     
-    # Update agent fields
+    # Update agent fields; the status goes through its own guarded UPDATE first
     update_data = agent_update.model_dump(exclude_unset=True)
+    new_status = update_data.pop("current_status", None)
+    if new_status is not None:
+        set_agent_status(db, agent, DeliveryAgentStatus(new_status.value), datetime.now(timezone.utc))
     for field, value in update_data.items():
         setattr(agent, field, value)
+    if "current_latitude" in update_data or "current_longitude" in update_data:
+        agent.zone = zone_map.zone_for_position(agent.current_latitude, agent.current_longitude)
     
     # Update timestamp
     agent.updated_at = datetime.now(timezone.utc)
     
     db.commit()
+    agent_response_cache.invalidate(agent_id)
     db.refresh(agent)
     
     return agent
 
 @router.post("/agents/{agent_id}/location", response_model=DeliveryAgentResponse)
-async def update_agent_location(
+@offload("io")
+def update_agent_location(
     agent_id: int,
     location: LocationUpdate,
     db: Session = Depends(get_db),
@@ -145,15 +407,18 @@ async def update_agent_location(
     agent.current_latitude = location.latitude
     agent.current_longitude = location.longitude
     agent.last_location_update = datetime.now(timezone.utc)
+    agent.zone = zone_map.zone_for_position(location.latitude, location.longitude)
     agent.updated_at = datetime.now(timezone.utc)
     
     db.commit()
+    agent_response_cache.invalidate(agent_id)
     db.refresh(agent)
     
     return agent
 
 @router.post("/agents/{agent_id}/status", response_model=DeliveryAgentResponse)
-async def update_agent_status(
+@offload("io")
+def update_agent_status(
     agent_id: int,
     status_update: dict,
     db: Session = Depends(get_db),
@@ -177,16 +442,17 @@ async def update_agent_status(
     except ValueError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid status")
     
-    agent.current_status = agent_status
-    agent.updated_at = datetime.now(timezone.utc)
+    set_agent_status(db, agent, agent_status, datetime.now(timezone.utc))
     
     db.commit()
+    agent_response_cache.invalidate(agent_id)
     db.refresh(agent)
     
     return agent
 
 @router.post("/assign", response_model=dict)
-async def assign_delivery_agent(
+@offload("io")
+def assign_delivery_agent(
     assignment: DeliveryAssignment,
     db: Session = Depends(get_db),
     current_user: dict = Depends(auth.get_current_user)
@@ -197,13 +463,6 @@ async def assign_delivery_agent(
     if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
     
-    # Check if order is in a state that can be assigned
-    if order.status not in [OrderStatus.CONFIRMED, OrderStatus.PENDING]:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Order cannot be assigned at this stage"
-        )
-    
     # Get the delivery agent
     agent = db.query(DeliveryAgent).filter(
         DeliveryAgent.id == assignment.delivery_agent_id,
@@ -213,41 +472,14 @@ async def assign_delivery_agent(
     if not agent:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Delivery agent not found")
     
-    # Check if agent is available
-    if agent.current_status != DeliveryAgentStatus.AVAILABLE:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Delivery agent is not available"
-        )
-    
-    # Assign the agent to the order
-    order.delivery_agent_id = assignment.delivery_agent_id
-    order.status = OrderStatus.DISPATCHED
-    order.updated_at = datetime.now(timezone.utc)
-    
-    # Update agent status
-    agent.current_status = DeliveryAgentStatus.ASSIGNED
-    agent.updated_at = datetime.now(timezone.utc)
+    # Assign the agent to the order and queue SMS notifications in the same transaction
+    # (409 if the agent is offline or full, or the order is no longer pending/confirmed
+    # or was assigned concurrently)
+    order = assign_agent(db, order, agent)
     
     db.commit()
-    
-    # Send SMS notifications
-    # Notify delivery agent
-    sms_service.send_delivery_assignment_sms(
-        agent_phone=agent.phone,
-        order_id=order.id,
-        order_number=order.order_number
-    )
-    
-    # Notify customer
-    customer = db.query(User).filter(User.id == order.customer_id).first()
-    if customer:
-        sms_service.send_delivery_update_sms(
-            customer_phone=customer.phone_number,
-            order_id=order.id,
-            status="dispatched",
-            order_number=order.order_number
-        )
+    order_response_cache.invalidate(order.id)
+    agent_response_cache.invalidate(agent.id)
     
     return {
         "message": "Delivery agent assigned successfully",
@@ -257,49 +489,39 @@ async def assign_delivery_agent(
     }
 
 @router.post("/orders/{order_id}/status", response_model=dict)
-async def update_delivery_status(
+@offload("io")
+def update_delivery_status(
     order_id: str,
     status_update: DeliveryStatusUpdate,
     db: Session = Depends(get_db),
     current_user: dict = Depends(auth.get_current_user)
 ):
     """Update delivery status of an order"""
-    order = db.query(Order).filter(Order.id == order_id).first()
-    if not order:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
-    
-    # Store old status for SMS notification
-    old_status = order.status
-    
-    # Update order status
-    order.status = status_update.status
+    new_status = OrderStatus(status_update.status.value)
+    if new_status == OrderStatus.DISPATCHED:
+        # Dispatching claims a slot on the agent; only assign_agent does that
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Use POST /api/delivery/assign to dispatch an order")
+    values = {}
     if status_update.estimated_delivery_time:
-        order.estimated_delivery_time = status_update.estimated_delivery_time
-    
-    # Set actual delivery time if status is delivered
-    if status_update.status == OrderStatus.DELIVERED:
-        order.actual_delivery_time = datetime.now(timezone.utc)
+        values["estimated_delivery_time"] = status_update.estimated_delivery_time
     
-    order.updated_at = datetime.now(timezone.utc)
+    # One conditional UPDATE: 409 if the order's current status doesn't allow this move
+    order = transition_order(db, order_id, new_status, values=values)
     
-    # If order is delivered, make agent available again
-    if status_update.status == OrderStatus.DELIVERED and order.delivery_agent_id:
-        agent = db.query(DeliveryAgent).filter(DeliveryAgent.id == order.delivery_agent_id).first()
-        if agent:
-            agent.current_status = DeliveryAgentStatus.AVAILABLE
-            agent.updated_at = datetime.now(timezone.utc)
+    # Queue SMS notification in the same transaction
+    customer = db.query(User).filter(User.id == order.customer_id).first()
+    if customer:
+        enqueue_event(db, order.id, DELIVERY_STATUS_CHANGED, {
+            "to": customer.phone_number,
+            "status": new_status.value,
+            "order_number": order.order_number
+        })
     
+    agent_id = order.delivery_agent_id
     db.commit()
-    
-    # Send SMS notifications
-    customer = db.query(User).filter(User.id == order.customer_id).first()
-    if customer and status_update.status != old_status:
-        sms_service.send_delivery_update_sms(
-            customer_phone=customer.phone_number,
-            order_id=order.id,
-            status=status_update.status.value,
-            order_number=order.order_number
-        )
+    order_response_cache.invalidate(order_id)
+    if agent_id is not None:
+        agent_response_cache.invalidate(agent_id)
     
     return {
         "message": "Delivery status updated successfully",
@@ -308,8 +530,9 @@ async def update_delivery_status(
     }
 
 @router.get("/orders/pending", response_model=List[dict])
-async def get_pending_deliveries(
-    db: Session = Depends(get_db),
+@offload("io")
+def get_pending_deliveries(
+    db: Session = Depends(get_read_db),
     current_user: dict = Depends(auth.get_current_user)
 ):
     """Get list of orders pending delivery assignment"""
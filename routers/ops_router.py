@@ -0,0 +1,150 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+
+import auth
+import executors
+from admission import admission_controller
+from address_cache import address_cache
+from archive import order_archiver
+from background import background_tasks
+from database import get_read_db, pool_metrics
+from dispatch import zone_dispatcher, zone_report
+from eta import eta_estimator
+from geocoding import address_geocoder
+from heartbeat import heartbeat_sweeper
+from loop_monitor import loop_monitor
+from outbox import outbox_relay
+from profiling import request_profiler
+from rate_limit import rate_limiter
+from response_cache import agent_response_cache, order_response_cache
+from revocation import revocation_filter
+from sms_service import sms_service
+from startup import startup_report
+from status_counters import status_counts
+
+router = APIRouter(
+    prefix="/api/ops",
+    tags=["Operations"]
+)
+
+@router.get("/startup", response_model=dict)
+async def get_startup_report(current_user: dict = Depends(auth.get_current_user)):
+    """Import-to-ready timings for this worker"""
+    return startup_report.as_dict()
+
+@router.get("/db-pools", response_model=dict)
+async def get_db_pool_metrics(current_user: dict = Depends(auth.get_current_user)):
+    """Connection pool state for the primary and each read replica"""
+    return pool_metrics()
+
+@router.get("/background-tasks", response_model=dict)
+async def get_background_tasks(current_user: dict = Depends(auth.get_current_user)):
+    """Run counters for the periodic jobs owned by this worker"""
+    return background_tasks.as_dict()
+
+@router.get("/event-loop", response_model=dict)
+async def get_event_loop_metrics(current_user: dict = Depends(auth.get_current_user)):
+    """Loop-lag histogram and the most recent stalls with the frame that held the loop"""
+    return loop_monitor.as_dict()
+
+@router.get("/executors", response_model=dict)
+async def get_executor_metrics(current_user: dict = Depends(auth.get_current_user)):
+    """Per-pool size, queue depth, queue wait and rejections, plus anyio's thread limiter"""
+    return executors.as_dict()
+
+@router.get("/admission", response_model=dict)
+async def get_admission_metrics(current_user: dict = Depends(auth.get_current_user)):
+    """Per-route adaptive limits, in-flight and queued requests, and shed counts by reason"""
+    return admission_controller.as_dict()
+
+@router.get("/rate-limits", response_model=dict)
+async def get_rate_limit_metrics(current_user: dict = Depends(auth.get_current_user)):
+    """Allowed and rejected counts per limit, and the bucket store's size"""
+    return rate_limiter.as_dict()
+
+@router.get("/revocations", response_model=dict)
+async def get_revocation_metrics(current_user: dict = Depends(auth.get_current_user)):
+    """Revocation filter size and how often a check had to go to the database"""
+    return revocation_filter.as_dict()
+
+@router.get("/status-counts", response_model=dict)
+@executors.offload("io")
+def get_status_counts(db: Session = Depends(get_read_db), current_user: dict = Depends(auth.get_current_user)):
+    """Orders and delivery agents per status, from the live counters (no COUNT(*) scans)"""
+    return status_counts.snapshot(db)
+
+@router.get("/status-counts/reconciliation", response_model=dict)
+async def get_status_count_reconciliation(current_user: dict = Depends(auth.get_current_user)):
+    """Counter cache hits and what the last reconciliation had to correct"""
+    return status_counts.as_dict()
+
+@router.get("/profiles", response_model=dict)
+async def get_request_profiles(current_user: dict = Depends(auth.get_current_user)):
+    """Profiled routes in the current window, with request counts and durations"""
+    return request_profiler.as_dict()
+
+@router.get("/profiles/collapsed", response_class=PlainTextResponse)
+async def get_collapsed_profile(
+    route: str = Query(..., description='Route as listed by /profiles, e.g. "POST /api/orders/"'),
+    current_user: dict = Depends(auth.get_current_user)
+):
+    """Aggregated samples for one route as collapsed stacks (feed to flamegraph.pl or speedscope)"""
+    collapsed = request_profiler.collapsed(route)
+    if not collapsed:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No profiles for this route in the window")
+    return PlainTextResponse(collapsed)
+
+@router.get("/outbox", response_model=dict)
+@executors.offload("io")
+def get_outbox_metrics(current_user: dict = Depends(auth.get_current_user)):
+    """Outbox relay throughput and lag"""
+    return outbox_relay.lag_metrics()
+
+@router.get("/sms", response_model=dict)
+async def get_sms_metrics(current_user: dict = Depends(auth.get_current_user)):
+    """Per-provider send counts, latency and circuit breaker state"""
+    return sms_service.sender.as_dict()
+
+@router.get("/eta", response_model=dict)
+async def get_eta_metrics(current_user: dict = Depends(auth.get_current_user)):
+    """Fitted ETA parameters and in-flight refresh counters"""
+    return eta_estimator.as_dict()
+
+@router.get("/geocoding", response_model=dict)
+async def get_geocoding_metrics(current_user: dict = Depends(auth.get_current_user)):
+    """Pincode index size, how addresses were resolved and backfill progress"""
+    return address_geocoder.as_dict()
+
+@router.get("/address-cache", response_model=dict)
+async def get_address_cache_metrics(current_user: dict = Depends(auth.get_current_user)):
+    """Address book cache hit ratios, 304s and invalidations"""
+    return address_cache.as_dict()
+
+@router.get("/response-cache", response_model=dict)
+async def get_response_cache_metrics(current_user: dict = Depends(auth.get_current_user)):
+    """Hit ratios, 304s, size and evictions of the order and agent response caches"""
+    return {"orders": order_response_cache.as_dict(), "agents": agent_response_cache.as_dict()}
+
+@router.get("/archival", response_model=dict)
+async def get_archival_metrics(current_user: dict = Depends(auth.get_current_user)):
+    """Rows moved to the archive tables and archival throughput"""
+    return order_archiver.metrics
+
+@router.get("/heartbeats", response_model=dict)
+async def get_heartbeat_metrics(current_user: dict = Depends(auth.get_current_user)):
+    """Stale-agent sweeps and how many agents they took offline"""
+    return heartbeat_sweeper.metrics
+
+@router.get("/dispatch", response_model=dict)
+@executors.offload("io")
+def get_dispatch_report(
+    window_minutes: int = Query(60, ge=1, le=1440, description="Throughput window"),
+    db: Session = Depends(get_read_db),
+    current_user: dict = Depends(auth.get_current_user)
+):
+    """Per-zone backlog and dispatch throughput, plus the shards this worker has led"""
+    return {
+        "zones": zone_report(db, window_minutes),
+        "dispatcher": zone_dispatcher.as_dict()
+    }
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional
@@ -6,15 +7,30 @@ import uuid
 
 # Import local modules
 from models.auth_models import User
-from models.address_models import Address
+from models.delivery_models import DeliveryAgent
 from models.order_models import Order, OrderItem, OrderStatus
 from schemas.order_schemas import (
     OrderCreate, OrderUpdate, OrderResponse, OrderListResponse, 
     OrderSummary, OrderItemCreate, OrderItemResponse
 )
+from address_cache import address_cache
+import analytics
+import archive
 import auth
-from database import get_db
-from sms_service import sms_service
+import exports
+import status_counters
+from config import settings
+from database import get_db, get_read_db
+from dispatch import assign_agent
+from order_state import transition_order, update_order_fields, OrderTransitionError
+from outbox import enqueue_event, ORDER_STATUS_CHANGED
+from serialization import FastJSONResponse, ORDER_LIST
+from response_cache import (
+    agent_response_cache, etag_matches, json_response, not_modified, order_response_cache, version_token
+)
+from eta import eta_estimator
+from executors import offload
+from zones import zone_map
 
 router = APIRouter(
     prefix="/api/orders",
@@ -74,11 +90,12 @@ def build_order_response_data(order: Order) -> dict:
         "delivery_address": None,  # We'll handle this separately if needed
         "customer": None,  # We'll handle this separately if needed
         "delivery_agent": None,  # We'll handle this separately if needed
-        "order_items": [OrderItemResponse.model_validate(item) for item in order.order_items]
+        "order_items": order.order_items  # validated from attributes with the rest of the response
     }
 
 @router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
-async def create_order(
+@offload("io")
+def create_order(
     order_data: OrderCreate,
     db: Session = Depends(get_db),
     current_user: dict = Depends(auth.get_current_user)
@@ -93,11 +110,8 @@ async def create_order(
             detail="User not found"
         )
     
-    # Verify delivery address belongs to user
-    address = db.query(Address).filter(
-        Address.id == order_data.delivery_address_id,
-        Address.owner_id == user.id
-    ).first()
+    # Verify delivery address belongs to user (from the user's cached address book)
+    address = address_cache.get_address(db, user.id, order_data.delivery_address_id)
     
     if not address:
         raise HTTPException(
@@ -120,7 +134,8 @@ async def create_order(
         tax_amount=tax_amount,
         subtotal=subtotal,
         delivery_instructions=order_data.delivery_instructions,
-        estimated_delivery_time=datetime.now(timezone.utc) + timedelta(minutes=45)
+        estimated_delivery_time=eta_estimator.estimate_new_order(address.pincode),
+        zone=zone_map.zone_for_address(address.pincode, address.town_city)
     )
     
     db.add(db_order)
@@ -143,6 +158,9 @@ async def create_order(
         )
         db.add(db_order_item)
     
+    analytics.record_order_created(db, db_order, address.pincode)
+    status_counters.record(db, status_counters.ORDER, {OrderStatus.PENDING: 1})
+    
     db.commit()
     db.refresh(db_order)
     
@@ -157,14 +175,15 @@ async def create_order(
     
     # Convert to response model to ensure proper serialization
     response_data = build_order_response_data(db_order)
-    return OrderResponse.model_validate(response_data)
+    return FastJSONResponse(OrderResponse.model_validate(response_data), status_code=status.HTTP_201_CREATED)
 
 @router.get("/", response_model=OrderListResponse)
-async def get_user_orders(
+@offload("io")
+def get_user_orders(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(10, ge=1, le=100, description="Items per page"),
     status_filter: Optional[str] = Query(None, description="Filter by order status"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: dict = Depends(auth.get_current_user)
 ):
     """Get orders for the authenticated user with pagination and filtering"""
@@ -174,56 +193,92 @@ async def get_user_orders(
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     
-    # Build query
-    query = db.query(Order).filter(Order.customer_id == user.id)
-    
     # Apply status filter
+    order_status = None
     if status_filter:
         try:
             order_status = OrderStatus(status_filter)
-            query = query.filter(Order.status == order_status)
         except ValueError:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid status filter")
     
-    # Get total count
-    total = query.count()
+    # Count and paginate across hot and archived orders
+    total, orders = archive.page_customer_orders(db, user.id, order_status, page, size)
     
-    # Apply pagination
-    orders = query.order_by(Order.created_at.desc()).offset((page - 1) * size).limit(size).all()
+    # Validated once as a list and returned as-is (no second pass through response_model)
+    return FastJSONResponse({
+        "orders": ORDER_LIST.validate_python([build_order_response_data(order) for order in orders]),
+        "total": total,
+        "page": page,
+        "size": size
+    })
+
+@router.get("/export")
+async def export_orders(
+    file_format: str = Query("csv", pattern="^(csv|ndjson)$", description="csv or ndjson"),
+    start: Optional[datetime] = Query(None, description="Orders created at or after this time"),
+    end: Optional[datetime] = Query(None, description="Orders created before this time"),
+    status_filter: Optional[str] = Query(None, description="Filter by order status"),
+    user_id: int = Depends(auth.get_export_user_id)
+):
+    """Stream orders with their items as CSV or NDJSON (finance/ops export, EXPORT_USER_IDS only)"""
+    order_status = None
+    if status_filter:
+        try:
+            order_status = OrderStatus(status_filter)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid status filter")
     
-    return OrderListResponse(
-        orders=[OrderResponse.model_validate(build_order_response_data(order)) for order in orders],
-        total=total,
-        page=page,
-        size=size
+    chunks = exports.iter_order_chunks(start, end, order_status, settings.EXPORT_CHUNK_SIZE)
+    if file_format == "csv":
+        body, media_type = exports.iter_csv(chunks), "text/csv"
+    else:
+        body, media_type = exports.iter_ndjson(chunks), "application/x-ndjson"
+    
+    filename = f"orders-{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}.{file_format}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
     )
 
 @router.get("/{order_id}", response_model=OrderResponse)
-async def get_order_details(
+@offload("io")
+def get_order_details(
     order_id: str,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(auth.get_current_user)
+    db: Session = Depends(get_read_db),
+    user_id: int = Depends(auth.get_current_user_id),
+    if_none_match: Optional[str] = Header(None)
 ):
-    """Get detailed information about a specific order"""
-    phone_number = current_user.get("phone_number")
-    user = db.query(User).filter(User.phone_number == phone_number).first()
-    
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    
-    order = db.query(Order).filter(
-        Order.id == order_id,
-        Order.customer_id == user.id
-    ).first()
+    """
+    Get detailed information about a specific order
+
+    Only the order's version is read up front; a matching If-None-Match
+    gets a 304 and an unchanged order is served from the response cache.
+    """
+    # Falls through to the archive for old completed orders
+    version_row = archive.find_customer_order_version(db, order_id, user_id)
     
-    if not order:
+    if version_row is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
     
-    response_data = build_order_response_data(order)
-    return OrderResponse.model_validate(response_data)
+    version = version_token(version_row.version)
+    etag = order_response_cache.etag(order_id, version)
+    if etag_matches(if_none_match, etag):
+        order_response_cache.record_not_modified()
+        return not_modified(etag)
+    
+    cached = order_response_cache.get(order_id, version)
+    if cached is None:
+        order = archive.find_customer_order(db, order_id, user_id)
+        if not order:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+        body = OrderResponse.model_validate(build_order_response_data(order)).model_dump_json().encode()
+        cached = order_response_cache.put(order_id, version_token(order.version), body)
+    return json_response(cached.body, cached.etag)
 
 @router.patch("/{order_id}", response_model=OrderResponse)
-async def update_order(
+@offload("io")
+def update_order(
     order_id: str,
     order_update: OrderUpdate,
     db: Session = Depends(get_db),
@@ -236,42 +291,51 @@ async def update_order(
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     
-    order = db.query(Order).filter(
-        Order.id == order_id,
-        Order.customer_id == user.id
-    ).first()
-    
-    if not order:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
-    
-    # Store old status for SMS notification
-    old_status = order.status
-    
-    # Update order fields
+    # Status changes go through the transition table as one conditional UPDATE
+    # (409 on an invalid or concurrent change); other fields only on open orders.
+    # Dispatching claims a slot on the agent, so it goes through assign_agent,
+    # and the agent is only ever set that way
     update_data = order_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(order, field, value)
-    
-    # Update timestamp
-    order.updated_at = datetime.now(timezone.utc)
-    
+    new_status = update_data.pop("status", None)
+    agent_id = update_data.pop("delivery_agent_id", None)
+    if new_status is not None and OrderStatus(new_status.value) == OrderStatus.DISPATCHED:
+        if agent_id is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="delivery_agent_id is required to dispatch an order")
+        order = db.query(Order).filter(Order.id == order_id, Order.customer_id == user.id).first()
+        if not order:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+        agent = db.query(DeliveryAgent).filter(DeliveryAgent.id == agent_id, DeliveryAgent.is_active == True).first()
+        if not agent:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Delivery agent not found")
+        # Queues the agent and customer notifications itself
+        order = assign_agent(db, order, agent)
+        if update_data:
+            order = update_order_fields(db, order_id, update_data, customer_id=user.id)
+    elif order_update.delivery_agent_id is not None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="delivery_agent_id can only be set when dispatching the order")
+    elif new_status is not None:
+        order = transition_order(db, order_id, OrderStatus(new_status.value), values=update_data, customer_id=user.id)
+        # Queue SMS notification (sent by the outbox relay after commit)
+        enqueue_event(db, order.id, ORDER_STATUS_CHANGED, {
+            "to": "+919342044743",  # TEMPORARILY HARDCODED FOR TESTING
+            "status": order.status.value,
+            "order_number": order.order_number
+        })
+    else:
+        order = update_order_fields(db, order_id, update_data, customer_id=user.id)
+    
+    # Built from the returned row before commit expires it
+    response_data = build_order_response_data(order)
     db.commit()
-    db.refresh(order)
-    
-    # Send SMS notification if status changed
-    if order_update.status and order_update.status != old_status:
-        sms_service.send_order_status_sms(
-            to_number="+919342044743",  # TEMPORARILY HARDCODED FOR TESTING
-            order_id=order.id,
-            status=order_update.status.value,
-            order_number=order.order_number
-        )
+    order_response_cache.invalidate(order_id)
+    if agent_id is not None:
+        agent_response_cache.invalidate(agent_id)
     
-    response_data = build_order_response_data(order)
-    return OrderResponse.model_validate(response_data)
+    return FastJSONResponse(OrderResponse.model_validate(response_data))
 
 @router.post("/{order_id}/cancel", response_model=OrderResponse)
-async def cancel_order(
+@offload("io")
+def cancel_order(
     order_id: str,
     db: Session = Depends(get_db),
     current_user: dict = Depends(auth.get_current_user)
@@ -283,41 +347,29 @@ async def cancel_order(
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     
-    order = db.query(Order).filter(
-        Order.id == order_id,
-        Order.customer_id == user.id
-    ).first()
-    
-    if not order:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
-    
-    # Check if order can be cancelled
-    if order.status in [OrderStatus.DISPATCHED, OrderStatus.DELIVERED]:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Order cannot be cancelled at this stage"
+    # Cancel the order, only from pending or confirmed
+    try:
+        order = transition_order(
+            db, order_id, OrderStatus.CANCELLED,
+            where=[Order.status.in_([OrderStatus.PENDING, OrderStatus.CONFIRMED])],
+            customer_id=user.id
         )
-    
-    if order.status == OrderStatus.CANCELLED:
+    except OrderTransitionError as e:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Order is already cancelled"
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Order is already cancelled" if e.current == OrderStatus.CANCELLED
+            else "Order cannot be cancelled at this stage"
         )
     
-    # Cancel the order
-    order.status = OrderStatus.CANCELLED
-    order.updated_at = datetime.now(timezone.utc)
+    # Queue cancellation SMS
+    enqueue_event(db, order.id, ORDER_STATUS_CHANGED, {
+        "to": "+919342044743",  # TEMPORARILY HARDCODED FOR TESTING
+        "status": "cancelled",
+        "order_number": order.order_number
+    })
     
+    response_data = build_order_response_data(order)
     db.commit()
-    db.refresh(order)
-    
-    # Send cancellation SMS
-    sms_service.send_order_status_sms(
-        to_number="+919342044743",  # TEMPORARILY HARDCODED FOR TESTING
-        order_id=order.id,
-        status="cancelled",
-        order_number=order.order_number
-    )
+    order_response_cache.invalidate(order_id)
     
-    response_data = build_order_response_data(order)
-    return OrderResponse.model_validate(response_data)
+    return FastJSONResponse(OrderResponse.model_validate(response_data))
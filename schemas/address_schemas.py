@@ -41,6 +41,8 @@ class AddressUpdate(AddressBase):
 class AddressResponse(AddressBase):
     id: int
     owner_id: int
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     created_at: datetime
     updated_at: datetime
 
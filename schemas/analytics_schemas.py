@@ -0,0 +1,39 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+class DeliveryStats(BaseModel):
+    created: int
+    delivered: int
+    cancelled: int
+    on_time_rate: Optional[float]
+    avg_delivery_minutes: Optional[float]
+
+class DeliverySummaryResponse(DeliveryStats):
+    start: datetime
+    end: datetime
+
+class AgentDeliveryStats(DeliveryStats):
+    agent_id: Optional[int]
+
+class PincodeDeliveryStats(DeliveryStats):
+    pincode: str
+
+class HourlyDeliveryStats(DeliveryStats):
+    bucket_start: datetime
+    backlog: int  # created minus closed, cumulative over the requested range
+
+class AgentStatsResponse(BaseModel):
+    start: datetime
+    end: datetime
+    agents: List[AgentDeliveryStats]
+
+class PincodeStatsResponse(BaseModel):
+    start: datetime
+    end: datetime
+    pincodes: List[PincodeDeliveryStats]
+
+class HourlyStatsResponse(BaseModel):
+    start: datetime
+    end: datetime
+    hours: List[HourlyDeliveryStats]
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, ConfigDict, field_validator 
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 import re
 from .order_schemas import OrderStatusEnum
@@ -17,6 +17,7 @@ class DeliveryAgentCreate(BaseModel):
     email: Optional[str] = Field(None, description="Email address of the delivery agent")
     vehicle_type: Optional[str] = Field(None, description="Type of vehicle (bike, car, etc.)")
     vehicle_number: Optional[str] = Field(None, description="Vehicle registration number")
+    max_active_orders: int = Field(1, ge=1, le=10, description="Orders the agent can carry on one trip")
 
     @field_validator('phone')
     @classmethod
@@ -41,6 +42,7 @@ class DeliveryAgentUpdate(BaseModel):
     current_longitude: Optional[float] = Field(None, ge=-180, le=180)
     vehicle_type: Optional[str] = Field(None)
     vehicle_number: Optional[str] = Field(None)
+    max_active_orders: Optional[int] = Field(None, ge=1, le=10)
     is_active: Optional[bool] = Field(None)
 
     @field_validator('phone')
@@ -57,6 +59,33 @@ class DeliveryAgentUpdate(BaseModel):
             raise ValueError('Invalid email format')
         return v
 
+# Bulk fleet management schemas
+class DeliveryAgentBatchCreate(BaseModel):
+    # Rows are validated one by one against DeliveryAgentCreate so a bad row
+    # is reported instead of rejecting the whole batch
+    agents: List[dict] = Field(..., min_length=1, max_length=1000, description="Agents to create")
+
+class BatchRowError(BaseModel):
+    row: int = Field(..., description="1-based row (or line) number in the request")
+    phone: Optional[str] = None
+    errors: List[str]
+
+class DeliveryAgentBatchResult(BaseModel):
+    created: int
+    failed: int
+    errors: List[BatchRowError]
+    errors_truncated: bool = False
+    agents: List["DeliveryAgentResponse"] = []
+
+class AgentStatusBatchUpdate(BaseModel):
+    status: DeliveryAgentStatusEnum = Field(..., description="New status")
+    agent_ids: Optional[List[int]] = Field(None, max_length=10000, description="Agents to update; omit for all active agents")
+    from_status: Optional[DeliveryAgentStatusEnum] = Field(None, description="Only update agents currently in this status")
+
+class AgentStatusBatchResult(BaseModel):
+    updated: int
+    status: DeliveryAgentStatusEnum
+
 class LocationUpdate(BaseModel):
     latitude: float = Field(..., ge=-90, le=90, description="Current latitude")
     longitude: float = Field(..., ge=-180, le=180, description="Current longitude")
@@ -70,6 +99,9 @@ class DeliveryAgentResponse(BaseModel):
     current_latitude: Optional[float]
     current_longitude: Optional[float]
     last_location_update: Optional[datetime]
+    zone: Optional[str] = None
+    max_active_orders: int = 1
+    active_order_count: int = 0
     is_active: bool
     vehicle_type: Optional[str]
     vehicle_number: Optional[str]
@@ -78,6 +110,8 @@ class DeliveryAgentResponse(BaseModel):
     
     model_config = ConfigDict(from_attributes=True)
 
+DeliveryAgentBatchResult.model_rebuild()
+
 class DeliveryAgentListResponse(BaseModel):
     delivery_agents: list[DeliveryAgentResponse]
     total: int
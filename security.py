@@ -1,3 +1,4 @@
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
@@ -9,11 +10,17 @@ class TokenData(BaseModel):
     id: Optional[str] = None
 
 # --- TOKEN CREATION ---
+# Every token carries its own id (jti) and type; "sid" names the login session
+# a token belongs to, shared by the access and refresh tokens issued for it and
+# by every refresh token that rotation derives from them
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     # Use expire time from settings
     expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex, "typ": "access"})
     # Use secret key and algorithm from settings
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
@@ -22,7 +29,7 @@ def create_refresh_token(data: dict):
     to_encode = data.copy()
     # Use expire time from settings
     expire = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex, "typ": "refresh"})
     # Use secret key and algorithm from settings
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
@@ -39,4 +46,14 @@ def verify_token(token: str, credentials_exception):
         # You can return the whole payload if you need more data
         return TokenData(id=user_id)
     except JWTError:
-        raise credentials_exception
\ No newline at end of file
+        raise credentials_exception
+
+def decode_refresh_token(token: str, credentials_exception) -> dict:
+    """Claims of a refresh token; tokens issued before rotation (no jti/sid) are rejected"""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        raise credentials_exception
+    if payload.get("typ") != "refresh" or not all(payload.get(claim) for claim in ("sub", "jti", "sid")):
+        raise credentials_exception
+    return payload
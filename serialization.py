@@ -0,0 +1,31 @@
+# serialization.py
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+from schemas.address_schemas import AddressResponse
+from schemas.delivery_schemas import DeliveryAgentResponse
+from schemas.order_schemas import OrderItemResponse, OrderResponse
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON rendered by pydantic-core's serializer instead of the stdlib encoder.
+
+    It is the app's default response class, and it accepts pydantic models
+    directly. A handler that already holds validated models can return
+    FastJSONResponse(model) itself: FastAPI passes Response objects through
+    untouched, so the declared response_model (still used for the OpenAPI
+    schema) is not validated and encoded a second time.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+# Built once at import; validating a whole list is one call into pydantic-core
+ORDER_LIST = TypeAdapter(list[OrderResponse])
+ORDER_ITEM_LIST = TypeAdapter(list[OrderItemResponse])
+AGENT_LIST = TypeAdapter(list[DeliveryAgentResponse])
+ADDRESS_LIST = TypeAdapter(list[AddressResponse])
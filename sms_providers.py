@@ -0,0 +1,302 @@
+# sms_providers.py
+
+import logging
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+class SMSProviderError(Exception):
+    """A single provider failed to send a message (error, timeout or open breaker)"""
+
+class SMSDeliveryError(Exception):
+    """No provider could send the message"""
+
+# --- PROVIDERS ---
+class TwilioProvider:
+    """Twilio account used as an SMS provider; one client per timeout, created on first use"""
+
+    def __init__(self, name: str, account_sid: Optional[str], auth_token: Optional[str], from_number: Optional[str]):
+        self.name = name
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.from_number = from_number
+        self._clients: dict[Optional[float], object] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def is_configured(self) -> bool:
+        return bool(self.account_sid and self.auth_token and self.from_number)
+
+    def client(self, timeout: Optional[float] = None):
+        client = self._clients.get(timeout)
+        if client is not None:
+            return client
+        if not self.is_configured:
+            raise SMSProviderError(f"{self.name} credentials are not configured")
+        with self._lock:
+            if timeout not in self._clients:
+                from twilio.http.http_client import TwilioHttpClient
+                from twilio.rest import Client
+                self._clients[timeout] = Client(
+                    self.account_sid, self.auth_token, http_client=TwilioHttpClient(timeout=timeout)
+                )
+        return self._clients[timeout]
+
+    def send(self, to: str, body: str, timeout: float) -> str:
+        try:
+            message = self.client(timeout).messages.create(body=body, from_=self.from_number, to=to)
+        except SMSProviderError:
+            raise
+        except Exception as e:
+            # TwilioRestException for API errors, requests exceptions for timeouts
+            raise SMSProviderError(f"{self.name}: {e}") from e
+        return message.sid
+
+class FaultInjectingProvider:
+    """
+    Local stand-in provider that sends nothing but simulates latency, errors
+    and hung requests, for exercising the resilience layer under partial outages.
+    """
+
+    def __init__(
+        self,
+        name: str = "fault",
+        latency_ms: float = 100.0,
+        jitter_ms: float = 50.0,
+        failure_rate: float = 0.0,
+        hang_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        self.name = name
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.hang_rate = hang_rate
+        self.is_configured = True
+        self.sent = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def send(self, to: str, body: str, timeout: float) -> str:
+        with self._lock:
+            hang = self._random.random() < self.hang_rate
+            fail = self._random.random() < self.failure_rate
+            delay = (self.latency_ms + self._random.uniform(0, self.jitter_ms)) / 1000
+        if hang or delay > timeout:
+            time.sleep(timeout)
+            raise SMSProviderError(f"{self.name}: timed out after {timeout}s")
+        time.sleep(delay)
+        if fail:
+            raise SMSProviderError(f"{self.name}: injected failure")
+        with self._lock:
+            self.sent += 1
+        return f"{self.name}-{uuid.uuid4().hex[:16]}"
+
+# --- CIRCUIT BREAKER ---
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls
+    without touching the network for `reset_seconds`; then lets a single probe
+    through (half-open) and closes again if it succeeds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_seconds:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def as_dict(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened
+        }
+
+# --- SENDER ---
+class ResilientSender:
+    """
+    Sends through an ordered list of providers.
+
+    Each provider has its own circuit breaker and each message kind its own
+    timeout. Ordinary messages fail over to the next provider when one fails
+    or its breaker is open. Kinds in `hedge_kinds` (OTPs) are hedged: if the
+    first provider hasn't answered within `hedge_delay_seconds`, the next one
+    is started as well and the first success wins.
+    """
+
+    def __init__(
+        self,
+        providers: list,
+        timeouts: dict[str, float],
+        default_timeout: float,
+        hedge_kinds: list[str],
+        hedge_delay_seconds: float,
+        failure_threshold: int,
+        reset_seconds: float
+    ):
+        self.providers = providers
+        self.timeouts = timeouts
+        self.default_timeout = default_timeout
+        self.hedge_kinds = set(hedge_kinds)
+        self.hedge_delay_seconds = hedge_delay_seconds
+        self.breakers = {provider.name: CircuitBreaker(failure_threshold, reset_seconds) for provider in providers}
+        self._executor = ThreadPoolExecutor(max_workers=max(4, 2 * len(providers)), thread_name_prefix="sms-send")
+        self._lock = threading.Lock()
+        self.provider_metrics = {
+            provider.name: {"sent": 0, "failed": 0, "short_circuited": 0, "total_ms": 0.0}
+            for provider in providers
+        }
+        self.metrics = {"messages": 0, "undelivered": 0, "failovers": 0, "hedges": 0, "hedge_wins": 0}
+
+    def _count(self, provider_name: Optional[str], field: str, amount: float = 1) -> None:
+        with self._lock:
+            if provider_name is None:
+                self.metrics[field] += amount
+            else:
+                self.provider_metrics[provider_name][field] += amount
+
+    def _attempt(self, provider, to: str, body: str, timeout: float) -> str:
+        start = time.perf_counter()
+        try:
+            message_id = provider.send(to, body, timeout)
+        except SMSProviderError:
+            self.breakers[provider.name].record_failure()
+            self._count(provider.name, "failed")
+            raise
+        finally:
+            self._count(provider.name, "total_ms", (time.perf_counter() - start) * 1000)
+        self.breakers[provider.name].record_success()
+        self._count(provider.name, "sent")
+        return message_id
+
+    def send(self, kind: str, to: str, body: str) -> tuple[str, str]:
+        """Send one message; returns (provider name, message id) or raises SMSDeliveryError"""
+        self._count(None, "messages")
+        timeout = self.timeouts.get(kind, self.default_timeout)
+        candidates = [provider for provider in self.providers if provider.is_configured]
+        if not candidates:
+            self._count(None, "undelivered")
+            raise SMSDeliveryError("No SMS provider is configured")
+        try:
+            if kind in self.hedge_kinds:
+                return self._send_hedged(candidates, to, body, timeout)
+            return self._send_with_failover(candidates, to, body, timeout)
+        except SMSDeliveryError:
+            self._count(None, "undelivered")
+            raise
+
+    def _send_with_failover(self, candidates: list, to: str, body: str, timeout: float) -> tuple[str, str]:
+        errors = []
+        for provider in candidates:
+            if not self.breakers[provider.name].allow():
+                self._count(provider.name, "short_circuited")
+                errors.append(f"{provider.name}: circuit open")
+                continue
+            if errors:
+                self._count(None, "failovers")
+            try:
+                return provider.name, self._attempt(provider, to, body, timeout)
+            except SMSProviderError as e:
+                errors.append(str(e))
+        raise SMSDeliveryError("; ".join(errors))
+
+    def _send_hedged(self, candidates: list, to: str, body: str, timeout: float) -> tuple[str, str]:
+        # With a single provider the hedge is a second request to it
+        queue = iter(candidates if len(candidates) > 1 else candidates * 2)
+        hedged = set()
+        pending = {}
+        errors = []
+
+        def start_next() -> bool:
+            for provider in queue:
+                if not self.breakers[provider.name].allow():
+                    self._count(provider.name, "short_circuited")
+                    errors.append(f"{provider.name}: circuit open")
+                    continue
+                future = self._executor.submit(self._attempt, provider, to, body, timeout)
+                pending[future] = provider
+                return True
+            return False
+
+        more = start_next()
+        while pending:
+            done, _ = wait(list(pending), timeout=self.hedge_delay_seconds if more else None, return_when=FIRST_COMPLETED)
+            if not done:
+                # Slow answer: hedge with the next provider and keep waiting on both
+                more = start_next()
+                if more:
+                    hedged.add(next(reversed(pending)))
+                    self._count(None, "hedges")
+                continue
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    message_id = future.result()
+                except SMSProviderError as e:
+                    errors.append(str(e))
+                    continue
+                if future in hedged:
+                    self._count(None, "hedge_wins")
+                return provider.name, message_id
+            if not pending and more:
+                more = start_next()
+                if more:
+                    self._count(None, "failovers")
+        raise SMSDeliveryError("; ".join(errors) or "All SMS providers are unavailable")
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            providers = {
+                name: {
+                    **{field: value for field, value in metrics.items() if field != "total_ms"},
+                    "avg_ms": round(metrics["total_ms"] / (metrics["sent"] + metrics["failed"]), 2)
+                    if metrics["sent"] + metrics["failed"] else None,
+                    "breaker": self.breakers[name].as_dict()
+                }
+                for name, metrics in self.provider_metrics.items()
+            }
+            return {**self.metrics, "providers": providers}
@@ -1,39 +1,77 @@
 # /home/asus/projects/delivery-management/sms_service.py
 
-from twilio.rest import Client
 import logging
-from twilio.base.exceptions import TwilioRestException
 from config import settings # Import our centralized settings object
+from sms_providers import FaultInjectingProvider, ResilientSender, SMSDeliveryError, TwilioProvider
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def build_providers(names: list[str]) -> list:
+    """SMS providers in failover order"""
+    providers = []
+    for name in names:
+        if name == "twilio":
+            providers.append(TwilioProvider(
+                "twilio", settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN, settings.TWILIO_PHONE_NUMBER
+            ))
+        elif name == "twilio_secondary":
+            providers.append(TwilioProvider(
+                "twilio_secondary",
+                settings.TWILIO_SECONDARY_ACCOUNT_SID,
+                settings.TWILIO_SECONDARY_AUTH_TOKEN,
+                settings.TWILIO_SECONDARY_PHONE_NUMBER
+            ))
+        elif name == "fault":
+            providers.append(FaultInjectingProvider(
+                latency_ms=settings.SMS_FAULT_LATENCY_MS,
+                jitter_ms=settings.SMS_FAULT_JITTER_MS,
+                failure_rate=settings.SMS_FAULT_FAILURE_RATE,
+                hang_rate=settings.SMS_FAULT_HANG_RATE
+            ))
+        else:
+            raise ValueError(f"Unknown SMS provider: {name}")
+    return providers
+
 class SMSService:
     def __init__(self):
-        # Read credentials securely from our central settings object
-        self.account_sid = settings.TWILIO_ACCOUNT_SID
-        self.auth_token = settings.TWILIO_AUTH_TOKEN
-        self.twilio_phone_number = settings.TWILIO_PHONE_NUMBER
-        
-        # This line remains the same
-        self.client = Client(self.account_sid, self.auth_token)
+        # Providers are built from our central settings object. Twilio clients
+        # are created on first use (or by the app lifespan handler) so
+        # importing this module does no network or SDK setup
+        self.sender = ResilientSender(
+            providers=build_providers(settings.SMS_PROVIDERS),
+            timeouts=settings.SMS_TIMEOUT_SECONDS,
+            default_timeout=settings.SMS_DEFAULT_TIMEOUT_SECONDS,
+            hedge_kinds=settings.SMS_HEDGE_KINDS,
+            hedge_delay_seconds=settings.SMS_HEDGE_DELAY_SECONDS,
+            failure_threshold=settings.SMS_BREAKER_FAILURE_THRESHOLD,
+            reset_seconds=settings.SMS_BREAKER_RESET_SECONDS
+        )
+
+    @property
+    def is_configured(self) -> bool:
+        return any(provider.is_configured for provider in self.sender.providers)
+
+    def init_client(self):
+        """Create the Twilio clients for every configured provider and message timeout"""
+        timeouts = set(self.sender.timeouts.values()) | {self.sender.default_timeout}
+        for provider in self.sender.providers:
+            if provider.is_configured and isinstance(provider, TwilioProvider):
+                for timeout in timeouts:
+                    provider.client(timeout)
     
     def send_otp(self, phone_number: str, otp: str) -> bool:
         """Send OTP via SMS using Twilio"""
         try:
             message_body = f"Your food delivery app verification code is: {otp}. Valid for 5 minutes. Do not share this code with anyone."
             
-            message = self.client.messages.create(
-                body=message_body,
-                from_=self.twilio_phone_number,
-                to=phone_number
-            )
+            provider, message_sid = self.sender.send("otp", phone_number, message_body)
             
-            logger.info(f"SMS sent successfully to {phone_number}. Message SID: {message.sid}")
+            logger.info(f"SMS sent successfully to {phone_number} via {provider}. Message SID: {message_sid}")
             return True
             
-        except TwilioRestException as e:
+        except SMSDeliveryError as e:
             logger.error(f"Failed to send SMS to {phone_number}: {str(e)}")
             return False
     
@@ -42,16 +80,12 @@ class SMSService:
         try:
             message_body = "Welcome to our Food Delivery App! Your phone number has been verified successfully. Enjoy ordering delicious food!"
             
-            message = self.client.messages.create(
-                body=message_body,
-                from_=self.twilio_phone_number,
-                to=phone_number
-            )
+            provider, message_sid = self.sender.send("welcome", phone_number, message_body)
             
-            logger.info(f"Welcome SMS sent to {phone_number}. Message SID: {message.sid}")
+            logger.info(f"Welcome SMS sent to {phone_number} via {provider}. Message SID: {message_sid}")
             return True
             
-        except TwilioRestException as e:
+        except SMSDeliveryError as e:
             logger.error(f"Failed to send welcome SMS to {phone_number}: {str(e)}")
             return False
 
@@ -70,16 +104,12 @@ class SMSService:
             if order_number:
                 message_body += f" Order #{order_number}"
             
-            message = self.client.messages.create(
-                body=message_body,
-                from_=self.twilio_phone_number,
-                to=to_number
-            )
+            provider, message_sid = self.sender.send("order_status", to_number, message_body)
             
-            logger.info(f"Order status SMS sent to {to_number} for order {order_id}. Message SID: {message.sid}")
+            logger.info(f"Order status SMS sent to {to_number} for order {order_id} via {provider}. Message SID: {message_sid}")
             return True
             
-        except TwilioRestException as e:
+        except SMSDeliveryError as e:
             logger.error(f"Failed to send order status SMS to {to_number}: {str(e)}")
             return False
 
@@ -91,16 +121,12 @@ class SMSService:
                 message_body += f" Order #{order_number}"
             message_body += " Please check your app for details."
             
-            message = self.client.messages.create(
-                body=message_body,
-                from_=self.twilio_phone_number,
-                to=agent_phone
-            )
+            provider, message_sid = self.sender.send("delivery_assignment", agent_phone, message_body)
             
-            logger.info(f"Delivery assignment SMS sent to {agent_phone} for order {order_id}. Message SID: {message.sid}")
+            logger.info(f"Delivery assignment SMS sent to {agent_phone} for order {order_id} via {provider}. Message SID: {message_sid}")
             return True
             
-        except TwilioRestException as e:
+        except SMSDeliveryError as e:
             logger.error(f"Failed to send delivery assignment SMS to {agent_phone}: {str(e)}")
             return False
 
@@ -116,16 +142,12 @@ class SMSService:
             if order_number:
                 message_body += f" Order #{order_number}"
             
-            message = self.client.messages.create(
-                body=message_body,
-                from_=self.twilio_phone_number,
-                to=customer_phone
-            )
+            provider, message_sid = self.sender.send("delivery_update", customer_phone, message_body)
             
-            logger.info(f"Delivery update SMS sent to {customer_phone} for order {order_id}. Message SID: {message.sid}")
+            logger.info(f"Delivery update SMS sent to {customer_phone} for order {order_id} via {provider}. Message SID: {message_sid}")
             return True
             
-        except TwilioRestException as e:
+        except SMSDeliveryError as e:
             logger.error(f"Failed to send delivery update SMS to {customer_phone}: {str(e)}")
             return False
 
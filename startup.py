@@ -0,0 +1,56 @@
+# startup.py
+
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+class StartupReport:
+    """Per-phase timings from the first import of main.py to the worker being ready"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.ready_at = None
+        self.phases: dict[str, float] = {}
+        self._last_mark = self.started_at
+
+    def mark(self, phase: str) -> None:
+        """Record the time elapsed since the previous mark under `phase`"""
+        now = time.perf_counter()
+        self.phases[phase] = round((now - self._last_mark) * 1000, 2)
+        self._last_mark = now
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block of work as its own phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.phases[name] = round((end - start) * 1000, 2)
+            self._last_mark = end
+
+    def ready(self) -> None:
+        self.ready_at = time.perf_counter()
+        logger.info(
+            "Worker ready in %.1f ms (%s)",
+            self.total_ms,
+            ", ".join(f"{name}={ms:.1f}ms" for name, ms in self.phases.items())
+        )
+
+    @property
+    def total_ms(self) -> float:
+        end = self.ready_at if self.ready_at is not None else time.perf_counter()
+        return round((end - self.started_at) * 1000, 2)
+
+    def as_dict(self) -> dict:
+        return {
+            "ready": self.ready_at is not None,
+            "total_ms": self.total_ms,
+            "phases_ms": dict(self.phases)
+        }
+
+# Created on first import, which main.py does before anything else
+startup_report = StartupReport()
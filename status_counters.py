@@ -0,0 +1,164 @@
+# status_counters.py
+
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from locks import advisory_lock
+from models.analytics_models import StatusCounter
+from models.delivery_models import DeliveryAgent, DeliveryAgentStatus
+from models.order_models import Order, OrderStatus
+
+logger = logging.getLogger(__name__)
+
+ORDER = "order"
+AGENT = "agent"
+
+# What each entity counts: the status column and every status it can hold.
+# Orders are counted in the hot table; archived orders drop out of the counts.
+ENTITIES = {
+    ORDER: (Order.status, OrderStatus),
+    AGENT: (DeliveryAgent.current_status, DeliveryAgentStatus)
+}
+
+def _status_key(value) -> str:
+    return getattr(value, "value", value)
+
+# --- INCREMENTAL UPDATES (in the caller's transaction) ---
+def _add(db: Session, entity: str, status: str, shard: int, delta: int) -> None:
+    """Add `delta` to one counter shard, creating it if needed, in a single statement"""
+    table = StatusCounter.__table__
+    values = {"entity": entity, "status": status, "shard": shard, "count": delta}
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+        stmt = insert(table).values(**values)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["entity", "status", "shard"],
+            set_={"count": table.c.count + stmt.excluded.count}
+        ))
+    elif dialect in ("mysql", "mariadb"):
+        stmt = mysql_insert(table).values(**values)
+        db.execute(stmt.on_duplicate_key_update({"count": table.c.count + stmt.inserted.count}))
+    else:
+        result = db.execute(
+            update(table)
+            .where(table.c.entity == entity, table.c.status == status, table.c.shard == shard)
+            .values(count=table.c.count + delta)
+        )
+        if result.rowcount == 0:
+            db.execute(table.insert().values(**values))
+
+def record(db: Session, entity: str, deltas: dict, shard: Optional[int] = None) -> None:
+    """Apply per-status deltas (e.g. {PENDING: 1}); the caller commits with the change they describe"""
+    if shard is None:
+        # One shard per session, and rows in sorted order, so two transactions
+        # moving agents in opposite directions lock the same rows in the same order
+        shard = db.info.setdefault("status_counter_shard", random.randrange(settings.STATUS_COUNTER_SHARDS))
+    for status, delta in sorted((_status_key(status), delta) for status, delta in deltas.items()):
+        if delta:
+            _add(db, entity, status, shard, delta)
+
+def record_transition(db: Session, entity: str, old_status, new_status, count: int = 1) -> None:
+    if count and _status_key(old_status) != _status_key(new_status):
+        record(db, entity, {old_status: -count, new_status: count})
+
+# --- READS AND RECONCILIATION ---
+class StatusCounts:
+    """
+    Serves the counters (cached for STATUS_COUNTS_CACHE_SECONDS) and corrects drift.
+
+    Reconciliation compares every counter with a COUNT(*) of its status in a
+    single SELECT, so both sides come from one snapshot: a transaction that
+    changed a status and its counter is either in both or in neither. The
+    difference is then added to the counters as a delta, which stays correct
+    even if more transitions commit in between. Only one worker reconciles at
+    a time.
+    """
+
+    LOCK_NAME = "status-counter-reconcile"
+
+    def __init__(self, cache_seconds: float):
+        self.cache_seconds = cache_seconds
+        self._cached: Optional[dict] = None
+        self._cached_at = 0.0
+        self._lock = threading.Lock()
+        self.metrics = {
+            "reads": 0, "cache_hits": 0, "reconciles": 0, "skipped_not_leader": 0,
+            "corrections": 0, "last_drift": {}, "last_reconciled_at": None
+        }
+
+    def snapshot(self, db: Session) -> dict:
+        self.metrics["reads"] += 1
+        with self._lock:
+            if self._cached is not None and time.monotonic() - self._cached_at < self.cache_seconds:
+                self.metrics["cache_hits"] += 1
+                return self._cached
+        rows = db.execute(
+            select(StatusCounter.entity, StatusCounter.status, func.sum(StatusCounter.count))
+            .group_by(StatusCounter.entity, StatusCounter.status)
+        ).all()
+        sums = {(entity, status): int(total) for entity, status, total in rows}
+        counts = {
+            f"{entity}s": {member.value: sums.get((entity, member.value), 0) for member in statuses}
+            for entity, (_, statuses) in ENTITIES.items()
+        }
+        counts["as_of"] = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            self._cached = counts
+            self._cached_at = time.monotonic()
+        return counts
+
+    def reconcile(self) -> int:
+        """Periodic job: fix counters that disagree with the tables; returns how many were corrected"""
+        with advisory_lock(self.LOCK_NAME) as acquired:
+            if not acquired:
+                self.metrics["skipped_not_leader"] += 1
+                return 0
+            db = SessionLocal()
+            try:
+                keys, columns = [], []
+                for entity, (column, statuses) in ENTITIES.items():
+                    for member in statuses:
+                        keys.append((entity, member))
+                        columns.append(select(func.count()).select_from(column.table).where(column == member).scalar_subquery())
+                        columns.append(
+                            select(func.coalesce(func.sum(StatusCounter.count), 0))
+                            .where(StatusCounter.entity == entity, StatusCounter.status == member.value)
+                            .scalar_subquery()
+                        )
+                row = db.execute(select(*columns)).one()
+                drift = {}
+                for index, (entity, member) in enumerate(keys):
+                    actual, counted = row[2 * index], row[2 * index + 1]
+                    if actual != counted:
+                        drift[f"{entity}.{member.value}"] = actual - counted
+                        record(db, entity, {member: actual - counted}, shard=0)
+                db.commit()
+            finally:
+                db.close()
+
+        self.metrics["reconciles"] += 1
+        self.metrics["corrections"] += len(drift)
+        self.metrics["last_drift"] = drift
+        self.metrics["last_reconciled_at"] = datetime.now(timezone.utc).isoformat()
+        if drift:
+            logger.warning(f"Status counters drifted; corrected {drift}")
+        return len(drift)
+
+    def as_dict(self) -> dict:
+        return {"cache_seconds": self.cache_seconds, **self.metrics}
+
+status_counts = StatusCounts(settings.STATUS_COUNTS_CACHE_SECONDS)
@@ -0,0 +1,165 @@
+# trip_planner.py
+
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional, Sequence
+
+from eta import haversine_km_batch
+
+Point = tuple[float, float]
+
+class Stop(NamedTuple):
+    """An order waiting for dispatch, as seen by the planner"""
+    order_id: str
+    latitude: Optional[float]
+    longitude: Optional[float]
+    pincode: Optional[str]
+    created_at: Optional[datetime]
+    deadline: Optional[datetime]  # promised delivery time, if any
+
+    @property
+    def point(self) -> Optional[Point]:
+        if self.latitude is None or self.longitude is None:
+            return None
+        return self.latitude, self.longitude
+
+def distance_km(a: Point, b: Point) -> float:
+    return haversine_km_batch([a[0]], [a[1]], [b[0]], [b[1]])[0]
+
+def distance_matrix(points: Sequence[Point]) -> list[list[float]]:
+    """All pairwise distances, computed in one batched pass"""
+    count = len(points)
+    flat = haversine_km_batch(
+        [points[i][0] for i in range(count) for _ in range(count)],
+        [points[i][1] for i in range(count) for _ in range(count)],
+        [points[j][0] for _ in range(count) for j in range(count)],
+        [points[j][1] for _ in range(count) for j in range(count)]
+    )
+    return [flat[i * count:(i + 1) * count] for i in range(count)]
+
+# --- SEQUENCING ---
+# Routes are open paths: they start at node 0 (the agent) and end at the last
+# drop. The helpers work on a distance matrix over [start, drop1, drop2, ...].
+
+def path_length(matrix: list[list[float]], order: Sequence[int]) -> float:
+    return sum(matrix[a][b] for a, b in zip(order, order[1:]))
+
+def nearest_neighbour(matrix: list[list[float]]) -> list[int]:
+    """Greedy tour from node 0, always driving to the closest unvisited drop"""
+    unvisited = set(range(1, len(matrix)))
+    order = [0]
+    while unvisited:
+        current = order[-1]
+        nearest = min(unvisited, key=lambda node: (matrix[current][node], node))
+        unvisited.remove(nearest)
+        order.append(nearest)
+    return order
+
+def two_opt(matrix: list[list[float]], order: list[int], max_passes: int = 10) -> list[int]:
+    """Reverse segments while that shortens the path; node 0 stays first"""
+    order = list(order)
+    count = len(order)
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, count - 1):
+            for j in range(i + 1, count):
+                a, b = order[i - 1], order[i]
+                c = order[j]
+                d = order[j + 1] if j + 1 < count else None
+                before = matrix[a][b] + (matrix[c][d] if d is not None else 0.0)
+                after = matrix[a][c] + (matrix[b][d] if d is not None else 0.0)
+                if after < before - 1e-9:
+                    order[i:j + 1] = reversed(order[i:j + 1])
+                    improved = True
+        if not improved:
+            break
+    return order
+
+def sequence_drops(start: Point, drops: Sequence[Point], max_passes: int = 10) -> list[int]:
+    """Visit order for `drops` (indexes into it) from `start`: nearest neighbour, then 2-opt"""
+    if len(drops) <= 1:
+        return list(range(len(drops)))
+    matrix = distance_matrix([start, *drops])
+    order = two_opt(matrix, nearest_neighbour(matrix), max_passes)
+    return [node - 1 for node in order[1:]]
+
+# --- TRIP BUILDING ---
+class TripPlanner:
+    """
+    Groups compatible waiting orders into one trip for one agent.
+
+    The oldest order seeds the trip. Other orders join while the agent has
+    capacity if they were placed within `pickup_window` of the seed (same
+    zone, ready together), drop within `drop_radius_km` of a drop already in
+    the trip (or share its pincode when coordinates are unknown), and the
+    re-sequenced route still reaches every order by its promised time or no
+    later than a solo trip would have.
+    """
+
+    def __init__(
+        self,
+        drop_radius_km: float,
+        pickup_window: timedelta,
+        speed_kmph: float,
+        handling_minutes: float,
+        max_passes: int = 10
+    ):
+        self.drop_radius_km = drop_radius_km
+        self.pickup_window = pickup_window
+        self.speed_kmph = speed_kmph
+        self.handling_minutes = handling_minutes
+        self.max_passes = max_passes
+
+    def _arrivals(self, start: Point, drops: Sequence[Point], now: datetime) -> list[datetime]:
+        arrivals, elapsed, position = [], 0.0, start
+        for drop in drops:
+            elapsed += distance_km(position, drop) * 60 / self.speed_kmph + self.handling_minutes
+            arrivals.append(now + timedelta(minutes=elapsed))
+            position = drop
+        return arrivals
+
+    def _close(self, candidate: Stop, trip: list[Stop]) -> bool:
+        if candidate.point is not None and all(stop.point is not None for stop in trip):
+            return any(distance_km(candidate.point, stop.point) <= self.drop_radius_km for stop in trip)
+        return bool(candidate.pincode) and any(stop.pincode == candidate.pincode for stop in trip)
+
+    def _ready_together(self, candidate: Stop, seed: Stop) -> bool:
+        if candidate.created_at is None or seed.created_at is None:
+            return True
+        return abs(candidate.created_at - seed.created_at) <= self.pickup_window
+
+    def sequence(self, start: Optional[Point], trip: list[Stop]) -> list[Stop]:
+        """Drop order for a trip; unlocated trips keep order of placement"""
+        points = [stop.point for stop in trip]
+        if None in points:
+            return sorted(trip, key=lambda stop: (stop.created_at is None, stop.created_at))
+        order = sequence_drops(start or points[0], points, self.max_passes)
+        return [trip[index] for index in order]
+
+    def _on_time(self, start: Optional[Point], trip: list[Stop], now: datetime) -> bool:
+        if start is None or any(stop.point is None for stop in trip):
+            return True
+        arrivals = self._arrivals(start, [stop.point for stop in trip], now)
+        for stop, arrival in zip(trip, arrivals):
+            if stop.deadline is None:
+                continue
+            solo = self._arrivals(start, [stop.point], now)[0]
+            if arrival > max(stop.deadline, solo):
+                return False
+        return True
+
+    def build_trip(self, start: Optional[Point], stops: Sequence[Stop], capacity: int, now: datetime) -> list[Stop]:
+        """Pick and sequence up to `capacity` stops (oldest first) for one agent"""
+        if not stops or capacity < 1:
+            return []
+        waiting = sorted(stops, key=lambda stop: (stop.created_at is None, stop.created_at))
+        seed, candidates = waiting[0], waiting[1:]
+        trip = [seed]
+        for candidate in candidates:
+            if len(trip) >= capacity:
+                break
+            if not self._ready_together(candidate, seed) or not self._close(candidate, trip):
+                continue
+            proposal = self.sequence(start, trip + [candidate])
+            if self._on_time(start, proposal, now):
+                trip = proposal
+        return self.sequence(start, trip)
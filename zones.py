@@ -0,0 +1,63 @@
+# zones.py
+
+import csv
+import os
+from typing import NamedTuple, Optional
+
+from config import settings
+from eta import haversine_km_batch
+
+ZONE_CENTROIDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "zone_centroids.csv")
+
+class ZoneCentroid(NamedTuple):
+    zone: str
+    city: str
+    latitude: float
+    longitude: float
+
+class ZoneMap:
+    """
+    Partitions orders and agents into dispatch zones.
+
+    A zone is the 3-digit postal sorting district (the first three digits of a
+    pincode). Orders take it from their delivery address; agents from the
+    nearest known district centroid to their last reported position.
+    """
+
+    def __init__(self, centroids: list[ZoneCentroid], match_radius_km: float):
+        self.centroids = centroids
+        self.match_radius_km = match_radius_km
+        self._zones_by_city = {centroid.city.casefold(): centroid.zone for centroid in centroids}
+
+    @classmethod
+    def load(cls, path: str = ZONE_CENTROIDS_PATH, match_radius_km: Optional[float] = None) -> "ZoneMap":
+        with open(path, newline="", encoding="utf-8") as f:
+            centroids = [
+                ZoneCentroid(row["zone"], row["city"], float(row["latitude"]), float(row["longitude"]))
+                for row in csv.DictReader(f)
+            ]
+        return cls(centroids, match_radius_km if match_radius_km is not None else settings.ZONE_MATCH_RADIUS_KM)
+
+    def zone_for_address(self, pincode: Optional[str], town_city: Optional[str] = None) -> Optional[str]:
+        """Zone of a delivery address: its pincode prefix, else the zone of a known city"""
+        pincode = (pincode or "").strip()
+        if len(pincode) == 6 and pincode.isdigit():
+            return pincode[:3]
+        if town_city:
+            return self._zones_by_city.get(town_city.strip().casefold())
+        return None
+
+    def zone_for_position(self, latitude: Optional[float], longitude: Optional[float]) -> Optional[str]:
+        """Zone whose centroid is nearest to a point, if within ZONE_MATCH_RADIUS_KM"""
+        if latitude is None or longitude is None or not self.centroids:
+            return None
+        count = len(self.centroids)
+        distances = haversine_km_batch(
+            [latitude] * count, [longitude] * count,
+            [centroid.latitude for centroid in self.centroids],
+            [centroid.longitude for centroid in self.centroids]
+        )
+        distance, index = min(zip(distances, range(count)))
+        return self.centroids[index].zone if distance <= self.match_radius_km else None
+
+zone_map = ZoneMap.load()